@@ -0,0 +1,76 @@
+from collections import OrderedDict
+
+from django.conf import settings
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from questions.pagination import InvalidCursor, KeysetPaginator
+from questions.tags import tag_directory
+
+
+class KeysetPagination(BasePagination):
+    """ Cursor pagination keyed on the ordering of the query set
+    (after filter backends have been applied). Unlike DRF's own
+    `CursorPagination` it supports multi-column orderings
+    and never runs a COUNT query.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        paginator = KeysetPaginator(queryset, ordering, self.page_size)
+
+        try:
+            self.page = paginator.page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor.")
+
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_link(self.page.next_cursor)),
+                    ("previous", self.get_link(self.page.previous_cursor)),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+class TagsPagination(KeysetPagination):
+    """ Pages of the tag directory, they are served from its cache
+    (see `questions.tags`) instead of the query set of the view.
+    """
+
+    sort_query_param = "sort"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        sort = request.query_params.get(self.sort_query_param, "")
+
+        try:
+            self.page = tag_directory.page(
+                sort.strip().lower(),
+                request.query_params.get(self.cursor_query_param),
+                self.page_size,
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor.")
+
+        self.request = request
+        return list(self.page)
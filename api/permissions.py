@@ -24,5 +24,5 @@ class IsOwnerOfQuestionOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        # Instance must have an attribute named `user`.
-        return answer.question.author == request.user
+        # Only the question is needed, not its author
+        return answer.question.author_id == request.user.pk
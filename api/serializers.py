@@ -3,7 +3,13 @@ from django.contrib.auth import get_user_model
 
 from rest_framework import serializers
 
-from questions.models import Answer, AnswerVote, Question, QuestionVote
+from questions.models import (
+    Answer,
+    AnswerVote,
+    Question,
+    QuestionVote,
+    Tag,
+)
 
 
 class QuestionTagsField(serializers.ListField):
@@ -11,7 +17,7 @@ class QuestionTagsField(serializers.ListField):
         return [str(tag) for tag in question.tags.all()]
 
     def run_validation(self, data):
-        tags = (tag.strip().lower() for tag in data)
+        tags = (Tag.normalize(tag) for tag in data)
         tags = set(filter(bool, tags))
         return super().run_validation(sorted(tags))
 
@@ -28,10 +34,22 @@ class UserSerializer(serializers.ModelSerializer):
         return user.get_photo_url()
 
     def get_photo_small_url(self, user):
-        return user.get_thumb_url()
+        return user.get_mid_url()
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class MyVoteMixin(serializers.Serializer):
+    """ Adds the value of the vote of the current user for the post.
+    Votes for all serialized posts are looked up by the view
+    at once and passed in `my_votes` of the context.
+    """
+
+    my_vote = serializers.SerializerMethodField()
+
+    def get_my_vote(self, post):
+        return self.context.get("my_votes", {}).get(post.pk)
+
+
+class QuestionSerializer(MyVoteMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     tags = QuestionTagsField(
         child=serializers.CharField(max_length=settings.QUESTIONS_MAX_TAG_LEN),
@@ -41,9 +59,12 @@ class QuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
-        fields = "__all__"
+        # Version of cached fragments is not a part of the API
+        exclude = ["content_renderer", "excerpt", "version"]
         read_only_fields = [
+            "accepted_answer",
             "author",
+            "hotness",
             "number_of_answers",
             "number_of_votes",
             "posted",
@@ -57,12 +78,21 @@ class QuestionSerializer(serializers.ModelSerializer):
         return new_question
 
 
-class AnswerSerializer(serializers.ModelSerializer):
+class QuestionListSerializer(QuestionSerializer):
+    """ Compact representation of questions in lists,
+    with `excerpt` instead of the whole `content`.
+    """
+
+    class Meta(QuestionSerializer.Meta):
+        exclude = ["content", "content_html", "content_renderer", "version"]
+
+
+class AnswerSerializer(MyVoteMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
 
     class Meta:
         model = Answer
-        fields = "__all__"
+        exclude = ["content_renderer", "version"]
         read_only_fields = [
             "author",
             "is_accepted",
@@ -73,12 +103,12 @@ class AnswerSerializer(serializers.ModelSerializer):
         ]
 
 
-class AnswerDetailSerializer(serializers.ModelSerializer):
+class AnswerDetailSerializer(MyVoteMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
 
     class Meta:
         model = Answer
-        fields = "__all__"
+        exclude = ["content_renderer", "version"]
         read_only_fields = [
             "author",
             "content",
@@ -89,6 +119,12 @@ class AnswerDetailSerializer(serializers.ModelSerializer):
         ]
 
 
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ["name", "number_of_questions"]
+
+
 class AnswerVoteSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
@@ -100,14 +136,6 @@ class AnswerVoteSerializer(serializers.ModelSerializer):
             "timestamp",
         ]
 
-    def validate(self, data):
-        answer_pk = self.context["view"].kwargs["pk"]
-        user = self.context["request"].user
-
-        if AnswerVote.objects.filter(to=answer_pk, user=user).exists():
-            raise serializers.ValidationError("Vote already exists.")
-        return data
-
 
 class QuestionVoteSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -119,11 +147,3 @@ class QuestionVoteSerializer(serializers.ModelSerializer):
             "user",
             "timestamp",
         ]
-
-    def validate(self, data):
-        question_pk = self.context["view"].kwargs["pk"]
-        user = self.context["request"].user
-
-        if QuestionVote.objects.filter(to=question_pk, user=user).exists():
-            raise serializers.ValidationError("Vote already exists.")
-        return data
@@ -1,8 +1,12 @@
+from unittest import mock
+
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from api.pagination import KeysetPagination
+
 from questions.tests.fixtures import CreateDataMixin
 from questions.models import Answer, Question
 
@@ -21,13 +25,30 @@ class AnswersTests(CreateDataMixin, APITestCase):
         data = response.json()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(data.get("count"), 5)
         self.assertEqual(len(data.get("results", [])), 5)
         self.assertEqual(
             {item["author"]["username"] for item in data.get("results", [])},
             {user.username for user in users},
         )
 
+    @mock.patch.object(KeysetPagination, "page_size", 2)
+    def test_answers_accepted_first(self):
+        question = self.create_question()
+        answers = [self.create_answer(question) for _ in range(5)]
+        for rating, answer in enumerate(answers):
+            Answer.objects.filter(pk=answer.pk).update(rating=rating)
+        answers[1].mark()
+
+        url = reverse("api_answers", kwargs={"pk": question.pk})
+        ids = []
+        while url is not None:
+            data = self.client.get(url, format="json").json()
+            ids.extend(item["id"] for item in data["results"])
+            url = data["next"]
+
+        expected = [answers[n].pk for n in (1, 4, 3, 2, 0)]
+        self.assertEqual(ids, expected)
+
     def test_answers_post_unauthorized(self):
         author = self.create_user()
         question = self.create_question(user=author)
@@ -176,3 +197,7 @@ class AnswersTests(CreateDataMixin, APITestCase):
             Answer.objects.get(question=question, is_accepted=True).pk,
             answers[2].pk,
         )
+
+        url = reverse("api_question_details", kwargs={"pk": question.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.json()["accepted_answer"], answers[2].pk)
@@ -0,0 +1,201 @@
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from questions.models import Tag
+from questions.tests.fixtures import CreateDataMixin
+from questions.tests.queries import QueryBudgetMixin
+
+
+class QueryBudgetsTests(QueryBudgetMixin, CreateDataMixin, APITestCase):
+    query_budgets = {
+        "api_questions": 2,
+        "api_questions_my_votes": 3,
+        "api_questions_search": 2,
+        "api_questions_post": 12,
+        "api_question_details": 2,
+        "api_answers": 2,
+        "api_answers_my_votes": 3,
+        "api_answers_post": 3,
+        "api_answer_details": 1,
+        "api_answer_details_patch": 5,
+        "api_question_votes": 3,
+        "api_question_votes_post": 5,
+        "api_question_vote_details": 2,
+        "api_answer_votes": 3,
+        "api_answer_votes_post": 4,
+        "api_answer_vote_details": 2,
+        "api_tags": 0,
+        "api_ratings": 2,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.tag = Tag.objects.create(name="budget")
+        self.question.title += " budget"
+        self.question.save()
+        self.question.tags.add(self.tag)
+
+    def add_questions(self, count=5):
+        for _ in range(count):
+            question = self.create_question(self.create_user())
+            question.title += " budget"
+            question.save()
+            tag = Tag.objects.create(name=f"tag{question.pk}")
+            question.tags.add(self.tag, tag)
+
+    def add_answers(self, count=5):
+        for _ in range(count):
+            self.create_answer(self.question, self.create_user())
+
+    def add_votes(self, count=5):
+        for _ in range(count):
+            user = self.create_user()
+            self.question.vote(user, 1)
+            self.answer_1.vote(user, 1)
+
+    def test_questions(self):
+        url = reverse("api_questions")
+        self.assertQueryBudget(
+            "api_questions", lambda: self.client.get(url), self.add_questions
+        )
+        self.assertQueryBudget(
+            "api_questions_search",
+            lambda: self.client.get(url, {"search": "budget"}),
+            self.add_questions,
+        )
+
+    def test_my_votes(self):
+        self.client.force_authenticate(user=self.user)
+
+        def add_voted_questions():
+            for _ in range(5):
+                self.create_question(self.create_user()).vote(self.user, 1)
+
+        def add_voted_answers():
+            for _ in range(5):
+                answer = self.create_answer(self.question, self.create_user())
+                answer.vote(self.user, -1)
+
+        url = reverse("api_questions")
+        self.assertQueryBudget(
+            "api_questions_my_votes",
+            lambda: self.client.get(url),
+            add_voted_questions,
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            {question["my_vote"] for question in response.json()["results"]},
+            {1, None},
+        )
+
+        url = reverse("api_answers", kwargs={"pk": self.question.pk})
+        self.assertQueryBudget(
+            "api_answers_my_votes",
+            lambda: self.client.get(url),
+            add_voted_answers,
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            {answer["my_vote"] for answer in response.json()["results"]},
+            {-1, None},
+        )
+
+    def test_questions_post(self):
+        self.client.force_authenticate(user=self.user)
+        with self.assertMaxQueries(self.query_budgets["api_questions_post"]):
+            response = self.client.post(
+                reverse("api_questions"),
+                data={"title": "T", "content": "C", "tags": ["a", "b", "c"]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_tags(self):
+        url = reverse("api_tags")
+        self.assertQueryBudget(
+            "api_tags", lambda: self.client.get(url), self.add_questions
+        )
+
+    def test_ratings(self):
+        # Ids of all the rows, present and added by `grow`
+        ids = ",".join(str(pk) for pk in range(1, 300))
+        url = reverse("api_ratings")
+
+        def add_posts():
+            self.add_questions()
+            self.add_answers()
+
+        self.assertQueryBudget(
+            "api_ratings",
+            lambda: self.client.get(url, {"questions": ids, "answers": ids}),
+            add_posts,
+        )
+
+    def test_question_details(self):
+        url = reverse("api_question_details", kwargs={"pk": self.question.pk})
+        self.assertQueryBudget(
+            "api_question_details", lambda: self.client.get(url)
+        )
+
+    def test_answers(self):
+        url = reverse("api_answers", kwargs={"pk": self.question.pk})
+        self.assertQueryBudget(
+            "api_answers", lambda: self.client.get(url), self.add_answers
+        )
+
+        self.client.force_authenticate(user=self.user)
+        with self.assertMaxQueries(self.query_budgets["api_answers_post"]):
+            response = self.client.post(
+                url, data={"content": "Answer"}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_answer_details(self):
+        url = reverse("api_answer_details", kwargs={"pk": self.answer_1.pk})
+        self.assertQueryBudget(
+            "api_answer_details", lambda: self.client.get(url)
+        )
+
+        self.client.force_authenticate(user=self.user)
+        budget = self.query_budgets["api_answer_details_patch"]
+        with self.assertMaxQueries(budget):
+            response = self.client.patch(
+                url, data={"is_accepted": True}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_votes(self):
+        self.add_votes()
+        for endpoint, post in [
+            ("api_question_votes", self.question),
+            ("api_answer_votes", self.answer_1),
+        ]:
+            url = reverse(endpoint, kwargs={"pk": post.pk})
+            with self.subTest(endpoint=endpoint):
+                self.assertQueryBudget(
+                    endpoint, lambda: self.client.get(url), self.add_votes
+                )
+
+                self.client.force_authenticate(user=self.user)
+                with self.assertMaxQueries(
+                    self.query_budgets[f"{endpoint}_post"]
+                ):
+                    response = self.client.post(
+                        url, data={"value": 1}, format="json"
+                    )
+                self.assertEqual(response.status_code, 201)
+                self.client.force_authenticate(user=None)
+
+    def test_vote_details(self):
+        self.question.vote(self.user, 1)
+        self.answer_1.vote(self.user, 1)
+
+        for endpoint, post, kwarg in [
+            ("api_question_vote_details", self.question, "question_pk"),
+            ("api_answer_vote_details", self.answer_1, "answer_pk"),
+        ]:
+            vote = post.votes.get(user=self.user)
+            url = reverse(endpoint, kwargs={kwarg: post.pk, "pk": vote.pk})
+            with self.subTest(endpoint=endpoint):
+                self.assertQueryBudget(endpoint, lambda: self.client.get(url))
@@ -20,9 +20,46 @@ class QuestionsTests(CreateDataMixin, APITestCase):
 
         count = Question.objects.count()
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(data.get("count"), count)
+        self.assertNotIn("count", data)
         self.assertEqual(len(data.get("results", [])), count)
 
+        # Lists show excerpts, the whole content is in details
+        question = data["results"][0]
+        self.assertNotIn("content", question)
+        self.assertEqual(
+            question["excerpt"],
+            Question.objects.get(pk=question["id"]).excerpt,
+        )
+
+    def test_questions_get_cursor(self):
+        user = self.create_user()
+        for _ in range(15):
+            self.create_question(user)
+
+        url = reverse("api_questions")
+        response = self.client.get(url + "?sort=popular", format="json")
+        first = response.json()
+
+        self.assertIsNone(first["previous"])
+        self.assertIn("sort=popular", first["next"])
+
+        response = self.client.get(first["next"], format="json")
+        second = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(second["previous"])
+        self.assertEqual(
+            len(first["results"]) + len(second["results"]),
+            Question.objects.count(),
+        )
+        self.assertFalse(
+            {item["id"] for item in first["results"]}
+            & {item["id"] for item in second["results"]}
+        )
+
+        response = self.client.get(url + "?cursor=abc", format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_questions_get_search(self):
         user = self.create_user()
         questions = [self.create_question(user) for _ in range(5)]
@@ -34,7 +71,6 @@ class QuestionsTests(CreateDataMixin, APITestCase):
         data = response.json()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(data.get("count"), 1)
         self.assertEqual(len(data.get("results", [])), 1)
         self.assertEqual(data["results"][0]["id"], questions[2].id)
 
@@ -50,14 +86,12 @@ class QuestionsTests(CreateDataMixin, APITestCase):
         data = response.json()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(data.get("count"), 2)
         self.assertEqual(len(data.get("results", [])), 2)
 
         response = self.client.get(url + f"?tag=bbb", format="json")
         data = response.json()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(data.get("count"), 1)
         self.assertEqual(len(data.get("results", [])), 1)
 
     def test_questions_post_unauthorized(self):
@@ -107,6 +141,20 @@ class QuestionsTests(CreateDataMixin, APITestCase):
         self.assertEqual(data.get("author", {}).get("username"), user.username)
         self.assertEqual(data.get("content"), question.content)
         self.assertEqual(data.get("title"), question.title)
+        self.assertIsNone(data.get("my_vote"))
+
+    def test_question_details_my_vote(self):
+        question = self.create_question(self.create_user())
+        question.vote(self.user, -1)
+
+        url = reverse("api_question_details", kwargs={"pk": question.pk})
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.json()["my_vote"], -1)
+
+        self.client.force_authenticate(user=self.create_user())
+        response = self.client.get(url, format="json")
+        self.assertIsNone(response.json()["my_vote"])
 
     def test_question_votes_get(self):
         user = self.create_user()
@@ -151,6 +199,24 @@ class QuestionsTests(CreateDataMixin, APITestCase):
         self.assertEqual(data.get("user", {}).get("id"), voter.id)
         self.assertEqual(data.get("value"), 1)
 
+    def test_question_votes_post_twice(self):
+        question = self.create_question()
+
+        voter = self.create_user()
+        question.vote(voter, 1)
+        self.client.force_authenticate(user=voter)
+
+        url = reverse("api_question_votes", kwargs={"pk": question.pk})
+        response = self.client.post(url, data={"value": -1}, format="json")
+        data = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(data, {"non_field_errors": ["Vote already exists."]})
+
+        question.refresh_from_db()
+        self.assertEqual(question.rating, 1)
+        self.assertEqual(question.votes.get().value, 1)
+
     def test_question_vote_change_unauthorized(self):
         question = self.create_question()
 
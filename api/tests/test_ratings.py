@@ -0,0 +1,77 @@
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from questions.tests.fixtures import CreateDataMixin
+
+
+class RatingsTests(CreateDataMixin, APITestCase):
+    def setUp(self):
+        self.url = reverse("api_ratings")
+        self.params = {
+            "questions": f"{self.question.pk}, 0",
+            "answers": f"{self.answer_1.pk},{self.answer_2.pk}",
+        }
+
+    def test_ratings_get(self):
+        self.question.vote(self.create_user(), 1)
+        self.answer_2.vote(self.create_user(), -1)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "questions": {
+                    str(self.question.pk): {
+                        "rating": 1,
+                        "number_of_votes": 1,
+                        "number_of_answers": 2,
+                    }
+                },
+                "answers": {
+                    str(self.answer_1.pk): {
+                        "rating": 0,
+                        "number_of_votes": 0,
+                    },
+                    str(self.answer_2.pk): {
+                        "rating": -1,
+                        "number_of_votes": 1,
+                    },
+                },
+            },
+        )
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), {"questions": {}, "answers": {}})
+
+    def test_ratings_not_modified(self):
+        response = self.client.get(self.url, self.params)
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        response = self.client.get(
+            self.url, self.params, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        self.answer_1.vote(self.create_user(), 1)
+        response = self.client.get(
+            self.url, self.params, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_ratings_invalid(self):
+        response = self.client.get(self.url, {"questions": "1,a"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("questions", response.json())
+
+        ids = ",".join(str(pk) for pk in range(1000))
+        response = self.client.get(self.url, {"answers": ids})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("answers", response.json())
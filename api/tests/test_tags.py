@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from questions.completion import tag_completer
+from questions.tests.fixtures import CreateDataMixin
+
+
+class TagsTests(CreateDataMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tags_get(self):
+        self.create_question().add_tags(["aaa", "bbb"], self.user)
+        self.create_question().add_tags(["bbb"], self.user)
+
+        url = reverse("api_tags")
+        response = self.client.get(url, format="json")
+        data = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            data["results"],
+            [
+                {"name": "bbb", "number_of_questions": 2},
+                {"name": "aaa", "number_of_questions": 1},
+            ],
+        )
+
+        response = self.client.get(url, {"sort": "name"}, format="json")
+        self.assertEqual(
+            [tag["name"] for tag in response.json()["results"]],
+            ["aaa", "bbb"],
+        )
+
+    def test_tags_get_cursor(self):
+        for n in range(15):
+            self.create_question().add_tags([f"tag{n:02}"], self.user)
+
+        url = reverse("api_tags")
+        response = self.client.get(url, {"sort": "name"}, format="json")
+        data = response.json()
+        self.assertEqual(len(data["results"]), 10)
+        self.assertIsNone(data["previous"])
+
+        response = self.client.get(data["next"], format="json")
+        data = response.json()
+        self.assertEqual(
+            [tag["name"] for tag in data["results"]],
+            [f"tag{n:02}" for n in range(10, 15)],
+        )
+        self.assertIsNone(data["next"])
+
+        response = self.client.get(url, {"cursor": "invalid"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tags_complete(self):
+        tag_completer.clear()
+        self.addCleanup(tag_completer.clear)
+        # Completions are queried while the index isn't built
+        patcher = mock.patch.object(tag_completer, "start_thread")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.create_question().add_tags(["python", "django"], self.user)
+        self.create_question().add_tags(["python", "pytest"], self.user)
+
+        url = reverse("api_tags_complete")
+        response = self.client.get(url, {"prefix": "PY"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            [
+                {"name": "python", "number_of_questions": 2},
+                {"name": "pytest", "number_of_questions": 1},
+            ],
+        )
+
+        response = self.client.get(
+            url, {"prefix": "py", "limit": 1}, format="json"
+        )
+        self.assertEqual(
+            [tag["name"] for tag in response.json()], ["python"]
+        )
+
+        response = self.client.get(url, {"limit": "many"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
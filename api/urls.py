@@ -44,6 +44,13 @@ urlpatterns = [
         views.AnswerVoteDetailsAPIView.as_view(),
         name="api_answer_vote_details",
     ),
+    path("ratings", views.RatingsAPIView.as_view(), name="api_ratings"),
+    path("tags", views.TagsAPIView.as_view(), name="api_tags"),
+    path(
+        "tags/complete",
+        views.TagsCompleteAPIView.as_view(),
+        name="api_tags_complete",
+    ),
 ]
 
 
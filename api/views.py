@@ -1,33 +1,88 @@
+import hashlib
+import json
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, quote_etag
 
 from rest_framework import filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import (
+    GenericAPIView,
+    ListAPIView,
     ListCreateAPIView,
     RetrieveAPIView,
     RetrieveUpdateAPIView,
     RetrieveUpdateDestroyAPIView,
 )
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from questions.models import (
+    Answer,
+    AnswerVote,
+    Question,
+    QuestionVote,
+    Tag,
+)
+from questions.completion import tag_completer
+from questions.search import get_search_backend
+from questions.utils import parse_ids
 
-from questions.models import Answer, AnswerVote, Question, QuestionVote
-
+from .pagination import KeysetPagination, TagsPagination
 from .permissions import IsOwnerOfQuestionOrReadOnly, IsOwnerOrReadOnly
 from .serializers import (
     AnswerSerializer,
     AnswerDetailSerializer,
     AnswerVoteSerializer,
+    QuestionListSerializer,
     QuestionSerializer,
     QuestionVoteSerializer,
+    TagSerializer,
 )
 
 
+def add_vote(post, user, value):
+    """ Add a new vote, voting twice is a validation error.
+    """
+    if not post.add_vote(user, value):
+        raise ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: ["Vote already exists."]}
+        )
+
+
+class MyVotesMixin:
+    """ Looks up votes of the user for all posts a response consists of
+    with one query and passes them to the serializer (`my_vote`).
+    """
+
+    my_votes = None
+
+    def get_serializer(self, *args, **kwargs):
+        if args and args[0] is not None:
+            posts = args[0] if kwargs.get("many") else [args[0]]
+            model = self.get_queryset().model
+            self.my_votes = model.get_votes_of(
+                self.request.user, (post.pk for post in posts)
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.my_votes is not None:
+            context["my_votes"] = self.my_votes
+        return context
+
+
 class QuestionsTagFilter(filters.BaseFilterBackend):
     """ Filter questions by specified tag.
     """
 
     def filter_queryset(self, request, queryset, view):
         tag = request.query_params.get("tag", "")
-        tag = tag.strip().lower()
+        tag = Tag.normalize(tag)
 
         if not tag:
             return queryset
@@ -35,14 +90,31 @@ class QuestionsTagFilter(filters.BaseFilterBackend):
         return queryset.filter(tags__name=tag)
 
 
+class QuestionsSearchFilter(filters.BaseFilterBackend):
+    """ Full-text search of questions, the most relevant first.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+
+        if not query:
+            return queryset
+
+        queryset = get_search_backend().search(queryset, query)
+        return queryset.order_by("-relevance", "-pk")
+
+
 class QuestionsOrderingFilter(filters.BaseFilterBackend):
     """ Ordering for questions.
     """
 
     VALID_SORTS = {
-        "latest": "-posted",
-        "popular": "-rating",
-        "trending": "-number_of_votes",
+        "latest": ("-posted", "-pk"),
+        "popular": ("-rating", "-posted"),
+        "hot": ("-hotness", "pk"),
+        "trending": ("-hotness", "pk"),
     }
 
     def filter_queryset(self, request, queryset, view):
@@ -52,32 +124,39 @@ class QuestionsOrderingFilter(filters.BaseFilterBackend):
         if sort not in self.VALID_SORTS:
             return queryset
 
-        return queryset.order_by(self.VALID_SORTS[sort])
+        return queryset.order_by(*self.VALID_SORTS[sort])
 
 
-class QuestionsAPIView(ListCreateAPIView):
+class QuestionsAPIView(MyVotesMixin, ListCreateAPIView):
 
     filter_backends = [
-        QuestionsOrderingFilter,
         QuestionsTagFilter,
-        filters.SearchFilter,
+        QuestionsSearchFilter,
+        QuestionsOrderingFilter,
     ]
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
-    search_fields = ["title", "content"]
     serializer_class = QuestionSerializer
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return QuestionListSerializer
+        return super().get_serializer_class()
+
     def get_queryset(self):
-        queryset = Question.objects.all()
+        queryset = Question.objects.order_by("-posted", "-pk")
+        # The list shows `excerpt` of questions
+        queryset = queryset.defer("content", "content_html")
         queryset = queryset.select_related("author")
         queryset = queryset.prefetch_related("tags")
 
         return queryset
 
 
-class QuestionDetailsAPIView(RetrieveAPIView):
+class QuestionDetailsAPIView(MyVotesMixin, RetrieveAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = QuestionSerializer
 
@@ -108,7 +187,9 @@ class QuestionVotesAPIView(ListCreateAPIView):
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user, to=self.question)
+        value = serializer.validated_data["value"]
+        add_vote(self.question, self.request.user, value)
+        serializer.instance = self.get_queryset().get(user=self.request.user)
 
 
 class QuestionVoteDetailsAPIView(RetrieveUpdateDestroyAPIView):
@@ -131,8 +212,20 @@ class QuestionVoteDetailsAPIView(RetrieveUpdateDestroyAPIView):
 
         return queryset
 
+    def perform_update(self, serializer):
+        vote = serializer.instance
+        value = serializer.validated_data.get("value", vote.value)
+
+        if value != vote.value:
+            self.question.change_vote(vote.user, value)
+            vote.refresh_from_db(fields=["timestamp", "value"])
+
+    def perform_destroy(self, vote):
+        self.question.retract_vote(vote.user)
 
-class AnswersAPIView(ListCreateAPIView):
+
+class AnswersAPIView(MyVotesMixin, ListCreateAPIView):
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = AnswerSerializer
 
@@ -145,15 +238,23 @@ class AnswersAPIView(ListCreateAPIView):
 
     def get_queryset(self):
         queryset = Answer.objects.all()
+        queryset = queryset.select_related("author")
         queryset = queryset.filter(question=self.question)
-        queryset = queryset.order_by("-is_accepted", "-rating", "-posted")
+        # The accepted answer (`accepted_answer` of the question) first
+        queryset = queryset.annotate(
+            accepted=ExpressionWrapper(
+                Q(pk=self.question.accepted_answer_id),
+                output_field=BooleanField(),
+            )
+        )
+        queryset = queryset.order_by("-accepted", "-rating", "-posted")
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, question=self.question)
 
 
-class AnswerDetailsAPIView(RetrieveUpdateAPIView):
+class AnswerDetailsAPIView(MyVotesMixin, RetrieveUpdateAPIView):
     http_method_names = ["get", "patch", "head", "options"]
     permission_classes = [
         IsAuthenticatedOrReadOnly,
@@ -163,18 +264,20 @@ class AnswerDetailsAPIView(RetrieveUpdateAPIView):
 
     def get_queryset(self):
         queryset = Answer.objects.all()
-        queryset = queryset.select_related("author")
+        queryset = queryset.select_related("author", "question")
 
         return queryset
 
     def perform_update(self, serializer):
         """ Mark / unmark answer as accepted one
+        (`Answer.mark` / `unmark` are atomic)
         """
         answer = serializer.instance
+        is_accepted = answer.question.accepted_answer_id == answer.pk
         is_accepted_new = serializer.validated_data["is_accepted"]
 
         # Do nothing if `is_accepted` is not changed
-        if answer.is_accepted == is_accepted_new:
+        if is_accepted == is_accepted_new:
             return
 
         if is_accepted_new:
@@ -202,7 +305,9 @@ class AnswerVotesAPIView(ListCreateAPIView):
         return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user, to=self.answer)
+        value = serializer.validated_data["value"]
+        add_vote(self.answer, self.request.user, value)
+        serializer.instance = self.get_queryset().get(user=self.request.user)
 
 
 class AnswerVoteDetailsAPIView(RetrieveUpdateDestroyAPIView):
@@ -224,3 +329,96 @@ class AnswerVoteDetailsAPIView(RetrieveUpdateDestroyAPIView):
         queryset = queryset.select_related("user")
 
         return queryset
+
+    def perform_update(self, serializer):
+        vote = serializer.instance
+        value = serializer.validated_data.get("value", vote.value)
+
+        if value != vote.value:
+            self.answer.change_vote(vote.user, value)
+            vote.refresh_from_db(fields=["timestamp", "value"])
+
+    def perform_destroy(self, vote):
+        self.answer.retract_vote(vote.user)
+
+
+class TagsAPIView(ListAPIView):
+    """ Tags sorted by the number of questions (`sort=popular`,
+    default) or by name (`sort=name`).
+    """
+
+    pagination_class = TagsPagination
+    serializer_class = TagSerializer
+
+    def get_queryset(self):
+        return Tag.objects.all()
+
+
+class TagsCompleteAPIView(GenericAPIView):
+    """ The most used tags starting with `prefix`, served from
+    the in-memory index of the process (see `questions.completion`).
+    """
+
+    serializer_class = TagSerializer
+
+    def get(self, request, *args, **kwargs):
+        prefix = request.query_params.get("prefix", "")
+        try:
+            limit = int(request.query_params.get("limit", tag_completer.size))
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+
+        tags = [
+            Tag(name=name, number_of_questions=number_of_questions)
+            for name, number_of_questions in tag_completer.complete(
+                prefix, max(limit, 0)
+            )
+        ]
+        return Response(self.get_serializer(tags, many=True).data)
+
+
+class RatingsAPIView(APIView):
+    """ Current counters of many questions and answers at once
+    (`questions=1,2,3&answers=4,5`), for pages polling for changes.
+
+    Each model is read with one `values()` query of its own columns,
+    the response carries an `ETag` of the counters, so unchanged ones
+    are answered with `304 Not Modified`. The data is public, so the
+    request isn't authenticated to save session lookups.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+    max_ids = 300
+    fields = {
+        "questions": (
+            Question,
+            ["rating", "number_of_votes", "number_of_answers"],
+        ),
+        "answers": (Answer, ["rating", "number_of_votes"]),
+    }
+
+    def get(self, request, *args, **kwargs):
+        data = {}
+        for name, (model, fields) in self.fields.items():
+            try:
+                ids = parse_ids(
+                    request.query_params.get(name, ""), self.max_ids
+                )
+            except ValueError as error:
+                raise ValidationError({name: [str(error)]})
+            data[name] = self.get_counters(model, ids, fields)
+
+        etag = quote_etag(
+            hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        )
+        response = Response(data)
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return get_conditional_response(request, etag=etag, response=response)
+
+    def get_counters(self, model, ids, fields):
+        if not ids:
+            return {}
+        rows = model.objects.filter(pk__in=ids).order_by()
+        return {row.pop("pk"): row for row in rows.values("pk", *fields)}
@@ -0,0 +1,212 @@
+import json
+import platform
+
+from io import StringIO
+
+import django
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from benchmarks import runner
+from benchmarks.scenarios import DatasetError, get_scenarios, load_dataset
+from questions.models import Answer, AnswerVote, Question, QuestionVote, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot pages and the API endpoints through the test "
+        "client: latency percentiles, queries and allocated memory "
+        "per request. Everything the requests change is rolled back, "
+        "on-commit callbacks are run (and measured) after every request. "
+        "Cached data and live events go to private in-process caches "
+        "and broker (the configured ones aren't used). Results can be "
+        "saved to JSON and compared with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--allocations",
+            type=int,
+            default=5,
+            help="Number of requests measured under tracemalloc.",
+        )
+        parser.add_argument(
+            "--scenarios",
+            nargs="+",
+            default=None,
+            help="Names of the scenarios to run (all by default).",
+        )
+        parser.add_argument(
+            "--generate",
+            type=int,
+            default=0,
+            help=(
+                "Generate this number of questions before running "
+                "(see generate_data), they are rolled back as well."
+            ),
+        )
+        parser.add_argument("--output", help="Save results to JSON file.")
+        parser.add_argument(
+            "--baseline", help="Compare results with a saved JSON file."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed slowdown relative to the baseline (a fraction).",
+        )
+        parser.add_argument(
+            "--page-cache",
+            action="store_true",
+            help="Serve pages from the page cache (they are rendered "
+            "by the views otherwise).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    @override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        page_cache = override_settings(
+            QUESTIONS_PAGE_CACHE_ENABLED=(
+                options["page_cache"] and settings.QUESTIONS_PAGE_CACHE_ENABLED
+            )
+        )
+        # Live events of the rolled back changes aren't sent to readers
+        broker = override_settings(
+            QUESTIONS_LIVE_BROKER="questions.live.LocalBroker"
+        )
+        with page_cache, broker, self.private_caches(), transaction.atomic():
+            report = self.run(options)
+            transaction.set_rollback(True)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results have been saved to {f.name}")
+
+        if baseline is not None:
+            self.compare(report, baseline, options["threshold"])
+
+    def private_caches(self):
+        """ Requests fill the caches with data that is rolled back
+        afterwards and the runs start with cleared caches, so the
+        configured (possibly shared) caches are replaced with
+        in-process ones for the run.
+        """
+        return override_settings(
+            CACHES={
+                alias: {
+                    "BACKEND": (
+                        "django.core.cache.backends.locmem.LocMemCache"
+                    ),
+                    "LOCATION": f"benchmarks-{alias}",
+                    "TIMEOUT": config.get("TIMEOUT", 300),
+                    "OPTIONS": {"MAX_ENTRIES": 100000},
+                }
+                for alias, config in settings.CACHES.items()
+            }
+        )
+
+    def run(self, options):
+        if options["generate"]:
+            call_command(
+                "generate_data",
+                questions=options["generate"],
+                users=max(options["generate"] // 10, 10),
+                seed=options["seed"],
+                stdout=StringIO(),
+            )
+
+        try:
+            data = load_dataset(seed=options["seed"])
+        except DatasetError as exc:
+            raise CommandError(
+                f"{exc} Fill the database with generate_data "
+                f"or use --generate."
+            )
+
+        # Scenarios add posts
+        dataset = {
+            model._meta.model_name: model.objects.count()
+            for model in (Question, Answer, QuestionVote, AnswerVote, Tag)
+        }
+        scenarios = get_scenarios(data)
+        if options["scenarios"]:
+            unknown = set(options["scenarios"]) - {s.name for s in scenarios}
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {sorted(unknown)}")
+            scenarios = [
+                s for s in scenarios if s.name in options["scenarios"]
+            ]
+
+        # Runs start with the same (cold) caches
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+        self.stdout.write(
+            f"{'scenario':<34} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'KiB':>8}"
+        )
+        results = {}
+        for scenario in scenarios:
+            try:
+                metrics = runner.run(
+                    scenario,
+                    requests=options["requests"],
+                    warmup=options["warmup"],
+                    allocations=options["allocations"],
+                )
+            except runner.BenchmarkError as exc:
+                raise CommandError(f"Scenario has failed: {exc}")
+            results[scenario.name] = metrics
+            self.stdout.write(
+                f"{scenario.name:<34} {metrics['p50_ms']:>8.2f} "
+                f"{metrics['p95_ms']:>8.2f} {metrics['p99_ms']:>8.2f} "
+                f"{metrics['queries']:>8.1f} {metrics['alloc_kib']:>8.0f}"
+            )
+
+        return {
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "dataset": dataset,
+            "requests": options["requests"],
+            "results": results,
+        }
+
+    def compare(self, report, baseline, threshold):
+        regressions = runner.compare(
+            report["results"], baseline["results"], threshold
+        )
+        missing = set(report["results"]) - set(baseline["results"])
+        if missing:
+            self.stdout.write(f"Not in the baseline: {sorted(missing)}")
+        if baseline.get("dataset") != report["dataset"]:
+            self.stdout.write(
+                "The baseline has been measured on another dataset."
+            )
+
+        for regression in regressions:
+            self.stdout.write(
+                f"REGRESSION {regression.scenario} {regression.metric}: "
+                f"{regression.baseline:.2f} -> {regression.value:.2f}"
+            )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} metrics have regressed "
+                f"by more than {threshold:.0%}."
+            )
+        self.stdout.write("No regressions.")
@@ -0,0 +1,151 @@
+""" Running of the benchmark scenarios and comparison of the results.
+
+Every scenario is requested `warmup` times first (caches are warmed up
+as they would be in production), then `requests` times measuring
+latency and queries per request and at last a few times under
+`tracemalloc`, which slows requests down too much to be measured
+at the same time, for allocated memory per request.
+
+The whole run is rolled back, so `transaction.on_commit` callbacks
+(trending and page cache updates, live events) would never run.
+They are run after every request instead, as if its transaction had
+been committed, and are measured as a part of the request.
+"""
+import math
+import statistics
+import time
+import tracemalloc
+
+from itertools import islice
+from typing import Dict, List, NamedTuple
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .scenarios import Scenario
+
+
+# Metrics compared with a baseline (a larger value is worse) and
+# differences too small to be told from noise
+COMPARED = {"p50_ms": 1.0, "p95_ms": 1.0, "queries": 0, "alloc_kib": 16}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Regression(NamedTuple):
+    scenario: str
+    metric: str
+    baseline: float
+    value: float
+
+
+def percentile(values: List[float], p: float) -> float:
+    """ Nearest-rank percentile of sorted `values`.
+    """
+    rank = math.ceil(p / 100 * len(values))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def run_commit_hooks() -> None:
+    """ Run the `transaction.on_commit` callbacks registered so far
+    in the enclosing (rolled back) transaction.
+    """
+    while connection.run_on_commit:
+        callbacks = connection.run_on_commit
+        connection.run_on_commit = []
+        for _, callback in callbacks:
+            callback()
+
+
+def request(scenario: Scenario, client: Client, n: int):
+    response = scenario.request(client, n)
+    run_commit_hooks()
+    return response
+
+
+def finish(scenario: Scenario, response) -> None:
+    """ Check the response and bring data back for the next request.
+    """
+    if response.status_code >= 400:
+        raise BenchmarkError(
+            f"{scenario.name}: {response.status_code} "
+            f"{response.content[:200]!r}"
+        )
+    if scenario.reset is not None:
+        scenario.reset()
+        run_commit_hooks()
+
+
+def run(
+    scenario: Scenario, requests: int, warmup: int, allocations: int
+) -> Dict[str, float]:
+    """ Measure the scenario, returns its metrics.
+    """
+    client = Client()
+    if scenario.user is not None:
+        client.force_login(scenario.user)
+    numbers = iter(range(warmup + requests + allocations))
+
+    for n in islice(numbers, warmup):
+        finish(scenario, request(scenario, client, n))
+
+    latencies, queries = [], []
+    for n in islice(numbers, requests):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = request(scenario, client, n)
+            latencies.append(time.perf_counter() - start)
+        queries.append(len(context))
+        finish(scenario, response)
+
+    allocated = []
+    for n in numbers:
+        tracemalloc.start()
+        try:
+            response = request(scenario, client, n)
+            allocated.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        finish(scenario, response)
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "queries": statistics.mean(queries),
+        "alloc_kib": (
+            statistics.median(allocated) / 1024 if allocated else 0.0
+        ),
+    }
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float
+) -> List[Regression]:
+    """ Metrics of scenarios worse than in the baseline by more than
+    `threshold` (a fraction) and the noise. Numbers of queries
+    don't depend on timing, any increase of them is a regression.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        for metric, noise in COMPARED.items():
+            if metric not in base:
+                continue
+            allowed = base[metric]
+            if metric != "queries":
+                allowed = max(allowed * (1 + threshold), allowed + noise)
+            if metrics[metric] > allowed:
+                regressions.append(
+                    Regression(name, metric, base[metric], metrics[metric])
+                )
+    return regressions
@@ -0,0 +1,269 @@
+""" Scenarios of the benchmark suite: the hot pages and every endpoint
+of the API requested through the test client.
+
+A scenario is repeated many times, so a request that changes data
+either undoes its change every other time (e.g. votes toggle) or has
+`reset` called after it (not measured) to bring the data back.
+Requests are made for a sample of the existing posts (`Dataset`),
+see `manage.py generate_data` to fill the database.
+"""
+import random
+
+from hashlib import md5
+from os import urandom
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import reverse
+
+from questions.models import (
+    VOTE_DOWN,
+    VOTE_UP,
+    Answer,
+    Question,
+    Tag,
+)
+
+
+class Scenario(NamedTuple):
+    name: str
+    # Makes the `n`-th request of the scenario
+    request: Callable[[Client, int], Any]
+    # The user the requests are made by, anonymous if `None`
+    user: Any = None
+    reset: Optional[Callable[[], None]] = None
+
+
+class Dataset(NamedTuple):
+    # The user voting / posting in the scenarios, a new one
+    user: Any
+    # Sample of questions with answers and their top answers
+    questions: List[Question]
+    answers: List[Answer]
+    tag: str
+    query: str
+
+
+class DatasetError(Exception):
+    pass
+
+
+def load_dataset(size: int = 20, seed: int = 0) -> Dataset:
+    """ Pick `size` random questions with answers. Scenarios changing
+    data use a question of their own, so at least 3 are needed.
+    """
+    rnd = random.Random(seed)
+    questions = Question.objects.filter(number_of_answers__gt=0)
+    bounds = questions.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        raise DatasetError("There are no questions with answers.")
+
+    sample: Dict[int, Question] = {}
+    for _ in range(size):
+        pk = rnd.randint(bounds["low"], bounds["high"])
+        question = (
+            questions.select_related("author")
+            .filter(pk__gte=pk)
+            .order_by("pk")
+            .first()
+        )
+        sample[question.pk] = question
+    if len(sample) < 3:
+        raise DatasetError("At least 3 questions with answers are needed.")
+
+    questions = list(sample.values())
+    answers = [
+        Answer.objects.filter(question=question)
+        .order_by("-rating", "-posted")
+        .first()
+        for question in questions
+    ]
+    tag = Tag.objects.order_by("-number_of_questions", "name").first()
+
+    name = f"benchmark-{md5(urandom(10)).hexdigest()[:8]}"
+    user = get_user_model().objects.create(
+        username=name, email=f"{name}@mail.fake"
+    )
+    return Dataset(
+        user=user,
+        questions=questions,
+        answers=answers,
+        tag=tag.name if tag is not None else "python",
+        query=questions[0].title.split()[0],
+    )
+
+
+def alternate(n: int) -> int:
+    """ Vote of the `n`-th request: a vote and then the opposite one,
+    which deletes it.
+    """
+    return VOTE_UP if n % 2 == 0 else VOTE_DOWN
+
+
+class VoteHolder:
+    """ Vote of the dataset user requested by the vote detail
+    endpoints, recreated after it's deleted.
+    """
+
+    def __init__(self, post, user):
+        self.post = post
+        self.user = user
+        self.restore()
+
+    def restore(self) -> None:
+        self.post.add_vote(self.user, VOTE_UP)
+        votes = type(self.post).vote_class.objects
+        self.pk = votes.get(to=self.post, user=self.user).pk
+
+
+def pages(data: Dataset) -> List[Scenario]:
+    questions = data.questions
+
+    def get(name, **kwargs):
+        return lambda client, n: client.get(reverse(name), kwargs)
+
+    def question_detail(client, n):
+        question = questions[n % len(questions)]
+        return client.get(
+            reverse("question_detail", kwargs={"question_id": question.pk})
+        )
+
+    def tag(client, n):
+        return client.get(reverse("tag", kwargs={"tag": data.tag}))
+
+    def vote(name, post):
+        return lambda client, n: client.post(
+            reverse(name), {"target_id": post.pk, "value": alternate(n)}
+        )
+
+    return [
+        Scenario("index", get("index")),
+        Scenario("popular", get("popular")),
+        Scenario("question_detail", question_detail),
+        Scenario("search", get("search", q=data.query)),
+        Scenario("tag", tag),
+        Scenario(
+            "vote_question",
+            vote("vote_question", questions[0]),
+            user=data.user,
+        ),
+        Scenario(
+            "vote_answer", vote("vote_answer", data.answers[0]), user=data.user
+        ),
+    ]
+
+
+def api(data: Dataset) -> List[Scenario]:
+    user = data.user
+    questions, answers = data.questions, data.answers
+
+    def url(name, **kwargs):
+        return reverse(f"api_{name}", kwargs=kwargs)
+
+    def get(name, **params):
+        return lambda client, n: client.get(url(name), params)
+
+    def cycle(name, posts):
+        def request(client, n):
+            post = posts[n % len(posts)]
+            return client.get(url(name, pk=post.pk))
+
+        return request
+
+    def post_question(client, n):
+        data = {
+            "title": f"Benchmark question {n}",
+            "content": "Benchmark content",
+            "tags": ["benchmark"],
+        }
+        return client.post(url("questions"), data, "application/json")
+
+    def post_answer(client, n):
+        return client.post(
+            url("answers", pk=questions[0].pk),
+            {"content": f"Benchmark answer {n}"},
+            "application/json",
+        )
+
+    def mark(client, n):
+        return client.patch(
+            url("answer_details", pk=answers[0].pk),
+            {"is_accepted": n % 2 == 0},
+            "application/json",
+        )
+
+    scenarios = [
+        Scenario("api_questions", get("questions")),
+        Scenario("api_questions_post", post_question, user=user),
+        Scenario("api_question_details", cycle("question_details", questions)),
+        Scenario("api_answers", cycle("answers", questions)),
+        Scenario("api_answers_post", post_answer, user=user),
+        Scenario("api_answer_details", cycle("answer_details", answers)),
+        Scenario(
+            "api_answer_details_patch", mark, user=questions[0].author
+        ),
+        Scenario(
+            "api_ratings",
+            get(
+                "ratings",
+                questions=",".join(str(q.pk) for q in questions),
+                answers=",".join(str(a.pk) for a in answers),
+            ),
+        ),
+        Scenario("api_tags", get("tags")),
+        Scenario(
+            "api_tags_complete", get("tags_complete", prefix=data.tag[:2])
+        ),
+    ]
+    # Votes are created for the second post and requested by id
+    # for the third one
+    for kind, posts in (("question", questions), ("answer", answers)):
+        scenarios.extend(votes(kind, posts[1], posts[2], user))
+    return scenarios
+
+
+def votes(kind: str, post, voted, user) -> List[Scenario]:
+    """ Scenarios of the vote endpoints of questions / answers.
+    """
+    vote = VoteHolder(voted, user)
+    votes_url = reverse(f"api_{kind}_votes", kwargs={"pk": post.pk})
+
+    def details_url():
+        kwargs = {f"{kind}_pk": voted.pk, "pk": vote.pk}
+        return reverse(f"api_{kind}_vote_details", kwargs=kwargs)
+
+    def create(client, n):
+        return client.post(votes_url, {"value": VOTE_UP}, "application/json")
+
+    def retract():
+        post.retract_vote(user)
+
+    def change(client, n):
+        return client.patch(
+            details_url(), {"value": -alternate(n)}, "application/json"
+        )
+
+    return [
+        Scenario(
+            f"api_{kind}_votes",
+            lambda client, n: client.get(votes_url),
+        ),
+        Scenario(f"api_{kind}_votes_post", create, user=user, reset=retract),
+        Scenario(
+            f"api_{kind}_vote_details",
+            lambda client, n: client.get(details_url()),
+        ),
+        Scenario(f"api_{kind}_vote_details_patch", change, user=user),
+        Scenario(
+            f"api_{kind}_vote_details_delete",
+            lambda client, n: client.delete(details_url()),
+            user=user,
+            reset=vote.restore,
+        ),
+    ]
+
+
+def get_scenarios(data: Dataset) -> List[Scenario]:
+    return [*pages(data), *api(data)]
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase
+
+from benchmarks import runner
+from benchmarks.scenarios import Scenario
+from questions import trending
+from questions.models import Question
+
+
+class TestRunner(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 99), 99)
+        self.assertEqual(runner.percentile([7], 95), 7)
+
+    def test_compare(self):
+        baseline = {
+            "index": {"p50_ms": 10, "p95_ms": 20, "queries": 3},
+            "removed": {"p50_ms": 1},
+        }
+        results = {
+            "index": {
+                "p50_ms": 11.9,
+                "p95_ms": 25,
+                "queries": 4,
+                "alloc_kib": 100,
+            },
+            "new": {"p50_ms": 100},
+        }
+
+        self.assertEqual(
+            runner.compare(results, baseline, threshold=0.2),
+            [
+                runner.Regression("index", "p95_ms", 20, 25),
+                runner.Regression("index", "queries", 3, 4),
+            ],
+        )
+
+    def test_compare_noise(self):
+        baseline = {"api_tags": {"p50_ms": 1.0}}
+        results = {"api_tags": {"p50_ms": 1.9}}
+        self.assertEqual(runner.compare(results, baseline, 0.2), [])
+
+
+class TestRunBenchmarks(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def run_benchmarks(self, **options):
+        out = StringIO()
+        call_command(
+            "run_benchmarks",
+            generate=30,
+            requests=3,
+            warmup=1,
+            allocations=1,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_run(self):
+        self.run_benchmarks(output=self.path)
+
+        with open(self.path) as f:
+            report = json.load(f)
+        self.assertIn("api_answer_vote_details_delete", report["results"])
+        index = report["results"]["index"]
+        self.assertEqual(index["requests"], 3)
+        self.assertGreater(index["queries"], 0)
+        self.assertLessEqual(index["p50_ms"], index["p99_ms"])
+
+        # The generated dataset is rolled back
+        self.assertEqual(report["dataset"]["question"], 30)
+        self.assertFalse(Question.objects.exists())
+
+    def test_commit_hooks(self):
+        committed = []
+
+        def request(client, n):
+            transaction.on_commit(lambda: committed.append(n))
+            return HttpResponse()
+
+        runner.run(
+            Scenario("hooks", request), requests=3, warmup=1, allocations=1
+        )
+
+        self.assertEqual(committed, [0, 1, 2, 3, 4])
+        self.assertEqual(connection.run_on_commit, [])
+
+    def test_private_caches(self):
+        cache.set("benchmarks-test", 1)
+        self.run_benchmarks(scenarios=["index"])
+
+        # Neither cleared nor filled with the rolled back data
+        self.assertEqual(cache.get("benchmarks-test"), 1)
+        self.assertIsNone(cache.get(trending.STALE_KEY))
+        cache.delete("benchmarks-test")
+
+    def test_baseline(self):
+        self.run_benchmarks(output=self.path, scenarios=["api_ratings"])
+        with open(self.path) as f:
+            report = json.load(f)
+        report["results"]["api_ratings"]["queries"] = 0
+        with open(self.path, "w") as f:
+            json.dump(report, f)
+
+        with self.assertRaisesMessage(CommandError, "1 metrics"):
+            self.run_benchmarks(
+                baseline=self.path, scenarios=["api_ratings"], threshold=100
+            )
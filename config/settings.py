@@ -21,11 +21,13 @@ INSTALLED_APPS += ["rest_framework", "rest_framework.authtoken"]
 
 INSTALLED_APPS += [
     "api.apps.ApiConfig",
+    "benchmarks.apps.BenchmarksConfig",
     "questions.apps.QuestionsConfig",
     "users.apps.UsersConfig",
 ]
 
 MIDDLEWARE = [
+    "questions.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -133,10 +135,57 @@ REST_FRAMEWORK = {
 # App settings
 
 MAX_USER_PHOTO_SIZE_MB = 5
+# Avatar renditions (see `users.avatars`), side in pixels
+USER_AVATAR_SIZES = {"thumb": 80, "mid": 160, "big": 320}
+USER_AVATAR_BATCH_SIZE = 32
+USER_AVATAR_POLL_INTERVAL = 5
+# Content-addressed photos / avatars (see `users.storage`)
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_COLLECT_GRACE_HOURS = 24
 
 QUESTIONS_MAX_TITLE_LEN = 255
+# Length of excerpts of questions shown in lists
+QUESTIONS_EXCERPT_LEN = 300
 QUESTIONS_MAX_NUMBER_OF_TAGS = 3
 QUESTIONS_MAX_TAG_LEN = 128
+QUESTIONS_HOT_HALF_LIFE_HOURS = 24
+QUESTIONS_TRENDING_COUNT = 10
+QUESTIONS_TRENDING_CACHE_TTL = 60 * 5
+QUESTIONS_TAGS_PER_PAGE = 60
+QUESTIONS_TAGS_CACHE_TTL = 60
+# Tag completion (see `questions.completion`), intervals are in seconds
+QUESTIONS_TAGS_COMPLETE_LIMIT = 10
+QUESTIONS_TAGS_INDEX_REFRESH = 10
+QUESTIONS_TAGS_INDEX_REBUILD = 60 * 15
+# Full-page cache of anonymous responses (see `questions.pagecache`),
+# views are disabled by their URL names
+QUESTIONS_PAGE_CACHE_ENABLED = True
+QUESTIONS_PAGE_CACHE_TTL = 60 * 10
+QUESTIONS_PAGE_CACHE_DISABLED = []
+# Cached question cards / answers (see `questions.fragments`)
+QUESTIONS_FRAGMENT_CACHE_TTL = 60 * 60 * 24
+# Live updates of questions (see `questions.live`): dotted path
+# to a broker class, intervals are in seconds
+QUESTIONS_LIVE_BROKER = "questions.live.LocalBroker"
+QUESTIONS_LIVE_KEEPALIVE = 15
+QUESTIONS_LIVE_MAX_DURATION = 60 * 5
+# Dotted path to a class from `questions.search`,
+# `None` picks the best backend available for the database
+QUESTIONS_SEARCH_BACKEND = None
+
+# Outgoing emails (see `questions.outbox`), delays are in seconds
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_LEASE = 60 * 5
+EMAIL_OUTBOX_MAX_ATTEMPTS = 10
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+EMAIL_OUTBOX_POLL_INTERVAL = 5
+
+# Per-request metrics (see `questions.instrumentation`), requests slower
+# than the threshold (milliseconds) are logged with their queries,
+# `None` disables capturing of queries
+INSTRUMENTATION_SERVER_TIMING = True
+INSTRUMENTATION_SLOW_REQUEST_MS = 500
 
 
 try:
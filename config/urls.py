@@ -3,7 +3,7 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from users.views import LogIn, LogOut, Settings, SignUp
+from users.views import LogIn, LogOut, Settings, SignUp, serve_media
 
 
 urlpatterns = [
@@ -17,4 +17,8 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(
+        settings.MEDIA_URL,
+        view=serve_media,
+        document_root=settings.MEDIA_ROOT,
+    )
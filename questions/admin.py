@@ -1,10 +1,18 @@
 from django.contrib import admin
 
-from .models import Answer, AnswerVote, Question, QuestionVote, Tag
+from .models import (
+    Answer,
+    AnswerVote,
+    OutgoingEmail,
+    Question,
+    QuestionVote,
+    Tag,
+)
 
 
 admin.site.register(Answer)
 admin.site.register(AnswerVote)
+admin.site.register(OutgoingEmail)
 admin.site.register(Question)
 admin.site.register(QuestionVote)
 admin.site.register(Tag)
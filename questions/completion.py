@@ -0,0 +1,290 @@
+""" Completion of tag names from a per-process prefix index.
+
+Names are kept sorted, so the names with a prefix are a contiguous
+range found with `bisect`. Completions are the most used names of
+the range: short prefixes match huge ranges, so their top names are
+precomputed (and maintained on insertion), the other ranges are
+small enough to be scanned.
+
+Each process builds the index in a background thread on first use
+(completions are queried from the database until it's ready), polls
+the database for new tags every QUESTIONS_TAGS_INDEX_REFRESH seconds
+and rebuilds the index in background every QUESTIONS_TAGS_INDEX_REBUILD
+seconds to pick up changed usage counters.
+"""
+import heapq
+import logging
+import threading
+import time
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+# Greater than any character of a name
+MAX_CHAR = chr(0x10FFFF)
+
+
+class PrefixIndex:
+    """ Weighted names for prefix completion. Ranges of more than
+    `threshold` names keep their `size` heaviest names precomputed.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Tuple[str, int]],
+        size: int = 10,
+        threshold: int = 256,
+    ):
+        self.size = size
+        self.threshold = threshold
+        self.weights: Dict[str, int] = dict(items)
+        self.names: List[str] = sorted(self.weights)
+        self.top: Dict[str, List[str]] = self.build_top()
+
+    def __len__(self):
+        return len(self.names)
+
+    def sort_key(self, name: str):
+        # The heaviest first, then alphabetically
+        return (-self.weights[name], name)
+
+    def range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect_left(self.names, prefix)
+        return start, bisect_left(self.names, prefix + MAX_CHAR, start)
+
+    def large_prefixes(self) -> List[str]:
+        """ Prefixes matching more than `threshold` names. A prefix
+        of a large one is large too, so they are found top-down.
+        """
+        large = []
+        stack = [""]
+        while stack:
+            prefix = stack.pop()
+            start, end = self.range(prefix)
+            if end - start <= self.threshold:
+                continue
+
+            large.append(prefix)
+            depth = len(prefix) + 1
+            position = start
+            while position < end:
+                name = self.names[position]
+                if len(name) < depth:
+                    position += 1
+                    continue
+                child = name[:depth]
+                child_end = bisect_left(
+                    self.names, child + MAX_CHAR, position, end
+                )
+                if child_end - position > self.threshold:
+                    stack.append(child)
+                position = child_end
+        return large
+
+    def build_top(self) -> Dict[str, List[str]]:
+        top: Dict[str, List[str]] = {
+            prefix: [] for prefix in self.large_prefixes()
+        }
+        if not top:
+            return top
+
+        # Names are distributed from the heaviest one, so every list
+        # is filled with the heaviest names of its range.
+        for name in sorted(self.weights, key=self.sort_key):
+            for depth in range(len(name) + 1):
+                names = top.get(name[:depth])
+                if names is None:
+                    break
+                if len(names) < self.size:
+                    names.append(name)
+        return top
+
+    def add(self, name: str, weight: int) -> None:
+        """ Add a new name or change weight of an existing one.
+        """
+        if name in self.weights:
+            if self.weights[name] == weight:
+                return
+            self.weights[name] = weight
+            for depth in range(len(name) + 1):
+                # The name might drop out of the list, recomputed lazily
+                self.top.pop(name[:depth], None)
+            return
+
+        self.weights[name] = weight
+        insort(self.names, name)
+        for depth in range(len(name) + 1):
+            names = self.top.get(name[:depth])
+            if names is None:
+                continue
+            names.append(name)
+            names.sort(key=self.sort_key)
+            del names[self.size:]
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """ Return up to `limit` heaviest names starting with `prefix`.
+        """
+        limit = min(limit, self.size)
+        names = self.top.get(prefix)
+        if names is not None:
+            return names[:limit]
+
+        start, end = self.range(prefix)
+        if end - start <= self.threshold:
+            return heapq.nsmallest(
+                limit, self.names[start:end], key=self.sort_key
+            )
+
+        # The range has grown or its list has been dropped
+        names = heapq.nsmallest(
+            self.size, self.names[start:end], key=self.sort_key
+        )
+        self.top[prefix] = names
+        return names[:limit]
+
+
+class TagCompleter:
+    """ Per-process `PrefixIndex` of tag names weighted by
+    the number of their questions.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float,
+        rebuild_interval: float,
+        size: int,
+        threshold: int = 256,
+    ):
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.size = size
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        self.index: Optional[PrefixIndex] = None
+        self.last_pk = 0
+        self.built = self.refreshed = 0.0
+        self.rebuilding = False
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """ Return names and numbers of questions of up to `limit`
+        the most used tags starting with `prefix`.
+        """
+        from .models import Tag
+
+        prefix = Tag.normalize(prefix)
+        index = self.get_index()
+        if index is None:
+            return self.query(prefix, limit)
+
+        with self.lock:
+            names = index.complete(prefix, limit)
+            return [(name, index.weights[name]) for name in names]
+
+    def get_index(self) -> Optional[PrefixIndex]:
+        """ Return the index, `None` while it's being built.
+        """
+        if self.index is None:
+            self.start_rebuild()
+            return self.index
+
+        now = time.monotonic()
+        if now - self.built > self.rebuild_interval:
+            self.start_rebuild()
+        elif now - self.refreshed > self.refresh_interval:
+            self.refresh()
+        return self.index
+
+    def query(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """ Completions straight from the database (by the index
+        of the most used tags).
+        """
+        from .models import Tag
+
+        rows = Tag.objects.filter(name__startswith=prefix).order_by(
+            "-number_of_questions", "name"
+        )
+        limit = min(limit, self.size)
+        return list(rows.values_list("name", "number_of_questions")[:limit])
+
+    def load(self) -> Tuple[PrefixIndex, int]:
+        from .models import Tag
+
+        start = time.perf_counter()
+        last_pk = 0
+        items = []
+        rows = Tag.objects.values_list("pk", "name", "number_of_questions")
+        for pk, name, number_of_questions in rows.iterator():
+            items.append((name, number_of_questions))
+            last_pk = max(last_pk, pk)
+
+        index = PrefixIndex(items, self.size, self.threshold)
+        logger.debug(
+            f"Tag index of {len(index)} names has been built "
+            f"in {time.perf_counter() - start:.2f} s"
+        )
+        return index, last_pk
+
+    def refresh(self) -> None:
+        """ Add tags created since the last refresh.
+        """
+        from .models import Tag
+
+        self.refreshed = time.monotonic()
+        rows = Tag.objects.filter(pk__gt=self.last_pk).order_by("pk")
+        rows = list(rows.values_list("pk", "name", "number_of_questions"))
+
+        # Lookups don't wait for the query, only for the insertions
+        with self.lock:
+            for pk, name, number_of_questions in rows:
+                if pk > self.last_pk:
+                    self.index.add(name, number_of_questions)
+                    self.last_pk = pk
+
+    def start_rebuild(self) -> None:
+        """ Build a new index in background, the current one is used
+        meanwhile.
+        """
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        self.start_thread(self.rebuild)
+
+    def start_thread(self, target) -> None:
+        def run():
+            try:
+                target()
+            finally:
+                # Connections are per thread and this one is done
+                connections.close_all()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def rebuild(self) -> None:
+        try:
+            index, last_pk = self.load()
+            with self.lock:
+                self.index, self.last_pk = index, last_pk
+                self.built = self.refreshed = time.monotonic()
+        except Exception:
+            logger.exception("Tag index can't be rebuilt")
+            self.built = time.monotonic()
+        finally:
+            self.rebuilding = False
+
+
+tag_completer = TagCompleter(
+    refresh_interval=settings.QUESTIONS_TAGS_INDEX_REFRESH,
+    rebuild_interval=settings.QUESTIONS_TAGS_INDEX_REBUILD,
+    size=settings.QUESTIONS_TAGS_COMPLETE_LIMIT,
+)
@@ -4,7 +4,7 @@ from django import forms
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
-from .models import Answer, Question, VOTE_CHOICES
+from .models import Answer, Question, Tag, VOTE_CHOICES
 
 
 class AnswerForm(forms.ModelForm):
@@ -24,7 +24,7 @@ class AskForm(forms.ModelForm):
         raw_tags = self.cleaned_data["tags"]
         raw_tags, _ = re.subn(r"\s+", " ", raw_tags)
 
-        tags = (tag.strip().lower() for tag in raw_tags.split(","))
+        tags = (Tag.normalize(tag) for tag in raw_tags.split(","))
         tags = set(filter(bool, tags))
 
         if len(tags) > settings.QUESTIONS_MAX_NUMBER_OF_TAGS:
@@ -51,7 +51,9 @@ class VoteForm(forms.Form):
         target_id = self.cleaned_data["target_id"]
 
         try:
-            target = self.model.objects.get(pk=target_id)
+            target = self.model.objects.only(*self.model.vote_fields).get(
+                pk=target_id
+            )
         except ObjectDoesNotExist:
             raise forms.ValidationError("Target object doesn't exist.")
 
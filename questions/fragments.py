@@ -0,0 +1,109 @@
+""" Cache of rendered fragments of pages: question cards of the lists
+and answers of a question.
+
+A fragment is keyed by `version` of its post, that is bumped by every
+change of the post, and by a digest of the related data it shows
+(tags, author). Keys are known from the rows of a page, so fragments
+of the whole page are fetched with one `get_many` and the missing
+ones are stored with one `set_many` after rendering. Fragments of old
+versions are never deleted, they just expire.
+"""
+import hashlib
+import logging
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+logger = logging.getLogger(__name__)
+
+
+FRAGMENT_KEY = "questions:fragment:{kind}:{pk}:{version}:{digest}"
+
+
+def author_depends(user) -> List:
+    return [user.username, user.avatar, user.avatar_pending, bool(user.photo)]
+
+
+def question_depends(question) -> List:
+    return [
+        *author_depends(question.author),
+        *(tag.name for tag in question.tags.all()),
+    ]
+
+
+def answer_depends(answer) -> List:
+    return author_depends(answer.author)
+
+
+# Related data shown in a fragment of each kind
+KINDS: Dict[str, Callable] = {
+    "question": question_depends,
+    "answer": answer_depends,
+}
+
+
+class FragmentBatch:
+    """ Fragments of the posts of a page.
+    """
+
+    def __init__(
+        self, fragment_cache, keys: Dict[int, str], found: Dict[str, str]
+    ):
+        self.fragment_cache = fragment_cache
+        self.keys = keys
+        self.found = found
+        self.missing: Dict[str, str] = {}
+
+    def get(self, post) -> Optional[str]:
+        return self.found.get(self.keys.get(post.pk))
+
+    def add(self, post, html: str) -> None:
+        key = self.keys.get(post.pk)
+        if key is not None:
+            self.missing[key] = html
+
+    def save(self) -> None:
+        if self.missing:
+            self.fragment_cache.store(self.missing)
+            self.found.update(self.missing)
+            self.missing = {}
+
+
+class FragmentCache:
+    """ Rendered fragments kept in a shared cache.
+    """
+
+    def __init__(self, ttl: int, cache_alias: str = "default"):
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def key(self, kind: str, post, *variant) -> str:
+        depends = [*KINDS[kind](post), *variant]
+        digest = hashlib.md5(repr(depends).encode()).hexdigest()
+        return FRAGMENT_KEY.format(
+            kind=kind, pk=post.pk, version=post.version, digest=digest
+        )
+
+    def batch(self, kind: str, posts: Iterable, *variant) -> FragmentBatch:
+        """ Fetch cached fragments of `posts`. `variant` is a part
+        of the keys for fragments that differ e.g. for some users.
+        """
+        keys = {post.pk: self.key(kind, post, *variant) for post in posts}
+        found = self.cache.get_many(keys.values()) if keys else {}
+        logger.debug(
+            f"{len(found)} of {len(keys)} fragments ({kind}) are cached"
+        )
+        return FragmentBatch(self, keys, found)
+
+    def store(self, fragments: Dict[str, str]) -> None:
+        self.cache.set_many(fragments, self.ttl)
+
+
+fragment_cache = FragmentCache(ttl=settings.QUESTIONS_FRAGMENT_CACHE_TTL)
@@ -0,0 +1,141 @@
+""" Time-decayed "hot" score of questions.
+
+Every event (the question itself, a vote, an answer) contributes its
+weight halved every `QUESTIONS_HOT_HALF_LIFE_HOURS` since the event.
+Decaying all scores at once doesn't change their order, so instead of
+decaying old contributions the new ones are grown ("forward decay"):
+
+    hotness = sum(weight * 2 ** ((event_time - epoch) / half_life))
+
+Thus adding an event is a single relative `UPDATE` and the stored
+value can be indexed. Since contributions grow with time, the epoch
+has to be moved forward and all scores scaled down from time to time
+with `manage.py renormalize_hotness`.
+"""
+import logging
+import time
+
+from collections import defaultdict
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, Subquery, Value
+from django.db.models.functions import Power
+
+
+logger = logging.getLogger(__name__)
+
+
+QUESTION_WEIGHT = 1.0
+VOTE_WEIGHT = 1.0
+ANSWER_WEIGHT = 2.0
+
+
+def half_life() -> float:
+    return settings.QUESTIONS_HOT_HALF_LIFE_HOURS * 3600.0
+
+
+def contribution(weight: float, timestamp: float, epoch: float) -> float:
+    return weight * 2 ** ((timestamp - epoch) / half_life())
+
+
+def decayed(weight: float, timestamp: Optional[float] = None):
+    """ Expression of the contribution of an event that happened
+    at `timestamp` (now by default). The current epoch is read
+    in the same statement.
+    """
+    from .models import HotnessEpoch
+
+    if timestamp is None:
+        timestamp = time.time()
+    epoch = Subquery(
+        HotnessEpoch.objects.values("timestamp")[:1],
+        output_field=FloatField(),
+    )
+    exponent = (Value(timestamp) - epoch) / Value(half_life())
+    return Value(weight) * Power(
+        Value(2.0), exponent, output_field=FloatField()
+    )
+
+
+def increment(weight: float, timestamp: Optional[float] = None):
+    """ Expression of `hotness` increased by an event. An event
+    is removed with the negative weight and the time it was added at.
+    """
+    return F("hotness") + decayed(weight, timestamp)
+
+
+def add(
+    question_id: int, weight: float, timestamp: Optional[float] = None
+) -> None:
+    """ Add contribution of an event to the question's score.
+    """
+    from .models import Question
+
+    Question.objects.filter(pk=question_id).update(
+        hotness=increment(weight, timestamp)
+    )
+
+
+def renormalize() -> float:
+    """ Move the epoch to the current time and scale all scores
+    accordingly. Returns the scale factor.
+    """
+    from .models import HotnessEpoch, Question
+
+    with transaction.atomic():
+        epoch = HotnessEpoch.objects.select_for_update().get()
+        now = time.time()
+        factor = 2 ** ((epoch.timestamp - now) / half_life())
+
+        Question.objects.update(hotness=F("hotness") * factor)
+        epoch.timestamp = now
+        epoch.save(update_fields=["timestamp"])
+
+    logger.debug(f"Hotness has been renormalized with factor {factor}")
+    return factor
+
+
+def rebuild(chunk_size: int = 1000) -> int:
+    """ Recompute scores of all questions from the question, vote
+    and answer timestamps. Returns the number of updated questions.
+    """
+    from .models import Answer, HotnessEpoch, Question, QuestionVote
+
+    epoch = HotnessEpoch.objects.get().timestamp
+    queryset = Question.objects.order_by("pk").only("pk", "posted")
+    updated = 0
+    last_pk = 0
+
+    while True:
+        questions = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not questions:
+            break
+
+        ids = [question.pk for question in questions]
+        scores: Dict[int, float] = defaultdict(float)
+
+        votes = QuestionVote.objects.filter(to__in=ids)
+        for question_id, timestamp in votes.values_list("to", "timestamp"):
+            scores[question_id] += contribution(
+                VOTE_WEIGHT, timestamp.timestamp(), epoch
+            )
+
+        answers = Answer.objects.filter(question__in=ids)
+        for question_id, posted in answers.values_list("question", "posted"):
+            scores[question_id] += contribution(
+                ANSWER_WEIGHT, posted.timestamp(), epoch
+            )
+
+        for question in questions:
+            question.hotness = scores[question.pk] + contribution(
+                QUESTION_WEIGHT, question.posted.timestamp(), epoch
+            )
+
+        Question.objects.bulk_update(questions, ["hotness"])
+        updated += len(questions)
+        last_pk = ids[-1]
+
+    logger.debug(f"Hotness has been rebuilt for {updated} questions")
+    return updated
@@ -0,0 +1,302 @@
+""" Per-request instrumentation.
+
+`InstrumentationMiddleware` records the number and the time of SQL
+queries, cache hits / misses and the time of the view of every request
+and reports them in the `Server-Timing` header (shown by browser dev
+tools) and in a log line of `key=value` pairs:
+
+    method=GET path=/ view=index status=200 total_ms=41.2 view_ms=38.9
+    db_ms=3.1 queries=4 cache_ms=0.2 cache_hits=2 cache_misses=1
+
+A request slower than `INSTRUMENTATION_SLOW_REQUEST_MS` is logged
+as a warning with its queries, the most expensive first. Queries
+executed once the request is already slower than that are attributed
+to the project code (e.g. a view or a serializer) that executed them,
+walking the stack is too expensive for every query of every request.
+Repeated queries are grouped, so N+1 queries stand out.
+
+Queries are recorded by a wrapper of database connections, cache hits
+of the cache instances of the thread are counted by wrapping their
+`get` / `get_many` once.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+# Queries of a request kept for the slow request log
+MAX_CAPTURED = 1000
+# Groups of queries shown in the slow request log
+LOGGED_QUERIES = 20
+# Frames of the project code a query is attributed to
+STACK_DEPTH = 3
+
+MISSING = object()
+
+_local = threading.local()
+
+
+class Query(NamedTuple):
+    sql: str
+    duration: float
+    caller: Optional[str]
+
+
+@lru_cache(maxsize=None)
+def project_path(filename: str) -> Optional[str]:
+    """ Path of a file of the project relative to its root, `None`
+    for files of libraries (and of this module).
+    """
+    # Code compiled from strings (e.g. templates of `namedtuple`)
+    if filename.startswith("<"):
+        return None
+
+    path = os.path.abspath(filename)
+    if (
+        not path.startswith(settings.BASE_DIR + os.sep)
+        or "site-packages" in path
+        or path == os.path.abspath(__file__)
+    ):
+        return None
+    return os.path.relpath(path, settings.BASE_DIR)
+
+
+def caller() -> str:
+    """ The innermost frames of the project code on the stack,
+    e.g. `api/serializers.py:40 in get_tags < api/views.py:70 in list`.
+    """
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < STACK_DEPTH:
+        path = project_path(frame.f_code.co_filename)
+        if path is not None:
+            frames.append(
+                f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return " < ".join(frames) or "-"
+
+
+class Recorder:
+    """ Metrics of one request.
+    """
+
+    def __init__(self, threshold: Optional[float]):
+        """ Queries are captured for the slow request log if the
+        `threshold` (ms) is set.
+        """
+        self.capture = threshold is not None
+        self.started = time.perf_counter()
+        # Queries are attributed to their callers after that
+        self.attribute_after = (
+            self.started + threshold / 1000 if self.capture else None
+        )
+        self.view_started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.captured: List[Query] = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.in_cache = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """ Execute wrapper of database connections.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            if self.capture and len(self.captured) < MAX_CAPTURED:
+                attributed = start + duration >= self.attribute_after
+                self.captured.append(
+                    Query(sql, duration, caller() if attributed else None)
+                )
+
+    @contextmanager
+    def cache_call(self):
+        # Backends may implement a call with other calls
+        # (e.g. `get_many` with `get`), only the outer one counts
+        self.in_cache = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.cache_time += time.perf_counter() - start
+            self.in_cache = False
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    @property
+    def total_time(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def view_time(self) -> float:
+        if self.view_started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.view_started
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} '
+                f'queries"',
+                f'cache;dur={self.cache_time * 1000:.1f};desc="'
+                f'{self.cache_hits} hits, {self.cache_misses} misses"',
+                f"view;dur={self.view_time * 1000:.1f}",
+                f"total;dur={self.total_time * 1000:.1f}",
+            ]
+        )
+
+    def slow_queries(self) -> List[str]:
+        """ Captured queries grouped by SQL and caller, the most
+        expensive groups first.
+        """
+        groups: Dict[tuple, List[float]] = defaultdict(list)
+        for query in self.captured:
+            groups[query.sql, query.caller].append(query.duration)
+
+        ordered = sorted(groups.items(), key=lambda item: -sum(item[1]))
+        return [
+            f"{sum(durations) * 1000:.1f} ms x{len(durations)} "
+            f"{caller or '(not attributed)'}\n"
+            f"    {sql}"
+            for (sql, caller), durations in ordered[:LOGGED_QUERIES]
+        ]
+
+
+def current() -> Optional[Recorder]:
+    return getattr(_local, "recorder", None)
+
+
+def instrument_cache(cache) -> None:
+    """ Count hits / misses of the cache instance (caches are
+    per thread) for the request being recorded.
+    """
+    if getattr(cache, "instrumented", False):
+        return None
+
+    get, get_many = cache.get, cache.get_many
+
+    def counted_get(key, default=None, version=None):
+        recorder = current()
+        if recorder is None or recorder.in_cache:
+            return get(key, default, version)
+
+        with recorder.cache_call():
+            value = get(key, MISSING, version)
+        if value is MISSING:
+            recorder.cache_misses += 1
+            return default
+        recorder.cache_hits += 1
+        return value
+
+    def counted_get_many(keys, version=None):
+        recorder = current()
+        if recorder is None or recorder.in_cache:
+            return get_many(keys, version)
+
+        keys = list(keys)
+        with recorder.cache_call():
+            values = get_many(keys, version)
+        recorder.cache_hits += len(values)
+        recorder.cache_misses += len(keys) - len(values)
+        return values
+
+    cache.get, cache.get_many = counted_get, counted_get_many
+    cache.instrumented = True
+
+
+class InstrumentationMiddleware:
+    """ Record metrics of requests. It should be the first middleware,
+    so queries of the others (e.g. of the session) are counted too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        for alias in settings.CACHES:
+            instrument_cache(caches[alias])
+
+        threshold = settings.INSTRUMENTATION_SLOW_REQUEST_MS
+        recorder = Recorder(threshold)
+        _local.recorder = recorder
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            _local.recorder = None
+            recorder.finish()
+
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            timing = recorder.server_timing()
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+
+        self.log(request, response, recorder, threshold)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = current()
+        if recorder is not None:
+            recorder.view_started = time.perf_counter()
+
+    def log(self, request, response, recorder, threshold) -> None:
+        match = request.resolver_match
+        metrics = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match is not None else "-",
+            "status": response.status_code,
+            "total_ms": round(recorder.total_time * 1000, 1),
+            "view_ms": round(recorder.view_time * 1000, 1),
+            "db_ms": round(recorder.db_time * 1000, 1),
+            "queries": recorder.queries,
+            "cache_ms": round(recorder.cache_time * 1000, 1),
+            "cache_hits": recorder.cache_hits,
+            "cache_misses": recorder.cache_misses,
+        }
+        logger.info(
+            " ".join(f"{key}={value}" for key, value in metrics.items()),
+            extra={"metrics": metrics},
+        )
+
+        if threshold is None or metrics["total_ms"] < threshold:
+            return None
+
+        queries = "\n".join(recorder.slow_queries())
+        if recorder.queries > len(recorder.captured):
+            queries += (
+                f"\n({recorder.queries - len(recorder.captured)} more "
+                f"queries haven't been captured)"
+            )
+        logger.warning(
+            f"Slow request {request.method} {request.path} "
+            f"({metrics['total_ms']} ms, {recorder.queries} queries):\n"
+            f"{queries}",
+            extra={"metrics": metrics},
+        )
@@ -0,0 +1,234 @@
+""" Live updates of questions pushed to readers as server-sent events.
+
+Signals publish changed counters of a question and of its answers
+to the channel of the question after commit, `QuestionEvents` view
+streams the channel to readers of the question page, so they see
+votes of others and new answers without reloading the page.
+
+The broker delivering messages is pluggable (`QUESTIONS_LIVE_BROKER`).
+`LocalBroker` delivers them within the process, so readers and writers
+have to be served by the same process (e.g. threads of one server),
+a broker on top of a shared pub/sub (e.g. Redis) is needed for several
+processes. `FakeBroker` records published messages for tests.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+CHANNEL = "questions:live:{question_id}"
+# Comment line keeping idle connections open through proxies
+KEEPALIVE = ": keepalive\n\n"
+
+# Events
+RATING = "rating"
+ANSWERS = "answers"
+
+
+def channel(question_id: int) -> str:
+    return CHANNEL.format(question_id=question_id)
+
+
+class Message(NamedTuple):
+    event: str
+    data: Dict
+
+    def encode(self) -> str:
+        return f"event: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class Subscription:
+    """ Messages of a channel for one reader. A slow reader keeps
+    only the latest `maxsize` messages, the older ones are dropped.
+    """
+
+    def __init__(self, broker, channel: str, maxsize: int = 100):
+        self.broker = broker
+        self.channel = channel
+        self.queue: queue.Queue = queue.Queue(maxsize)
+
+    def put(self, message: Message) -> None:
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return None
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Optional[Message]:
+        """ Wait for the next message up to `timeout` seconds.
+        """
+        try:
+            return self.queue.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """ Delivers messages published to a channel to its subscribers.
+    """
+
+    def publish(self, channel: str, message: Message) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        pass
+
+
+class LocalBroker(BaseBroker):
+    """ In-process broker, delivers messages to the subscriptions
+    of the process only.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def publish(self, channel: str, message: Message) -> None:
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+        logger.debug(
+            f"'{message.event}' has been published to {channel} "
+            f"({len(subscriptions)} subscribers)"
+        )
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            subscriptions = self.channels.get(subscription.channel)
+            if subscriptions is None:
+                return None
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.channels[subscription.channel]
+
+    def subscribers(self, channel: str) -> int:
+        with self.lock:
+            return len(self.channels.get(channel, ()))
+
+
+class FakeBroker(LocalBroker):
+    """ Local broker recording published messages, for tests.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.published: Dict[str, List[Message]] = defaultdict(list)
+
+    def publish(self, channel: str, message: Message) -> None:
+        self.published[channel].append(message)
+        super().publish(channel, message)
+
+    def messages(self, channel: str) -> List[Message]:
+        return self.published.get(channel, [])
+
+    def reset(self) -> None:
+        with self.lock:
+            self.channels.clear()
+        self.published.clear()
+
+
+_brokers: Dict[str, BaseBroker] = {}
+
+
+def get_broker() -> BaseBroker:
+    """ Return broker configured by `QUESTIONS_LIVE_BROKER`.
+    """
+    path = settings.QUESTIONS_LIVE_BROKER
+    if path not in _brokers:
+        _brokers.setdefault(path, import_string(path)())
+    return _brokers[path]
+
+
+def send(question_id: int, event: str, data: Dict) -> None:
+    """ Publish a message to the channel of the question.
+    """
+    get_broker().publish(channel(question_id), Message(event, data))
+
+
+def publish(question_id: int, event: str, data: Dict) -> None:
+    """ Publish a message after commit of the current transaction,
+    so readers never see rolled back changes.
+    """
+    transaction.on_commit(lambda: send(question_id, event, data))
+
+
+class EventStream:
+    """ Body of a streaming response: encoded `messages` and then
+    messages of the subscription for `duration` seconds (`EventSource`
+    of browsers reconnects by itself after that). The subscription
+    is closed with the response, even if it hasn't been read.
+    """
+
+    def __init__(
+        self,
+        subscription: Subscription,
+        messages: Iterable[Message] = (),
+        keepalive: Optional[float] = None,
+        duration: Optional[float] = None,
+    ):
+        self.subscription = subscription
+        self.messages = messages
+        self.keepalive = (
+            settings.QUESTIONS_LIVE_KEEPALIVE
+            if keepalive is None
+            else keepalive
+        )
+        self.duration = (
+            settings.QUESTIONS_LIVE_MAX_DURATION
+            if duration is None
+            else duration
+        )
+        self.events = self.encode()
+
+    def __iter__(self) -> Iterator[str]:
+        return self.events
+
+    def encode(self) -> Iterator[str]:
+        deadline = time.monotonic() + self.duration
+        try:
+            for message in self.messages:
+                yield message.encode()
+
+            while True:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                message = self.subscription.get(
+                    timeout=min(self.keepalive, left)
+                )
+                yield KEEPALIVE if message is None else message.encode()
+        finally:
+            self.subscription.close()
+
+    def close(self) -> None:
+        self.events.close()
+        self.subscription.close()
@@ -0,0 +1,109 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from questions.models import Question
+from questions.search import SimpleSearchBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare search backends on a synthetic corpus of questions. "
+        "The corpus is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=100000)
+        parser.add_argument("--vocabulary", type=int, default=20000)
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        words = self.make_vocabulary(rng, options["vocabulary"])
+
+        with transaction.atomic():
+            self.create_corpus(rng, words, options["questions"])
+
+            backend = get_search_backend()
+            start = time.perf_counter()
+            backend.rebuild()
+            self.stdout.write(
+                f"{type(backend).__name__} index has been built in "
+                f"{time.perf_counter() - start:.1f} s"
+            )
+
+            # Frequent, average and rare terms
+            samples = [
+                " ".join(rng.sample(words[:50], 2)),
+                rng.choice(words[:500]),
+                rng.choice(words[-1000:]),
+            ]
+            methods = {
+                "icontains": self.search_icontains,
+                "simple": SimpleSearchBackend(connection).search,
+                type(backend).__name__: backend.search,
+            }
+
+            self.stdout.write(f"{'method':<22} {'query':<30} ms / query")
+            for query in samples:
+                for name, search in methods.items():
+                    elapsed = self.measure(search, query, options["queries"])
+                    self.stdout.write(f"{name:<22} {query:<30} {elapsed:.2f}")
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def make_vocabulary(rng, size):
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        words = set()
+        while len(words) < size:
+            length = rng.randint(3, 10)
+            words.add("".join(rng.choice(letters) for _ in range(length)))
+        words = sorted(words)
+        rng.shuffle(words)
+        return words
+
+    @staticmethod
+    def create_corpus(rng, words, count):
+        author, _ = get_user_model().objects.get_or_create(
+            username="benchmark_search"
+        )
+        # Zipf-like distribution of words
+        weights = [1 / rank for rank in range(1, len(words) + 1)]
+
+        def text(length):
+            return " ".join(rng.choices(words, weights, k=length))
+
+        questions = (
+            Question(author=author, title=text(8), content=text(60))
+            for _ in range(count)
+        )
+        batch = []
+        for question in questions:
+            batch.append(question)
+            if len(batch) == 1000:
+                Question.objects.bulk_create(batch)
+                batch = []
+        Question.objects.bulk_create(batch)
+
+    @staticmethod
+    def search_icontains(queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(content__icontains=query)
+        ).order_by("-rating", "-posted")
+
+    @staticmethod
+    def measure(search, query, repeat):
+        queryset = Question.objects.all()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results = search(queryset, query)
+            if "relevance" in results.query.annotations:
+                results = results.order_by("-relevance", "-pk")
+            list(results[:20])
+        return (time.perf_counter() - start) / repeat * 1000
@@ -0,0 +1,64 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from questions.completion import PrefixIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure tag completion with the in-memory prefix index "
+        "on synthetic tags (no database is used)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tags", type=int, default=1000000)
+        parser.add_argument("--lookups", type=int, default=100000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        items = self.make_tags(rng, options["tags"])
+        names = [name for name, _ in items]
+
+        start = time.perf_counter()
+        index = PrefixIndex(items, size=options["limit"])
+        self.stdout.write(
+            f"Index of {len(index)} tags ({len(index.top)} precomputed "
+            f"prefixes) has been built in "
+            f"{time.perf_counter() - start:.1f} s"
+        )
+
+        # What is typed: 1-6 first characters of existing names
+        prefixes = [
+            name[: rng.randint(1, 6)]
+            for name in rng.choices(names, k=options["lookups"])
+        ]
+        timings = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.complete(prefix, options["limit"])
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        self.stdout.write("lookup      us")
+        last = len(timings) - 1
+        for name, position in [("p50", 0.5), ("p99", 0.99), ("max", 1)]:
+            value = timings[min(int(len(timings) * position), last)]
+            self.stdout.write(f"{name:<10} {value * 1e6:>4.0f}")
+
+    @staticmethod
+    def make_tags(rng, count):
+        letters = "abcdefghijklmnopqrstuvwxyz0123456789-"
+        names = set()
+        while len(names) < count:
+            length = rng.randint(2, 16)
+            names.add("".join(rng.choice(letters[:26]) for _ in range(2)) + (
+                "".join(rng.choice(letters) for _ in range(length - 2))
+            ))
+        # Usage of tags is Zipf-like
+        names = sorted(names)
+        rng.shuffle(names)
+        return [(name, count // rank) for rank, name in enumerate(names, 1)]
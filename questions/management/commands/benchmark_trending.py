@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from questions.models import Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare queries / time per request of pages that show trending "
+        "questions with a cold and a warm trending cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+
+    @override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    def handle(self, *args, **options):
+        urls = [reverse("index"), reverse("popular"), reverse("login")]
+        question = Question.objects.order_by("-pk").first()
+        if question is not None:
+            urls.append(reverse("question_detail", args=(question.pk,)))
+
+        client = Client()
+        self.stdout.write(f"{'url':<30} {'queries':<18} ms / request")
+        for url in urls:
+            cold = self.measure(client, url, options["requests"], clear=True)
+            warm = self.measure(client, url, options["requests"], clear=False)
+            self.stdout.write(
+                f"{url:<30} {cold[0]:>4.1f} -> {warm[0]:<10.1f} "
+                f"{cold[1]:.2f} -> {warm[1]:.2f}"
+            )
+
+    def measure(self, client, url, requests, clear):
+        client.get(url)
+        queries = 0
+        start = time.perf_counter()
+
+        for _ in range(requests):
+            if clear:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            queries += len(context)
+
+        elapsed = time.perf_counter() - start
+        return queries / requests, elapsed / requests * 1000
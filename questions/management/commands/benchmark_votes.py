@@ -0,0 +1,122 @@
+import random
+import statistics
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+from os import urandom
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+
+from questions.models import VOTE_DOWN, VOTE_UP, Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency benchmark of the vote engine: many parallel voters "
+        "vote for the same question, then the counters are verified."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--voters", type=int, default=200)
+        parser.add_argument("--votes-per-voter", type=int, default=5)
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        votes_per_voter = options["votes_per_voter"]
+        prefix = md5(urandom(10)).hexdigest()[:8]
+        user_model = get_user_model()
+
+        user_model.objects.bulk_create(
+            user_model(
+                username=f"bench-{prefix}-{n}",
+                email=f"bench-{prefix}-{n}@mail.fake",
+            )
+            for n in range(options["voters"])
+        )
+        users = list(
+            user_model.objects.filter(username__startswith=f"bench-{prefix}-")
+        )
+        question = Question.objects.create(
+            author=users[0], title=f"Benchmark {prefix}", content="Benchmark"
+        )
+
+        values = (VOTE_UP, VOTE_DOWN)
+        plans = [
+            (user, [rnd.choice(values) for _ in range(votes_per_voter)])
+            for user in users
+        ]
+
+        try:
+            latencies, errors, elapsed = self.run(question, plans, options)
+            self.report(question, plans, latencies, errors, elapsed)
+        finally:
+            question.delete()
+            user_model.objects.filter(pk__in=[u.pk for u in users]).delete()
+
+    def run(self, question, plans, options):
+        latencies, errors = [], []
+
+        def voter(plan):
+            user, values = plan
+            post = Question(pk=question.pk)
+            try:
+                for value in values:
+                    start = time.perf_counter()
+                    try:
+                        post.vote(user, value)
+                    except Exception as exc:
+                        errors.append(exc)
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            list(pool.map(voter, plans))
+        return latencies, errors, time.perf_counter() - start
+
+    def report(self, question, plans, latencies, errors, elapsed):
+        expected = {}
+        for user, values in plans:
+            for value in values:
+                current = expected.get(user.pk)
+                if current is None:
+                    expected[user.pk] = value
+                elif current != value:
+                    del expected[user.pk]
+
+        question.refresh_from_db()
+        actual = question.votes.aggregate(count=Count("pk"), sum=Sum("value"))
+
+        latencies = sorted(latencies)
+        total = len(latencies)
+        self.stdout.write(
+            f"{total} votes in {elapsed:.2f}s "
+            f"({total / elapsed:.0f} votes/s), {len(errors)} errors\n"
+            f"latency p50: {statistics.median(latencies) * 1000:.2f}ms, "
+            f"p95: {latencies[int(total * 0.95) - 1] * 1000:.2f}ms, "
+            f"max: {latencies[-1] * 1000:.2f}ms"
+        )
+
+        checks = [
+            ("rating", question.rating, sum(expected.values())),
+            ("number_of_votes", question.number_of_votes, len(expected)),
+            ("votes count", actual["count"], len(expected)),
+            ("votes sum", actual["sum"] or 0, sum(expected.values())),
+        ]
+        failed = False
+        for name, got, want in checks:
+            status = "OK" if got == want else "MISMATCH"
+            failed = failed or got != want
+            self.stdout.write(f"{name}: {got} (expected {want}) {status}")
+
+        if errors:
+            self.stdout.write(f"first error: {errors[0]!r}")
+        if failed and not errors:
+            raise CommandError("Counters are inconsistent.")
@@ -0,0 +1,449 @@
+import random
+import time
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from hashlib import md5
+from itertools import accumulate
+from os import urandom
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from questions import hotness, pagecache, rendering
+from questions.models import (
+    VOTE_DOWN,
+    VOTE_UP,
+    Answer,
+    AnswerVote,
+    HotnessEpoch,
+    Question,
+    QuestionVote,
+    Tag,
+)
+from questions.pagecache import page_cache
+from questions.search import get_search_backend
+from questions.trending import trending_cache
+from questions.utils import chunks, make_excerpt
+
+
+WORDS = (
+    "python django query index cache model view template form test "
+    "database table row column join select update insert delete "
+    "transaction lock thread process memory error exception function "
+    "class method object list dict string number file request response "
+    "server client session cookie user password email page url api json "
+    "migration field value key sort filter count order group limit "
+    "performance slow fast timeout connection pool queue worker task "
+    "signal import module package install version build deploy docker "
+    "linux windows config setting log debug trace stack frame loop "
+    "async await generator iterator decorator closure scope variable"
+).split()
+
+# Fraction of up votes
+QUESTION_UP_VOTES = 0.8
+ANSWER_UP_VOTES = 0.7
+# Fraction of questions with answers that have an accepted one
+ACCEPTED = 0.4
+# Hot questions are posted within the last half-life of hotness
+# and get this much more votes / answers than the others
+HOT_BOOST = 20
+# Number of distinct contents, every one is rendered once
+CONTENTS = 200
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """ Save values of `auto_now` / `auto_now_add` fields as they are
+    set, instead of the current time.
+    """
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, tags, questions, answers and votes "
+        "for load tests and benchmarks. Tags are Zipf distributed, "
+        "votes and answers follow a power law, a few questions are hot. "
+        "Rows are inserted in bulk without signals (so no emails are "
+        "queued) and the counters are computed along, run it "
+        "on a database nobody writes to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--questions", type=int, default=10000)
+        parser.add_argument(
+            "--answers-per",
+            type=float,
+            default=3,
+            help="Mean number of answers per question.",
+        )
+        parser.add_argument(
+            "--votes",
+            type=float,
+            default=10,
+            help="Mean number of votes per question.",
+        )
+        parser.add_argument(
+            "--answer-votes",
+            type=float,
+            default=3,
+            help="Mean number of votes per answer.",
+        )
+        parser.add_argument("--tags", type=int, default=500)
+        parser.add_argument(
+            "--hot",
+            type=float,
+            default=0.01,
+            help="Fraction of hot questions.",
+        )
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=365,
+            help="Questions are posted within this number of days.",
+        )
+        parser.add_argument(
+            "--password",
+            default=None,
+            help="Password of the users (unusable by default).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options["users"] < 1:
+            raise CommandError("At least one user is needed.")
+
+        self.rnd = random.Random(options["seed"])
+        self.options = options
+        self.chunk_size = options["chunk_size"]
+        self.totals = Counter()
+        start = time.perf_counter()
+
+        # Scores are computed against the current time, so the new
+        # epoch keeps them (and the existing ones) small.
+        hotness.renormalize()
+        self.epoch = HotnessEpoch.objects.get().timestamp
+        self.now = time.time()
+
+        self.word_weights = self.zipf_weights(len(WORDS))
+        self.contents = self.make_contents()
+
+        self.users = self.create_users(options["users"])
+        self.tags = self.create_tags(options["tags"])
+        self.tag_weights = self.zipf_weights(len(self.tags))
+        self.tag_counts: Counter = Counter()
+
+        self.question_pk = self.next_pk(Question)
+        self.answer_pk = self.next_pk(Answer)
+        fields = [
+            Question._meta.get_field("posted"),
+            Answer._meta.get_field("posted"),
+            QuestionVote._meta.get_field("timestamp"),
+            AnswerVote._meta.get_field("timestamp"),
+        ]
+        with explicit_timestamps(*fields):
+            for batch in chunks(range(options["questions"]), self.chunk_size):
+                with transaction.atomic():
+                    self.create_questions(len(batch))
+                self.stdout.write(
+                    f"{self.totals['questions']} questions...", ending="\r"
+                )
+
+        self.update_tags()
+        self.reset_sequences()
+        indexed = get_search_backend().rebuild()
+        self.purge_caches()
+
+        elapsed = time.perf_counter() - start
+        totals = ", ".join(f"{n} {name}" for name, n in self.totals.items())
+        self.stdout.write(
+            f"{totals} have been generated in {elapsed:.1f}s, "
+            f"{indexed} questions have been indexed"
+        )
+
+    def zipf_weights(self, n: int, s: float = 1.0):
+        """ Cumulative weights of `n` ranks of a Zipf distribution.
+        """
+        return list(accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+    def power_law(self, mean: float, alpha: float = 2.0) -> int:
+        """ Random count with the `mean`: most counts are small,
+        a few are very large (Lomax distribution).
+        """
+        value = mean * (alpha - 1) * (self.rnd.paretovariate(alpha) - 1)
+        return int(value + self.rnd.random())
+
+    def text(self, n: int) -> str:
+        words = self.rnd.choices(WORDS, cum_weights=self.word_weights, k=n)
+        return " ".join(words)
+
+    def make_contents(self):
+        """ Rendered contents of posts, some of them with code.
+        """
+        contents = []
+        for _ in range(CONTENTS):
+            paragraphs = [
+                self.text(self.rnd.randint(10, 60)).capitalize() + "."
+                for _ in range(self.rnd.randint(1, 4))
+            ]
+            if self.rnd.random() < 0.3:
+                code = "\n".join(
+                    f"{self.text(1)} = {self.text(1)}({self.text(1)})"
+                    for _ in range(self.rnd.randint(1, 8))
+                )
+                paragraphs.append(f"```python\n{code}\n```")
+            content = "\n\n".join(paragraphs)
+            contents.append(
+                (content, rendering.render(content), make_excerpt(content))
+            )
+        return contents
+
+    def timestamp(self, value: float) -> datetime:
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+
+    def after(self, posted: float) -> float:
+        """ Time of an event following `posted`, most of them happen
+        soon after it.
+        """
+        return posted + (self.now - posted) * self.rnd.random() ** 3
+
+    def create_users(self, n: int):
+        user_model = get_user_model()
+        prefix = md5(urandom(10)).hexdigest()[:8]
+        password = make_password(self.options["password"])
+
+        for batch in chunks(range(n), self.chunk_size):
+            user_model.objects.bulk_create(
+                user_model(
+                    username=f"user-{prefix}-{i}",
+                    email=f"user-{prefix}-{i}@mail.fake",
+                    password=password,
+                )
+                for i in batch
+            )
+        self.totals["users"] += n
+
+        users = user_model.objects.filter(
+            username__startswith=f"user-{prefix}-"
+        )
+        return list(users.values_list("pk", flat=True))
+
+    def create_tags(self, n: int):
+        """ Return ids of tags ordered by popularity to be.
+        """
+        names = [f"tag{i}" for i in range(n)]
+        for batch in chunks(names, self.chunk_size):
+            Tag.objects.bulk_create(
+                [Tag(name=name) for name in batch], ignore_conflicts=True
+            )
+
+        ids = {}
+        for batch in chunks(names, self.chunk_size):
+            ids.update(
+                Tag.objects.filter(name__in=batch).values_list("name", "pk")
+            )
+        return [ids[name] for name in names]
+
+    def next_pk(self, model) -> int:
+        return (model.objects.aggregate(pk=Max("pk"))["pk"] or 0) + 1
+
+    def pick_tags(self):
+        count = self.rnd.randint(1, settings.QUESTIONS_MAX_NUMBER_OF_TAGS)
+        count = min(count, len(self.tags))
+        tags = set()
+        while len(tags) < count:
+            tags.update(
+                self.rnd.choices(
+                    self.tags, cum_weights=self.tag_weights, k=count
+                )
+            )
+        return list(tags)[:count]
+
+    def make_votes(self, model, post, posted, mean, up, author):
+        """ Votes for the `post`, its counters are set accordingly.
+        Returns the votes and their times.
+        """
+        count = min(self.power_law(mean), len(self.users) - 1)
+        voters = [
+            user
+            for user in self.rnd.sample(self.users, count + 1)
+            if user != author
+        ][:count]
+
+        votes, times = [], []
+        for user in voters:
+            value = VOTE_UP if self.rnd.random() < up else VOTE_DOWN
+            at = self.after(posted)
+            votes.append(
+                model(
+                    to_id=post.pk,
+                    user_id=user,
+                    value=value,
+                    timestamp=self.timestamp(at),
+                )
+            )
+            times.append(at)
+            post.rating += value
+        post.number_of_votes = len(votes)
+        return votes, times
+
+    def create_questions(self, n: int) -> None:
+        options = self.options
+        span = options["days"] * 86400
+        hot_span = hotness.half_life()
+
+        questions, answers, links = [], [], []
+        question_votes, answer_votes = [], []
+        for _ in range(n):
+            hot = self.rnd.random() < options["hot"]
+            boost = HOT_BOOST if hot else 1
+            # The site grows, recent questions are more frequent
+            age = hot_span if hot else span
+            posted = self.now - age * self.rnd.random() ** 2
+
+            content, content_html, excerpt = self.rnd.choice(self.contents)
+            author = self.rnd.choice(self.users)
+            question = Question(
+                pk=self.question_pk,
+                author_id=author,
+                title=self.text(self.rnd.randint(3, 12)).capitalize() + "?",
+                content=content,
+                content_html=content_html,
+                content_renderer=rendering.RENDERER,
+                excerpt=excerpt,
+                posted=self.timestamp(posted),
+            )
+            self.question_pk += 1
+            score = hotness.contribution(
+                hotness.QUESTION_WEIGHT, posted, self.epoch
+            )
+
+            votes, times = self.make_votes(
+                QuestionVote,
+                question,
+                posted,
+                options["votes"] * boost,
+                QUESTION_UP_VOTES,
+                author,
+            )
+            question_votes.extend(votes)
+            for at in times:
+                score += hotness.contribution(
+                    hotness.VOTE_WEIGHT, at, self.epoch
+                )
+
+            question_answers = []
+            for _ in range(self.power_law(options["answers_per"] * boost)):
+                content, content_html, _ = self.rnd.choice(self.contents)
+                at = self.after(posted)
+                answer = Answer(
+                    pk=self.answer_pk,
+                    author_id=self.rnd.choice(self.users),
+                    question_id=question.pk,
+                    content=content,
+                    content_html=content_html,
+                    content_renderer=rendering.RENDERER,
+                    posted=self.timestamp(at),
+                )
+                self.answer_pk += 1
+                score += hotness.contribution(
+                    hotness.ANSWER_WEIGHT, at, self.epoch
+                )
+                votes, _ = self.make_votes(
+                    AnswerVote,
+                    answer,
+                    at,
+                    options["answer_votes"],
+                    ANSWER_UP_VOTES,
+                    answer.author_id,
+                )
+                answer_votes.extend(votes)
+                question_answers.append(answer)
+
+            if question_answers and self.rnd.random() < ACCEPTED:
+                accepted = max(question_answers, key=lambda a: a.rating)
+                accepted.is_accepted = True
+                question.accepted_answer_id = accepted.pk
+
+            question.number_of_answers = len(question_answers)
+            question.hotness = score
+            questions.append(question)
+            answers.extend(question_answers)
+
+            for tag in self.pick_tags():
+                links.append(
+                    Question.tags.through(question_id=question.pk, tag_id=tag)
+                )
+                self.tag_counts[tag] += 1
+
+        # Answers refer to questions and the accepted answer to answers
+        accepted = [q for q in questions if q.accepted_answer_id]
+        answer_ids = [q.accepted_answer_id for q in accepted]
+        for question in accepted:
+            question.accepted_answer_id = None
+        Question.objects.bulk_create(questions)
+        Answer.objects.bulk_create(answers)
+        for question, answer_id in zip(accepted, answer_ids):
+            question.accepted_answer_id = answer_id
+        Question.objects.bulk_update(accepted, ["accepted_answer"])
+
+        Question.tags.through.objects.bulk_create(links)
+        QuestionVote.objects.bulk_create(question_votes)
+        AnswerVote.objects.bulk_create(answer_votes)
+
+        self.totals["questions"] += len(questions)
+        self.totals["answers"] += len(answers)
+        self.totals["votes"] += len(question_votes) + len(answer_votes)
+
+    def update_tags(self) -> None:
+        """ Add the generated questions to the tag counters.
+        """
+        tags = defaultdict(list)
+        for tag, count in self.tag_counts.items():
+            tags[count].append(tag)
+
+        with transaction.atomic():
+            for count, ids in tags.items():
+                for batch in chunks(ids, self.chunk_size):
+                    Tag.objects.filter(pk__in=batch).update(
+                        number_of_questions=F("number_of_questions") + count
+                    )
+
+    def reset_sequences(self) -> None:
+        """ Questions / answers are inserted with explicit ids,
+        sequences of some databases have to catch up.
+        """
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Question, Answer]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def purge_caches(self) -> None:
+        trending_cache.invalidate()
+        page_cache.purge(
+            pagecache.LATEST, pagecache.POPULAR, pagecache.TRENDING
+        )
+        for batch in chunks(self.tag_counts, self.chunk_size):
+            names = Tag.objects.filter(pk__in=batch).values_list(
+                "name", flat=True
+            )
+            page_cache.purge(*(pagecache.tag_key(name) for name in names))
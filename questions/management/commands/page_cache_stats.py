@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.urls import URLResolver, get_resolver
+
+from questions.pagecache import HIT, MISS, page_cache
+from questions.views import PageCacheMixin
+
+
+class Command(BaseCommand):
+    help = "Show hits / misses of the full-page cache per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the counters."
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'view':<20} {'hits':>10} {'misses':>10} {'ratio':>6}  state"
+        )
+        for view in self.views():
+            stats = page_cache.stats(view)
+            total = stats[HIT] + stats[MISS]
+            ratio = stats[HIT] / total if total else 0
+            state = "on" if page_cache.is_enabled(view) else "off"
+            self.stdout.write(
+                f"{view:<20} {stats[HIT]:>10} {stats[MISS]:>10} "
+                f"{ratio:>6.1%}  {state}"
+            )
+            if options["reset"]:
+                page_cache.reset_stats(view)
+
+    def views(self, patterns=None):
+        """ Yield URL names of views served with the page cache.
+        """
+        if patterns is None:
+            patterns = get_resolver().url_patterns
+
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self.views(pattern.url_patterns)
+                continue
+
+            view = getattr(pattern.callback, "view_class", None)
+            if (
+                pattern.name
+                and view is not None
+                and issubclass(view, PageCacheMixin)
+                and view.use_page_cache
+            ):
+                yield pattern.name
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from questions.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild full-text search index of questions "
+        "(e.g. after questions have been loaded in bulk)."
+    )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(
+            f"{count} questions have been indexed by {type(backend).__name__}"
+        )
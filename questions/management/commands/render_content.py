@@ -0,0 +1,46 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from questions import rendering
+from questions.models import Answer, Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render content of questions / answers rendered by another "
+        "version of the renderer (e.g. after it has been changed)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render content of all posts.",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes rendering batches.",
+        )
+
+    def handle(self, *args, **options):
+        processes = max(options["processes"], 1)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for model in [Question, Answer]:
+                rendered, skipped = rendering.rerender(
+                    model,
+                    executor,
+                    processes=processes,
+                    batch_size=options["batch_size"],
+                    everything=options["all"],
+                )
+                self.stdout.write(
+                    f"{rendered} {model._meta.verbose_name_plural} have been "
+                    f"rendered by {rendering.RENDERER}, {skipped} changed "
+                    f"meanwhile"
+                )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from questions import hotness
+from questions.trending import trending_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the epoch of question hotness scores to the current time. "
+        "It's supposed to be run periodically (e.g. daily by cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute all scores from votes and answers.",
+        )
+
+    def handle(self, *args, **options):
+        factor = hotness.renormalize()
+        self.stdout.write(f"Scores have been scaled by {factor:.6g}")
+
+        if options["rebuild"]:
+            updated = hotness.rebuild()
+            self.stdout.write(f"Scores of {updated} questions were rebuilt")
+
+        trending_cache.invalidate()
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from questions.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = "Send queued emails (runs until interrupted unless --once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help="Seconds to wait when there are no due emails.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no due emails.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = send_batch(options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f"Sent: {sent}, failed: {failed}")
+                continue
+
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            f"Total sent: {total_sent}, failed: {total_failed}"
+        )
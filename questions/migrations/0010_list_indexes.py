@@ -0,0 +1,37 @@
+# Generated by Django 2.2.4 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0009_question_number_of_answers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', '-is_accepted', '-rating', '-posted'], name='answer_question_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answervote',
+            index=models.Index(fields=['to', '-timestamp'], name='answervote_to_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-posted', '-id'], name='question_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-rating', '-posted'], name='question_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-number_of_votes'], name='question_votes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionvote',
+            index=models.Index(fields=['to', '-timestamp'], name='questionvote_to_time_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.4 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0010_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='answer',
+            name='answer_question_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', '-is_accepted', '-rating', '-posted', '-id'], name='answer_question_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-rating', '-posted', '-id'], name='question_rating_idx'),
+        ),
+    ]
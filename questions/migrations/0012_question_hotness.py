@@ -0,0 +1,60 @@
+# Generated by Django 2.2.4 on 2026-10-18 10:21
+
+import time
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def initial_hotness(apps, schema_editor):
+    """ Create the epoch and score existing questions as if all their
+    activity had happened when they were posted. `manage.py
+    renormalize_hotness --rebuild` computes precise values.
+    """
+    HotnessEpoch = apps.get_model("questions", "HotnessEpoch")
+    Question = apps.get_model("questions", "Question")
+
+    epoch = HotnessEpoch.objects.create(timestamp=time.time()).timestamp
+    half_life = settings.QUESTIONS_HOT_HALF_LIFE_HOURS * 3600.0
+
+    questions = []
+    for question in Question.objects.only(
+        "posted", "number_of_votes", "number_of_answers"
+    ).iterator():
+        weight = 1 + question.number_of_votes + 2 * question.number_of_answers
+        age = question.posted.timestamp() - epoch
+        question.hotness = weight * 2 ** (age / half_life)
+        questions.append(question)
+
+    Question.objects.bulk_update(questions, ["hotness"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0011_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotnessEpoch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.FloatField()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_votes_idx',
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='hotness',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-hotness', 'id'], name='question_hot_idx'),
+        ),
+        migrations.RunPython(initial_hotness, migrations.RunPython.noop),
+    ]
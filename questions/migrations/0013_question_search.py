@@ -0,0 +1,60 @@
+# Generated by Django 2.2.4 on 2026-10-18 14:05
+
+from django.db import migrations
+
+FTS_TABLE = "questions_question_fts"
+FULLTEXT_INDEX = "question_fulltext_idx"
+
+
+def has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+def create_search_index(apps, schema_editor):
+    """ Create full-text index of questions for the current database.
+    Other databases use `SimpleSearchBackend` that needs no index.
+    """
+    connection = schema_editor.connection
+
+    if connection.vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE questions_question ADD FULLTEXT INDEX "
+            f"{FULLTEXT_INDEX} (title, content)"
+        )
+    elif connection.vendor == "sqlite" and has_fts5(connection):
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content)"
+        )
+        # Matches in the title are more relevant than in the content
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) "
+            f"VALUES ('rank', 'bm25(2.0, 1.0)')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+            f"SELECT id, title, content FROM questions_question"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+
+    if connection.vendor == "mysql":
+        schema_editor.execute(
+            f"ALTER TABLE questions_question DROP INDEX {FULLTEXT_INDEX}"
+        )
+    elif connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0012_question_hotness'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
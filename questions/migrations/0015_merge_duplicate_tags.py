@@ -0,0 +1,56 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:05
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """ Merge tags which names differ only in case / surrounding spaces
+    into the oldest one, before the name becomes unique.
+    """
+    Question = apps.get_model("questions", "Question")
+    Tag = apps.get_model("questions", "Tag")
+    QuestionTag = Question.tags.through
+
+    groups = defaultdict(list)
+    for pk, name in Tag.objects.order_by("pk").values_list("pk", "name"):
+        groups[name.strip().casefold()].append((pk, name))
+
+    for name, tags in groups.items():
+        (keep, keep_name), *duplicates = tags
+        duplicate_ids = [pk for pk, _ in duplicates]
+
+        if duplicate_ids:
+            tagged = set(
+                QuestionTag.objects.filter(tag=keep).values_list(
+                    "question", flat=True
+                )
+            )
+            retagged = (
+                QuestionTag.objects.filter(tag__in=duplicate_ids)
+                .exclude(question__in=tagged)
+                .values_list("question", flat=True)
+                .distinct()
+            )
+            QuestionTag.objects.bulk_create(
+                [
+                    QuestionTag(question_id=question_id, tag_id=keep)
+                    for question_id in retagged
+                ]
+            )
+            Tag.objects.filter(pk__in=duplicate_ids).delete()
+
+        if keep_name != name:
+            Tag.objects.filter(pk=keep).update(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0014_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
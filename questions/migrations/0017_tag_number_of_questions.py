@@ -0,0 +1,42 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_questions(apps, schema_editor):
+    """ Initial values of the counters, maintained incrementally since.
+    """
+    Question = apps.get_model("questions", "Question")
+    Tag = apps.get_model("questions", "Tag")
+    QuestionTag = Question.tags.through
+
+    counts = (
+        QuestionTag.objects.filter(tag=OuterRef("pk"))
+        .order_by()
+        .values("tag")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Tag.objects.update(number_of_questions=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0016_tag_name_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='number_of_questions',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-number_of_questions', 'name'], name='tag_popular_idx'),
+        ),
+        migrations.RunPython(count_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0017_tag_number_of_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
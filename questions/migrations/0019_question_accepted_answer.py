@@ -0,0 +1,49 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:37
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def set_accepted_answers(apps, schema_editor):
+    """ Refer to the accepted answers flagged by `is_accepted`,
+    only the latest one of a question stays accepted.
+    """
+    Answer = apps.get_model("questions", "Answer")
+    Question = apps.get_model("questions", "Question")
+
+    accepted = Answer.objects.filter(
+        question=OuterRef("pk"), is_accepted=True
+    ).order_by("-pk")
+    Question.objects.filter(answer__is_accepted=True).update(
+        accepted_answer=Subquery(accepted.values("pk")[:1])
+    )
+    Answer.objects.filter(is_accepted=True).exclude(
+        pk__in=Question.objects.filter(
+            accepted_answer__isnull=False
+        ).values("accepted_answer")
+    ).update(is_accepted=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0018_post_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='answer',
+            name='answer_question_order_idx',
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='accepted_answer',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='questions.Answer'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', '-rating', '-posted', '-id'], name='answer_question_order_idx'),
+        ),
+        migrations.RunPython(set_accepted_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+def make_excerpt(content, length):
+    """ A copy of `questions.utils.make_excerpt` at the time
+    of the migration.
+    """
+    text = " ".join(content.split())
+    if len(text) <= length:
+        return text
+
+    excerpt = text[: length - 1]
+    if text[length - 1] != " " and " " in excerpt:
+        excerpt = excerpt.rsplit(" ", 1)[0]
+    return excerpt.rstrip() + "…"
+
+
+def make_excerpts(apps, schema_editor):
+    Question = apps.get_model("questions", "Question")
+
+    batch = []
+    for question in Question.objects.only("content").iterator():
+        question.excerpt = make_excerpt(question.content, 300)
+        batch.append(question)
+        if len(batch) == 500:
+            Question.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    Question.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0019_question_accepted_answer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(make_excerpts, migrations.RunPython.noop),
+    ]
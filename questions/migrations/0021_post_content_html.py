@@ -0,0 +1,118 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:44
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+
+try:
+    import bleach
+    import markdown
+except ImportError:
+    bleach = markdown = None
+
+
+# A copy of version 1 of `questions.rendering` at the time of the
+# migration, posts rendered by a later version are re-rendered
+# with `manage.py render_content`.
+ALLOWED_TAGS = [
+    "a",
+    "blockquote",
+    "br",
+    "code",
+    "div",
+    "em",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "span",
+    "strong",
+    "ul",
+]
+ALLOWED_ATTRIBUTES = {
+    "a": ["href", "title"],
+    "div": ["class"],
+    "span": ["class"],
+}
+ALLOWED_PROTOCOLS = ["http", "https", "mailto"]
+
+
+def render_markdown(content):
+    html = markdown.markdown(
+        content,
+        extensions=["fenced_code", "codehilite", "sane_lists"],
+        extension_configs={
+            "codehilite": {"css_class": "highlight", "guess_lang": False}
+        },
+    )
+    html = bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+    )
+    return bleach.linkify(html, skip_tags=["code", "pre"])
+
+
+def render_text(content):
+    return linebreaks(content, autoescape=True)
+
+
+def render_content(apps, schema_editor):
+    """ Render content of the existing posts.
+    """
+    if markdown is not None and bleach is not None:
+        render, renderer = render_markdown, "markdown:1"
+    else:
+        render, renderer = render_text, "text:1"
+
+    for name in ["Question", "Answer"]:
+        model = apps.get_model("questions", name)
+        batch = []
+        for post in model.objects.only("content").iterator():
+            post.content_html = render(post.content)
+            post.content_renderer = renderer
+            batch.append(post)
+            if len(batch) == 500:
+                model.objects.bulk_update(
+                    batch, ["content_html", "content_renderer"]
+                )
+                batch = []
+        model.objects.bulk_update(batch, ["content_html", "content_renderer"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0020_question_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='content_renderer',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='content_renderer',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(render_content, migrations.RunPython.noop),
+    ]
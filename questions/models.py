@@ -1,11 +1,15 @@
 import logging
 
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from . import rendering
+from .utils import make_excerpt
+from .votes import get_vote_engine
 
 
 VOTE_UP = 1
@@ -23,6 +27,8 @@ class AbstractPost(models.Model):
     """
 
     vote_class: Optional[models.Model] = None
+    # Fields used by voting and its signals, enough to load for a vote
+    vote_fields: Tuple[str, ...] = ("pk",)
 
     author = models.ForeignKey(
         User,
@@ -31,35 +37,117 @@ class AbstractPost(models.Model):
         related_query_name="%(class)s",
     )
     content = models.TextField(blank=False)
+    # Sanitized HTML of `content` and the renderer that made it
+    # (see `questions.rendering`)
+    content_html = models.TextField(blank=True, default="", editable=False)
+    content_renderer = models.CharField(
+        blank=True, default="", editable=False, max_length=32
+    )
     posted = models.DateTimeField(auto_now_add=True)
     rating = models.IntegerField(default=0)
     number_of_votes = models.IntegerField(default=0)
+    # Bumped by every change of the post shown in its cached fragments
+    # (see `questions.fragments`)
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         abstract = True
         ordering = ["-posted"]
 
+    # Fields made from `content` by `render_content`
+    content_fields: Tuple[str, ...] = ("content_html", "content_renderer")
+
+    def render_content(self) -> None:
+        self.content_html = rendering.render(self.content)
+        self.content_renderer = rendering.RENDERER
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            if "content" not in self.get_deferred_fields():
+                self.render_content()
+        elif "content" in update_fields:
+            self.render_content()
+            update_fields = {*update_fields, *self.content_fields}
+            kwargs["update_fields"] = update_fields
+
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version"}
+        self.version = models.F("version") + 1
+        super().save(*args, **kwargs)
+        # The new value is loaded on access
+        del self.__dict__["version"]
+
     def vote(self, user, value: int) -> int:
         """ Add vote from `user` and return new rating.
+        If the user has already voted with the opposite value,
+        the vote is deleted instead.
         """
         assert self.vote_class is not None
         assert value in (VOTE_DOWN, VOTE_UP), value
 
-        try:
-            current = self.vote_class.objects.get(user=user, to=self)
-        except ObjectDoesNotExist:
-            self.vote_class.objects.create(user=user, to=self, value=value)
-            logger.debug(
-                f"New vote ({value}) by {user} hase been created for {self}"
-            )
-            return self.rating + value
+        result = get_vote_engine(type(self)).vote(self, user.pk, value)
+        logger.debug(
+            f"Vote ({value}) by {user} has been processed for {self!r}, "
+            f"changed: {result.changed}"
+        )
+        return result.rating
+
+    def add_vote(self, user, value: int) -> bool:
+        """ Add vote from `user` unless the user has already voted.
+        Returns whether the vote has been added.
+        """
+        assert self.vote_class is not None
+        assert value in (VOTE_DOWN, VOTE_UP), value
+
+        result = get_vote_engine(type(self)).add(self, user.pk, value)
+        logger.debug(
+            f"Vote ({value}) by {user} has been processed for {self!r}, "
+            f"added: {result.changed}"
+        )
+        return result.changed
+
+    def change_vote(self, user, value: int) -> int:
+        """ Change value of an existing vote of `user`
+        and return new rating.
+        """
+        assert self.vote_class is not None
+        assert value in (VOTE_DOWN, VOTE_UP), value
+
+        result = get_vote_engine(type(self)).change(self, user.pk, value)
+        logger.debug(
+            f"Vote by {user} has been changed to {value} for {self!r}"
+        )
+        return result.rating
+
+    def retract_vote(self, user) -> int:
+        """ Delete vote of `user` and return new rating.
+        """
+        assert self.vote_class is not None
+
+        result = get_vote_engine(type(self)).retract(self, user.pk)
+        logger.debug(f"Vote by {user} has been deleted for {self!r}")
+        return result.rating
 
-        if current.value == value:
-            return self.rating
+    @classmethod
+    def get_votes_of(cls, user, ids: Iterable[int]) -> Dict[int, int]:
+        """ Return values of votes of `user` for the posts with `ids`
+        (with one query).
+        """
+        ids = list(ids)
+        if not ids or not user.is_authenticated:
+            return {}
+
+        votes = cls.vote_class.objects.filter(user=user, to__in=ids)
+        return dict(votes.order_by().values_list("to", "value"))
 
-        self.vote_class.objects.filter(to=self, user=user).delete()
-        logger.debug(f"Vote by {user} has been deleted for {self}")
-        return self.rating + value
+    def __repr__(self):
+        # Unlike `__str__` never touches related objects, so it's safe
+        # to be used in log messages.
+        return f"<{type(self).__name__} ({self.pk})>"
 
 
 class AnswerVote(models.Model):
@@ -79,6 +167,11 @@ class AnswerVote(models.Model):
     value = models.SmallIntegerField(choices=VOTE_CHOICES)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["to", "-timestamp"], name="answervote_to_time_idx"
+            )
+        ]
         ordering = ["-timestamp"]
         unique_together = ["to", "user"]
 
@@ -88,6 +181,7 @@ class AnswerVote(models.Model):
 
 class Answer(AbstractPost):
     vote_class = AnswerVote
+    vote_fields = ("pk", "question")
 
     is_accepted = models.BooleanField(default=False)
     question = models.ForeignKey(
@@ -97,30 +191,77 @@ class Answer(AbstractPost):
         related_query_name="answer",
     )
 
+    class Meta(AbstractPost.Meta):
+        indexes = [
+            # Answers of a question as they are shown on its page,
+            # the accepted one is looked up by `Question.accepted_answer`
+            models.Index(
+                fields=["question", "-rating", "-posted", "-id"],
+                name="answer_question_order_idx",
+            )
+        ]
+
     def __str__(self):
         return f"{self.question.title} - {self.content[:50]} ..."
 
     def mark(self):
-        """ Mark the answer as accepted.
+        """ Mark the answer as accepted, the answer accepted before
+        is unmarked. `Question.accepted_answer` refers to the accepted
+        answer, so it takes a fixed number of writes however many
+        answers the question has.
         """
-        self.question.answers.update(is_accepted=False)
-        self.is_accepted = True
-        self.save(update_fields=["is_accepted"])
+        with transaction.atomic(
+            using=router.db_for_write(Answer), savepoint=False
+        ):
+            previous = (
+                Question.objects.select_for_update()
+                .filter(pk=self.question_id)
+                .values_list("accepted_answer", flat=True)
+                .get()
+            )
+            if previous is not None and previous != self.pk:
+                Answer.objects.filter(pk=previous).update(
+                    is_accepted=False, version=models.F("version") + 1
+                )
+            if previous != self.pk:
+                Question.objects.filter(pk=self.question_id).update(
+                    accepted_answer=self.pk
+                )
+            self.set_accepted(True)
+
         logger.debug(
-            f"Answer ({self.pk}) by {self.author} has been marked "
-            f"for question ({self.question.pk})."
+            f"Answer ({self.pk}) has been marked "
+            f"for question ({self.question_id})."
         )
 
     def unmark(self):
         """ Unmark acceptance from the answer.
         """
-        self.is_accepted = False
-        self.save(update_fields=["is_accepted"])
+        with transaction.atomic(
+            using=router.db_for_write(Answer), savepoint=False
+        ):
+            Question.objects.filter(
+                pk=self.question_id, accepted_answer=self.pk
+            ).update(accepted_answer=None)
+            self.set_accepted(False)
+
         logger.debug(
-            f"Answer ({self.pk}) by {self.author} has been unmarked "
-            f"for question ({self.question.pk})."
+            f"Answer ({self.pk}) has been unmarked "
+            f"for question ({self.question_id})."
         )
 
+    def set_accepted(self, accepted: bool) -> None:
+        self.is_accepted = accepted
+        self.save(update_fields=["is_accepted"])
+
+        # Keep the loaded question in sync
+        if self._meta.get_field("question").is_cached(self):
+            question = self.question
+            if accepted:
+                question.accepted_answer_id = self.pk
+            elif question.accepted_answer_id == self.pk:
+                question.accepted_answer_id = None
+
 
 class QuestionVote(models.Model):
     timestamp = models.DateTimeField(auto_now=True)
@@ -139,6 +280,11 @@ class QuestionVote(models.Model):
     value = models.SmallIntegerField(choices=VOTE_CHOICES)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["to", "-timestamp"], name="questionvote_to_time_idx"
+            )
+        ]
         ordering = ["-timestamp"]
         unique_together = ["to", "user"]
 
@@ -149,35 +295,124 @@ class QuestionVote(models.Model):
 class Question(AbstractPost):
     vote_class = QuestionVote
 
+    accepted_answer = models.ForeignKey(
+        "Answer",
+        blank=True,
+        editable=False,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    # Beginning of `content` shown in lists, which defer `content`
+    excerpt = models.CharField(
+        blank=True,
+        default="",
+        editable=False,
+        max_length=settings.QUESTIONS_EXCERPT_LEN,
+    )
+    hotness = models.FloatField(default=0, editable=False)
     number_of_answers = models.IntegerField(default=0)
     tags = models.ManyToManyField("Tag")
     title = models.CharField(
         blank=False, max_length=settings.QUESTIONS_MAX_TITLE_LEN
     )
 
+    class Meta(AbstractPost.Meta):
+        indexes = [
+            models.Index(
+                fields=["-posted", "-id"], name="question_posted_idx"
+            ),
+            models.Index(
+                fields=["-rating", "-posted", "-id"],
+                name="question_rating_idx",
+            ),
+            models.Index(fields=["-hotness", "id"], name="question_hot_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    content_fields = (*AbstractPost.content_fields, "excerpt")
+
+    def render_content(self) -> None:
+        super().render_content()
+        self.excerpt = make_excerpt(self.content)
+
     @classmethod
     def trending(cls, count: int = 5) -> models.QuerySet:
         """ Returns a query set of trending questions.
         """
-        return cls.objects.order_by("-number_of_votes")[:count]
+        return cls.objects.order_by("-hotness", "pk")[:count]
 
     def add_tags(self, tags: List[str], user) -> None:
+        """ Add tags to the question, creating the missing ones.
+        Tags are resolved / created / linked in bulk, concurrent
+        creation of the same tag is not an error.
+        """
         if self.pk is None:
             raise ValueError("Instance should be saved.")
-        for raw_tag in tags:
-            try:
-                tag = Tag.objects.get(name=raw_tag)
-            except ObjectDoesNotExist:
-                tag = Tag.objects.create(added=user, name=raw_tag)
 
-            self.tags.add(tag)
+        names = {Tag.normalize(tag) for tag in tags} - {""}
+        if not names:
+            return
+
+        tag_ids = dict(
+            Tag.objects.filter(name__in=names).values_list("name", "pk")
+        )
+        missing = names - set(tag_ids)
+        if missing:
+            Tag.objects.bulk_create(
+                [Tag(added_by=user, name=name) for name in sorted(missing)],
+                ignore_conflicts=True,
+            )
+            tag_ids.update(
+                Tag.objects.filter(name__in=missing).values_list("name", "pk")
+            )
+
+        # Sends `m2m_changed` with the really added tags only,
+        # tag counters are maintained by its receiver.
+        self.tags.add(*tag_ids.values())
 
         logger.debug(f"Tags ({tags}) have been added to question {self.pk}")
 
 
+class HotnessEpoch(models.Model):
+    """ Reference time (UNIX timestamp) of `Question.hotness` values.
+    There is always exactly one row, see `questions.hotness`.
+    """
+
+    timestamp = models.FloatField()
+
+    def __str__(self):
+        return str(self.timestamp)
+
+
+class OutgoingEmail(models.Model):
+    """ Email waiting to be sent by `manage.py send_emails`
+    (see `questions.outbox`). It's created in the same transaction
+    as the change it notifies about and deleted once sent.
+    """
+
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    message = models.TextField(blank=True)
+    html_message = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt", "id"], name="outgoing_email_next_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to}"
+
+
 class Tag(models.Model):
     added = models.DateTimeField(auto_now_add=True)
     added_by = models.ForeignKey(
@@ -189,8 +424,27 @@ class Tag(models.Model):
         related_query_name="added_tag",
     )
     name = models.CharField(
-        blank=False, max_length=settings.QUESTIONS_MAX_TAG_LEN
+        blank=False, max_length=settings.QUESTIONS_MAX_TAG_LEN, unique=True
     )
+    number_of_questions = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-number_of_questions", "name"],
+                name="tag_popular_idx",
+            )
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.name = self.normalize(self.name)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """ Tags are case-insensitive, names are stored case-folded.
+        """
+        return name.strip().casefold()
@@ -0,0 +1,152 @@
+""" Transactional outbox for emails.
+
+Request handlers only insert `OutgoingEmail` rows, in the same
+transaction as the change they notify about, so a request does no
+network I/O and an email is queued if and only if the change is
+committed. `manage.py send_emails` drains the table in batches:
+a batch is claimed by moving its `next_attempt` forward (so other
+workers skip it), sent over a single mail connection, then sent
+emails are deleted and failed ones are rescheduled with exponential
+backoff.
+"""
+import logging
+
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(to: str, subject: str, message: str = "", html_message: str = ""):
+    """ Queue an email. Call it inside the transaction that makes
+    the change the email is about.
+    """
+    from .models import OutgoingEmail
+
+    email = OutgoingEmail.objects.create(
+        to=to, subject=subject, message=message, html_message=html_message
+    )
+    logger.debug(f"Email ({email.pk}) to {to} has been queued")
+    return email
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """ Delay before the next attempt after `attempts` failed ones.
+    """
+    seconds = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(
+        seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
+    )
+
+
+def pending():
+    from .models import OutgoingEmail
+
+    return OutgoingEmail.objects.filter(
+        next_attempt__lte=timezone.now(),
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    ).order_by("next_attempt", "pk")
+
+
+def claim(batch_size: int) -> list:
+    """ Take due emails for sending. They are hidden from other
+    workers for `EMAIL_OUTBOX_LEASE` seconds, so a crashed worker
+    only delays them.
+    """
+    from .models import OutgoingEmail
+
+    alias = router.db_for_write(OutgoingEmail)
+    skip_locked = connections[alias].features.has_select_for_update_skip_locked
+
+    with transaction.atomic(using=alias):
+        emails = list(
+            pending().select_for_update(skip_locked=skip_locked)[:batch_size]
+        )
+        lease = timezone.now() + timedelta(
+            seconds=settings.EMAIL_OUTBOX_LEASE
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt=lease)
+
+    return emails
+
+
+def make_message(email, connection) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.message,
+        settings.EMAIL_FROM,
+        [email.to],
+        connection=connection,
+    )
+    if email.html_message:
+        message.attach_alternative(email.html_message, "text/html")
+    return message
+
+
+def reschedule(emails: list, error: Exception) -> None:
+    from .models import OutgoingEmail
+
+    now = timezone.now()
+    for email in emails:
+        email.attempts += 1
+        email.next_attempt = now + retry_delay(email.attempts)
+        email.last_error = repr(error)
+
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            logger.error(
+                f"Email ({email.pk}) to {email.to} has not been sent "
+                f"after {email.attempts} attempts: {error!r}"
+            )
+
+    OutgoingEmail.objects.bulk_update(
+        emails, ["attempts", "next_attempt", "last_error"]
+    )
+
+
+def send_batch(batch_size: Optional[int] = None) -> Tuple[int, int]:
+    """ Send a batch of due emails over one connection.
+    Returns numbers of sent and failed emails.
+    """
+    from .models import OutgoingEmail
+
+    emails = claim(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    sent: List[int] = []
+    failed = 0
+    connection = get_connection(fail_silently=False)
+
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning(f"Mail connection failed: {error!r}")
+        reschedule(emails, error)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            try:
+                make_message(email, connection).send()
+            except Exception as error:
+                logger.warning(
+                    f"Email ({email.pk}) to {email.to} failed: {error!r}"
+                )
+                reschedule([email], error)
+                failed += 1
+            else:
+                sent.append(email.pk)
+    finally:
+        connection.close()
+        OutgoingEmail.objects.filter(pk__in=sent).delete()
+
+    logger.debug(f"{len(sent)} emails have been sent, {failed} failed")
+    return len(sent), failed
@@ -0,0 +1,164 @@
+""" Full-page cache. Pages are the same for all users, their
+personal part is loaded separately (see `views.PageState`).
+
+Pages are cached by URL along with surrogate keys of the data they
+show: `question:<pk>`, `answer:<pk>`, `tag:<name>`, `list:latest`,
+`list:popular` and `trending`. Changes purge keys instead of pages
+(a page can't be found by a key without a reverse index): a purge
+marks the key with the current time and a page cached before
+the mark of any of its keys is stale. The time a page is cached
+with is taken before its data is read, so a change committed
+while the page is rendered makes it stale as well.
+
+Purged keys are exact: a vote for a question purges the pages
+showing it, it doesn't purge other pages of the popular list even
+if the order of their questions changes, they expire after
+QUESTIONS_PAGE_CACHE_TTL seconds.
+"""
+import hashlib
+import logging
+import time
+
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+
+PAGE_KEY = "questions:page:{digest}"
+PURGE_KEY = "questions:page:purged:{digest}"
+STATS_KEY = "questions:page:stats:{view}:{result}"
+
+HIT = "hit"
+MISS = "miss"
+
+TRENDING = "trending"
+LATEST = "list:latest"
+POPULAR = "list:popular"
+
+
+def question_key(question_id: int) -> str:
+    return f"question:{question_id}"
+
+
+def answer_key(answer_id: int) -> str:
+    return f"answer:{answer_id}"
+
+
+def tag_key(name: str) -> str:
+    return f"tag:{name}"
+
+
+def digest(value: str) -> str:
+    # Keys of memcached can't contain spaces and are limited in length
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+class CachedPage(NamedTuple):
+    created: float
+    keys: Tuple[str, ...]
+    response: HttpResponse
+
+
+class PageCache:
+    """ Rendered pages kept in a shared cache.
+    """
+
+    def __init__(self, ttl: int, cache_alias: str = "default"):
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def is_enabled(self, view: str) -> bool:
+        return (
+            settings.QUESTIONS_PAGE_CACHE_ENABLED
+            and view not in settings.QUESTIONS_PAGE_CACHE_DISABLED
+        )
+
+    def key(self, request: HttpRequest) -> str:
+        return PAGE_KEY.format(
+            digest=digest(f"{request.get_host()}{request.get_full_path()}")
+        )
+
+    def get(self, request: HttpRequest, view: str) -> Optional[HttpResponse]:
+        """ Return a fresh cached response to `request` if any.
+        """
+        page = self.cache.get(self.key(request))
+        if page is not None and not self.is_fresh(page):
+            page = None
+
+        self.record(view, MISS if page is None else HIT)
+        return None if page is None else page.response
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        purged = self.cache.get_many(
+            [PURGE_KEY.format(digest=digest(key)) for key in page.keys]
+        )
+        return all(mark < page.created for mark in purged.values())
+
+    def set(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        keys: Iterable[str],
+        created: float,
+    ) -> None:
+        """ Cache a rendered `response` unless it's specific to
+        the user. `created` is the time the data of the page
+        has been read after.
+        """
+        if response.status_code != 200 or response.cookies:
+            return
+        if request.META.get("CSRF_COOKIE_USED"):
+            return
+
+        page = CachedPage(created, tuple(keys), response)
+        self.cache.set(self.key(request), page, self.ttl)
+        logger.debug(f"Page {request.get_full_path()} has been cached")
+
+    def purge(self, *keys: str) -> None:
+        """ Make pages with any of the surrogate `keys` stale.
+        """
+        now = time.time()
+        self.cache.set_many(
+            {PURGE_KEY.format(digest=digest(key)): now for key in keys},
+            # Marks must outlive the pages
+            timeout=None,
+        )
+        logger.debug(f"Pages with keys {', '.join(keys)} have been purged")
+
+    def record(self, view: str, result: str) -> None:
+        key = STATS_KEY.format(view=view, result=result)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+    def stats(self, view: str) -> Dict[str, int]:
+        """ Return numbers of hits and misses of the view.
+        """
+        keys = {
+            result: STATS_KEY.format(view=view, result=result)
+            for result in (HIT, MISS)
+        }
+        values = self.cache.get_many(keys.values())
+        return {result: values.get(key, 0) for result, key in keys.items()}
+
+    def reset_stats(self, view: str) -> None:
+        self.cache.delete_many(
+            [
+                STATS_KEY.format(view=view, result=result)
+                for result in (HIT, MISS)
+            ]
+        )
+
+
+page_cache = PageCache(ttl=settings.QUESTIONS_PAGE_CACHE_TTL)
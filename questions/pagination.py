@@ -0,0 +1,208 @@
+import base64
+import binascii
+import json
+
+from typing import List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage:
+    """ A page of objects returned by `KeysetPaginator`.
+    """
+
+    def __init__(
+        self,
+        object_list: list,
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """ Cursor (keyset) paginator. Instead of OFFSET each page is
+    selected with a `WHERE (ordering columns) < (last seen values)`
+    condition, so it doesn't run a COUNT query and any page costs
+    the same as the first one when the ordering is indexed.
+
+    The ordering is completed with the primary key to be total.
+    Annotations (e.g. search relevance) may be used in the ordering.
+    Cursors are opaque URL-safe strings.
+    """
+
+    def __init__(
+        self, queryset: QuerySet, ordering: Sequence[str], per_page: int
+    ):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = self.make_total(queryset, ordering)
+
+    @staticmethod
+    def make_total(queryset: QuerySet, ordering: Sequence[str]) -> List[str]:
+        """ Append the primary key to `ordering` if it's not there.
+        """
+        pk_name = queryset.model._meta.pk.name
+        ordering = [
+            name.replace("pk", pk_name) if name.lstrip("-") == "pk" else name
+            for name in ordering
+        ]
+
+        if not any(name.lstrip("-") == pk_name for name in ordering):
+            desc = bool(ordering) and ordering[-1].startswith("-")
+            ordering.append(f"-{pk_name}" if desc else pk_name)
+
+        return ordering
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        """ Return a page that starts after `cursor`
+        (or the first page if cursor is not specified).
+        """
+        position, backwards = self.decode(cursor)
+
+        ordering = self.ordering
+        if backwards:
+            ordering = [self.reverse(name) for name in ordering]
+
+        queryset = self.queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        objects = list(queryset[: self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+
+        if backwards:
+            objects.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        next_cursor = previous_cursor = None
+        if objects and has_next:
+            next_cursor = self.encode(objects[-1], backwards=False)
+        if objects and has_previous:
+            previous_cursor = self.encode(objects[0], backwards=True)
+
+        return KeysetPage(objects, next_cursor, previous_cursor)
+
+    @staticmethod
+    def reverse(name: str) -> str:
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    def after(self, ordering: Sequence[str], position: Sequence) -> Q:
+        """ Condition for rows that come after `position`
+        with the specified ordering.
+        """
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+
+        # Redundant range on the leading column lets the database
+        # seek in the index instead of filtering from its beginning.
+        first = ordering[0]
+        lookup = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{lookup}": position[0]}) & (
+            condition
+        )
+
+    def get_field(self, name: str):
+        """ Return model field or output field of an annotation.
+        """
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def encode(self, obj, backwards: bool) -> str:
+        values = []
+        for name in self.ordering:
+            name = name.lstrip("-")
+            if name in self.queryset.query.annotations:
+                values.append(str(getattr(obj, name)))
+            else:
+                field = self.get_field(name)
+                values.append(field.value_to_string(obj))
+        payload = json.dumps({"v": values, "b": int(backwards)})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return cursor.rstrip("=")
+
+    def decode(self, cursor: Optional[str]) -> Tuple[Optional[list], bool]:
+        if not cursor:
+            return None, False
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw_values = payload["v"]
+            backwards = bool(payload["b"])
+        except (
+            binascii.Error,
+            KeyError,
+            TypeError,
+            UnicodeDecodeError,
+            ValueError,
+        ):
+            raise InvalidCursor(cursor)
+
+        if not isinstance(raw_values, list):
+            raise InvalidCursor(cursor)
+        if len(raw_values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+
+        values = []
+        for name, raw in zip(self.ordering, raw_values):
+            field = self.get_field(name.lstrip("-"))
+            try:
+                values.append(field.to_python(raw))
+            except (TypeError, ValidationError, ValueError):
+                raise InvalidCursor(cursor)
+
+        return values, backwards
+
+
+class KeysetPaginationMixin:
+    """ Keyset pagination for `ListView` based views.
+    The current position is passed in the `cursor` query parameter.
+    """
+
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(
+            queryset, self.get_ordering() or queryset.query.order_by, page_size
+        )
+
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,165 @@
+""" Rendering of the content of posts to HTML.
+
+Content is written in Markdown (code blocks are highlighted with
+Pygments) and rendered once, when a post is saved: the sanitized HTML
+is stored in `content_html` along with `content_renderer`, the name
+and the version of the renderer that made it. Bump `VERSION` when
+the output changes and run `manage.py render_content` to re-render
+the posts rendered before.
+
+Markdown needs `Markdown` and `bleach` packages, without them content
+is rendered as escaped text split into paragraphs.
+"""
+from concurrent.futures import Executor
+from typing import Dict, List, Tuple
+
+from django.db import router, transaction
+from django.db.models import F
+from django.utils.html import linebreaks
+
+from .utils import chunks
+
+try:
+    import bleach
+    import markdown
+except ImportError:
+    bleach = markdown = None
+
+
+VERSION = 1
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "codehilite", "sane_lists"]
+MARKDOWN_EXTENSION_CONFIGS = {
+    "codehilite": {"css_class": "highlight", "guess_lang": False}
+}
+
+# What is left of the HTML made by Markdown, raw HTML of the content
+# is escaped except for these tags
+ALLOWED_TAGS = [
+    "a",
+    "blockquote",
+    "br",
+    "code",
+    "div",
+    "em",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "span",
+    "strong",
+    "ul",
+]
+ALLOWED_ATTRIBUTES = {
+    "a": ["href", "title"],
+    # Highlighted code
+    "div": ["class"],
+    "span": ["class"],
+}
+ALLOWED_PROTOCOLS = ["http", "https", "mailto"]
+
+
+def render_markdown(content: str) -> str:
+    html = markdown.markdown(
+        content,
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+    )
+    html = bleach.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+    )
+    # Links get `rel="nofollow"`
+    return bleach.linkify(html, skip_tags=["code", "pre"])
+
+
+def render_text(content: str) -> str:
+    return linebreaks(content, autoescape=True)
+
+
+if markdown is not None and bleach is not None:
+    render = render_markdown
+    RENDERER = f"markdown:{VERSION}"
+else:
+    render = render_text
+    RENDERER = f"text:{VERSION}"
+
+
+def render_batch(posts: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """ Render content of `(pk, content)` pairs, it's run in worker
+    processes of `manage.py render_content`.
+    """
+    return [(pk, render(content)) for pk, content in posts]
+
+
+def rerender(
+    model,
+    executor: Executor,
+    processes: int,
+    batch_size: int,
+    everything: bool = False,
+) -> Tuple[int, int]:
+    """ Re-render content of posts of `model` rendered by another
+    renderer (or all of them) in batches rendered by worker processes
+    of `executor`. Returns numbers of re-rendered and skipped posts,
+    a post changed meanwhile is skipped (its save has rendered it).
+    """
+    queryset = model.objects.order_by("pk")
+    if not everything:
+        queryset = queryset.exclude(content_renderer=RENDERER)
+
+    # Enough rows to keep all the workers busy
+    window = batch_size * processes
+    rendered = skipped = last_pk = 0
+    while True:
+        rows = queryset.filter(pk__gt=last_pk).values_list("pk", "content")
+        rows = list(rows[:window])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        contents = dict(rows)
+        batches = chunks(rows, batch_size)
+        for batch in executor.map(render_batch, batches):
+            saved = save_rendered(model, batch, contents)
+            rendered += saved
+            skipped += len(batch) - saved
+
+    return rendered, skipped
+
+
+def save_rendered(
+    model, batch: List[Tuple[int, str]], contents: Dict[int, str]
+) -> int:
+    """ Save HTML of posts which content is still the rendered one.
+    """
+    from . import pagecache
+    from .models import Question
+    from .pagecache import page_cache
+
+    saved = []
+    with transaction.atomic(using=router.db_for_write(model)):
+        for pk, html in batch:
+            updated = model.objects.filter(pk=pk, content=contents[pk]).update(
+                content_html=html,
+                content_renderer=RENDERER,
+                version=F("version") + 1,
+            )
+            if updated:
+                saved.append(pk)
+
+    post_key = (
+        pagecache.question_key if model is Question else pagecache.answer_key
+    )
+    if saved:
+        page_cache.purge(*(post_key(pk) for pk in saved))
+    return len(saved)
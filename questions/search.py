@@ -0,0 +1,237 @@
+import logging
+import re
+
+from functools import reduce
+from typing import Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+FTS_TABLE = "questions_question_fts"
+MAX_TERMS = 10
+
+
+def split_terms(query: str) -> List[str]:
+    """ Split search query into terms.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    return list(dict.fromkeys(terms))[:MAX_TERMS]
+
+
+class BaseSearchBackend:
+    """ Full-text search of questions.
+
+    `search` filters a query set of questions and annotates it with
+    `relevance` (the higher the better), `index` / `remove` keep
+    the search index in sync with the question table.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def search(self, queryset, query: str):
+        raise NotImplementedError
+
+    def nothing(self, queryset):
+        return queryset.annotate(
+            relevance=Value(0, output_field=FloatField())
+        ).none()
+
+    def index(self, question) -> None:
+        pass
+
+    def remove(self, question_id: int) -> None:
+        pass
+
+    def rebuild(self) -> int:
+        """ Rebuild the whole index, returns number of indexed questions.
+        """
+        return 0
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """ Database independent fallback. Every term has to be found
+    in the title or the content, a term found in the title
+    weighs more. It needs no index, but scans the whole table.
+    """
+
+    def search(self, queryset, query: str):
+        terms = split_terms(query)
+        if not terms:
+            return self.nothing(queryset)
+
+        relevance = []
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(content__icontains=term)
+            )
+            relevance.append(
+                Case(
+                    When(title__icontains=term, then=Value(2)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+
+        relevance = reduce(lambda a, b: a + b, relevance)
+        return queryset.annotate(
+            relevance=Cast(relevance, output_field=FloatField())
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """ SQLite FTS5 backend. Questions are indexed in a separate
+    virtual table (`rowid` is the question id) that is updated
+    on question save / delete.
+    """
+
+    def match_query(self, terms: List[str]) -> str:
+        # Every term is quoted and used as a prefix
+        return " ".join(
+            '"{}"*'.format(term.replace('"', '""')) for term in terms
+        )
+
+    def search(self, queryset, query: str):
+        terms = split_terms(query)
+        if not terms:
+            return self.nothing(queryset)
+
+        match = self.match_query(terms)
+        qn = self.connection.ops.quote_name
+        pk = "{}.{}".format(
+            qn(queryset.model._meta.db_table),
+            qn(queryset.model._meta.pk.column),
+        )
+        # The index is joined (not queried in a subquery per row),
+        # so every match is ranked once.
+        queryset = queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {pk}", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+        )
+        relevance = RawSQL(f"-{FTS_TABLE}.rank", [], output_field=FloatField())
+        return queryset.annotate(relevance=relevance)
+
+    def index(self, question) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [question.pk]
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+                f"VALUES (%s, %s, %s)",
+                [question.pk, question.title, question.content],
+            )
+
+    def remove(self, question_id: int) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [question_id]
+            )
+
+    def rebuild(self) -> int:
+        from .models import Question
+
+        table = Question._meta.db_table
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+                f"SELECT id, title, content FROM {table}"
+            )
+            return cursor.rowcount
+
+
+class MySQLSearchBackend(BaseSearchBackend):
+    """ MySQL backend based on the FULLTEXT index on (title, content).
+    InnoDB maintains the index itself.
+
+    Every term is required, but InnoDB doesn't index stopwords and
+    words shorter than `innodb_ft_min_token_size`, a required one
+    would match nothing. Such terms are left out.
+    """
+
+    def search(self, queryset, query: str):
+        against = self.against(split_terms(query))
+        if not against:
+            return self.nothing(queryset)
+
+        relevance = RawSQL(
+            "MATCH (title, content) AGAINST (%s IN BOOLEAN MODE)",
+            [against],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(relevance=relevance).filter(relevance__gt=0)
+
+    def against(self, terms: List[str]) -> str:
+        """ Boolean mode query of the indexed `terms`.
+        """
+        return " ".join(
+            f"+{term}*"
+            for term in terms
+            if len(term) >= self.min_token_size
+            and term not in self.stopwords
+        )
+
+    @cached_property
+    def min_token_size(self) -> int:
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT @@innodb_ft_min_token_size")
+            return int(cursor.fetchone()[0])
+
+    @cached_property
+    def stopwords(self) -> Set[str]:
+        """ Stopwords of the server's table or the default ones.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT @@innodb_ft_server_stopword_table")
+            table = cursor.fetchone()[0]
+            if table:
+                quote = self.connection.ops.quote_name
+                table = ".".join(quote(name) for name in table.split("/"))
+            else:
+                table = "INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD"
+            cursor.execute(f"SELECT value FROM {table}")
+            return {value.lower() for value, in cursor.fetchall()}
+
+
+_backends: Dict[str, BaseSearchBackend] = {}
+
+
+def has_fts_table(connection) -> bool:
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+def get_search_backend(using: Optional[str] = None) -> BaseSearchBackend:
+    """ Return search backend configured by `QUESTIONS_SEARCH_BACKEND`
+    or the best one available for the database.
+    """
+    from .models import Question
+
+    alias = using or router.db_for_read(Question)
+    if alias in _backends:
+        return _backends[alias]
+
+    connection = connections[alias]
+    backend_class = SimpleSearchBackend
+
+    if settings.QUESTIONS_SEARCH_BACKEND:
+        backend_class = import_string(settings.QUESTIONS_SEARCH_BACKEND)
+    elif connection.vendor == "mysql":
+        backend_class = MySQLSearchBackend
+    elif connection.vendor == "sqlite" and has_fts_table(connection):
+        backend_class = SQLiteSearchBackend
+
+    _backends[alias] = backend_class(connection)
+    logger.debug(f"{backend_class.__name__} is used for search ({alias})")
+    return _backends[alias]
@@ -1,21 +1,55 @@
 import logging
 
-from django.db.models import F, Sum
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
 
-from .models import Answer, AnswerVote, Question, QuestionVote
+from . import hotness, live, pagecache
+from .models import Answer, AnswerVote, Question, QuestionVote, Tag
+from .pagecache import page_cache
+from .search import get_search_backend
+from .trending import trending_cache
+from .votes import post_voted
 
 
 logger = logging.getLogger(__name__)
 
 
+def update_trending(question_id: int) -> None:
+    transaction.on_commit(lambda: trending_cache.update(question_id))
+
+
+def purge_pages(*keys: str) -> None:
+    """ Purge cached pages with the surrogate keys now and once more
+    after commit: pages rendered from the data read before the commit
+    may be cached meanwhile.
+    """
+    page_cache.purge(*keys)
+    transaction.on_commit(lambda: page_cache.purge(*keys))
+
+
+def post_key(model, pk: int) -> str:
+    if model in (Question, QuestionVote):
+        return pagecache.question_key(pk)
+    return pagecache.answer_key(pk)
+
+
 def answer_created(sender, instance, created, raw, *args, **kwargs):
-    """ Update `number_of_answers` of `Question` model.
+    """ Update `number_of_answers` / `hotness` of `Question` model.
     """
     if created and not raw:
         Question.objects.filter(pk=instance.question.pk).update(
-            number_of_answers=(F("number_of_answers") + 1)
+            number_of_answers=(F("number_of_answers") + 1),
+            hotness=hotness.increment(hotness.ANSWER_WEIGHT),
+            version=(F("version") + 1),
         )
+        update_trending(instance.question.pk)
         logger.debug(
             f"Number of answers has been increased "
             f"for {instance.question.pk}"
@@ -23,11 +57,17 @@ def answer_created(sender, instance, created, raw, *args, **kwargs):
 
 
 def answer_deleted(sender, instance, *args, **kwargs):
-    """ Update `number_of_answers` of `Question` model.
+    """ Update `number_of_answers` / `hotness` of `Question` model.
     """
     Question.objects.filter(pk=instance.question.pk).update(
-        number_of_answers=(F("number_of_answers") - 1)
+        number_of_answers=(F("number_of_answers") - 1),
+        # Subtracted as it was added, at the time of the answer
+        hotness=hotness.increment(
+            -hotness.ANSWER_WEIGHT, instance.posted.timestamp()
+        ),
+        version=(F("version") + 1),
     )
+    update_trending(instance.question.pk)
     logger.debug(
         f"Number of answers has been decreased "
         f"for {instance.question.pk}. Answer has been deleted"
@@ -36,7 +76,9 @@ def answer_deleted(sender, instance, *args, **kwargs):
 
 def vote_created(sender, instance, created, raw, *args, **kwargs):
     """ Update `rating` of `Answer` / `Question` model after
-    a `Vote` instance creation.
+    a `Vote` instance creation. Votes made with `AbstractPost.vote`
+    bypass the ORM and update counters by themselves, so this handler
+    covers only votes saved directly (e.g. via admin).
     """
     post_model = type(instance.to)
     qs = post_model.objects.filter(pk=instance.to.pk)
@@ -44,11 +86,17 @@ def vote_created(sender, instance, created, raw, *args, **kwargs):
     if raw:
         return None
 
+    purge_pages(post_key(sender, instance.to.pk))
     if created:
-        qs.update(
+        changes = dict(
             rating=(F("rating") + instance.value),
             number_of_votes=(F("number_of_votes") + 1),
+            version=(F("version") + 1),
         )
+        if sender is QuestionVote:
+            changes["hotness"] = hotness.increment(hotness.VOTE_WEIGHT)
+            update_trending(instance.to.pk)
+        qs.update(**changes)
         logger.debug(
             f"Number of votes / rating have been changed "
             f"for {post_model} ({instance.pk})"
@@ -59,7 +107,7 @@ def vote_created(sender, instance, created, raw, *args, **kwargs):
         new_rating = query["value__sum"]
 
         if new_rating is not None:
-            qs.update(rating=new_rating)
+            qs.update(rating=new_rating, version=(F("version") + 1))
             logger.debug(
                 f"Rating has been changed for {post_model} ({instance.pk})"
             )
@@ -71,20 +119,242 @@ def vote_deleted(sender, instance, *args, **kwargs):
     """
     post_model = type(instance.to)
     qs = post_model.objects.filter(pk=instance.to.pk)
-    qs.update(
+    changes = dict(
         rating=(F("rating") - instance.value),
         number_of_votes=(F("number_of_votes") - 1),
+        version=(F("version") + 1),
     )
+    if sender is QuestionVote:
+        # Subtracted as it was added, at the time of the vote
+        changes["hotness"] = hotness.increment(
+            -hotness.VOTE_WEIGHT, instance.timestamp.timestamp()
+        )
+        update_trending(instance.to.pk)
+    qs.update(**changes)
+    purge_pages(post_key(sender, instance.to.pk))
     logger.debug(
         f"Rating has been changed for {post_model} ({instance.pk}). "
         f"Vote has been deleted"
     )
 
 
+def question_voted(
+    sender, post_id, votes_delta, removed_timestamp, *args, **kwargs
+):
+    """ Update `hotness` and cached trending questions after a vote
+    made with the vote engine. It's one more `UPDATE` of the question
+    in the transaction of the vote.
+
+    A removed (or changed) vote is subtracted with the contribution
+    it was added with, i.e. at its own time.
+    """
+    score = F("hotness")
+    added = votes_delta
+    if removed_timestamp is not None:
+        score -= hotness.decayed(
+            hotness.VOTE_WEIGHT, removed_timestamp.timestamp()
+        )
+        added += 1
+    if added:
+        score += hotness.decayed(added * hotness.VOTE_WEIGHT)
+
+    Question.objects.filter(pk=post_id).update(hotness=score)
+    update_trending(post_id)
+
+
+def post_voted_pages(sender, post_id, *args, **kwargs):
+    """ Purge cached pages showing rating of a voted post.
+    """
+    purge_pages(post_key(sender, post_id))
+
+
+def post_voted_live(
+    sender, post, post_id, rating, number_of_votes, *args, **kwargs
+):
+    """ Push new rating of a voted post to readers of its question.
+    """
+    question_id = post_id if sender is Question else post.question_id
+    live.publish(
+        question_id,
+        live.RATING,
+        {
+            "kind": "questions" if sender is Question else "answers",
+            "id": post_id,
+            "rating": rating,
+            "number_of_votes": number_of_votes,
+        },
+    )
+
+
+def answers_changed_live(sender, instance, raw=False, *args, **kwargs):
+    """ Push new number of answers to readers of the question.
+    """
+    if raw or kwargs.get("created") is False:
+        return None
+
+    question_id = instance.question_id
+
+    def publish():
+        number_of_answers = (
+            Question.objects.filter(pk=question_id)
+            .values_list("number_of_answers", flat=True)
+            .first()
+        )
+        if number_of_answers is not None:
+            live.send(
+                question_id,
+                live.ANSWERS,
+                {"number_of_answers": number_of_answers},
+            )
+
+    transaction.on_commit(publish)
+
+
+def question_changed(sender, instance, raw=False, *args, **kwargs):
+    """ Set initial `hotness` of a new question and drop cached
+    trending questions if the question may affect them.
+    """
+    if raw:
+        return None
+
+    if kwargs.get("created"):
+        hotness.add(instance.pk, hotness.QUESTION_WEIGHT)
+
+    question_id = instance.pk
+    transaction.on_commit(lambda: trending_cache.discard(question_id))
+
+
+def question_saved_pages(sender, instance, created, raw, *args, **kwargs):
+    """ Purge cached pages showing a saved question, new ones
+    appear in the lists.
+    """
+    if raw:
+        return None
+
+    keys = [pagecache.question_key(instance.pk)]
+    if created:
+        keys += [pagecache.LATEST, pagecache.POPULAR]
+    purge_pages(*keys)
+
+
+def question_deleted_pages(sender, instance, *args, **kwargs):
+    purge_pages(
+        pagecache.question_key(instance.pk),
+        pagecache.LATEST,
+        pagecache.POPULAR,
+    )
+
+
+def answer_changed_pages(sender, instance, raw=False, *args, **kwargs):
+    """ Purge cached pages showing an answer or the number of answers
+    of its question (accepting an answer changes the others too).
+    """
+    if raw:
+        return None
+
+    purge_pages(
+        pagecache.answer_key(instance.pk),
+        pagecache.question_key(instance.question_id),
+    )
+
+
+def question_saved_search(sender, instance, *args, **kwargs):
+    """ Update search index of a saved question.
+    """
+    get_search_backend().index(instance)
+
+
+def question_deleted_search(sender, instance, *args, **kwargs):
+    """ Remove a deleted question from search index.
+    """
+    get_search_backend().remove(instance.pk)
+
+
+def question_tags_changed(
+    sender, instance, action, reverse, pk_set, *args, **kwargs
+):
+    """ Update `number_of_questions` of tags added to / removed
+    from a question. Changes made from the tag side (e.g. admin)
+    are rare, the counter is recomputed then.
+    """
+    if reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            questions = (
+                sender.objects.filter(tag=OuterRef("pk"))
+                .order_by()
+                .values("tag")
+                .annotate(count=Count("pk"))
+                .values("count")
+            )
+            Tag.objects.filter(pk=instance.pk).update(
+                number_of_questions=Coalesce(Subquery(questions), 0)
+            )
+            purge_pages(
+                pagecache.tag_key(instance.name),
+                *(pagecache.question_key(pk) for pk in pk_set or ()),
+            )
+        return None
+
+    # Tags have to be counted before links are deleted,
+    # `pk_set` of "remove" may contain tags the question doesn't have.
+    if action == "post_add" and pk_set:
+        tags = Tag.objects.filter(pk__in=pk_set)
+        tags.update(number_of_questions=F("number_of_questions") + 1)
+        tags_changed_pages(instance, tags)
+    elif action == "pre_remove" and pk_set:
+        tags = Tag.objects.filter(pk__in=pk_set, question=instance)
+        tags_changed_pages(instance, tags)
+        tags.update(number_of_questions=F("number_of_questions") - 1)
+    elif action == "pre_clear":
+        question_deleted_tags(sender=Question, instance=instance)
+    else:
+        return None
+
+    logger.debug(f"Tag counters have been updated for {instance.pk}")
+
+
+def question_deleted_tags(sender, instance, *args, **kwargs):
+    """ Update `number_of_questions` of tags of a deleted question
+    (its links are deleted without `m2m_changed`).
+    """
+    tags = Tag.objects.filter(question=instance)
+    tags_changed_pages(instance, tags)
+    tags.update(number_of_questions=F("number_of_questions") - 1)
+
+
+def tags_changed_pages(question, tags) -> None:
+    """ Purge cached pages of tags added to / removed from
+    a question and the pages showing the question.
+    """
+    names = tags.values_list("name", flat=True)
+    purge_pages(
+        pagecache.question_key(question.pk),
+        *(pagecache.tag_key(name) for name in names),
+    )
+
+
 post_save.connect(vote_created, sender=AnswerVote)
 post_save.connect(vote_created, sender=QuestionVote)
 post_delete.connect(vote_deleted, sender=AnswerVote)
 post_delete.connect(vote_deleted, sender=QuestionVote)
 
+post_voted.connect(question_voted, sender=Question)
+post_voted.connect(post_voted_pages, sender=Question)
+post_voted.connect(post_voted_pages, sender=Answer)
+post_voted.connect(post_voted_live, sender=Question)
+post_voted.connect(post_voted_live, sender=Answer)
+post_save.connect(question_saved_pages, sender=Question)
+post_delete.connect(question_deleted_pages, sender=Question)
+post_save.connect(question_changed, sender=Question)
+post_delete.connect(question_changed, sender=Question)
+post_save.connect(question_saved_search, sender=Question)
+post_delete.connect(question_deleted_search, sender=Question)
+pre_delete.connect(question_deleted_tags, sender=Question)
+m2m_changed.connect(question_tags_changed, sender=Question.tags.through)
+
 post_save.connect(answer_created, sender=Answer)
 post_delete.connect(answer_deleted, sender=Answer)
+post_save.connect(answer_changed_pages, sender=Answer)
+post_delete.connect(answer_changed_pages, sender=Answer)
+post_save.connect(answers_changed_live, sender=Answer)
+post_delete.connect(answers_changed_live, sender=Answer)
@@ -0,0 +1,74 @@
+""" Directory of tags sorted by popularity or by name.
+
+Pages are selected with keyset pagination over indexed columns
+(`Tag.number_of_questions` is a counter maintained by signals),
+so any page costs O(page) whatever the number of tags is.
+Counters change with every new question, so cached pages are not
+invalidated, they just expire shortly.
+"""
+import hashlib
+import logging
+
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .pagination import KeysetPage, KeysetPaginator
+
+
+logger = logging.getLogger(__name__)
+
+
+PAGE_KEY = "questions:tags:{sort}:{per_page}:{cursor}"
+
+SORTS = {
+    "popular": ("-number_of_questions", "name"),
+    "name": ("name",),
+}
+DEFAULT_SORT = "popular"
+
+
+class TagDirectory:
+    """ Pages of the tag directory kept in a shared cache.
+    """
+
+    def __init__(self, ttl: int, cache_alias: str = "default"):
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def page(
+        self, sort: str, cursor: Optional[str], per_page: int
+    ) -> KeysetPage:
+        """ Return a page of tags. Unknown `sort` falls back
+        to the default one, an invalid cursor raises `InvalidCursor`.
+        """
+        if sort not in SORTS:
+            sort = DEFAULT_SORT
+
+        # Cursors are long and client controlled, keys must be short
+        digest = hashlib.md5((cursor or "").encode()).hexdigest()
+        key = PAGE_KEY.format(sort=sort, per_page=per_page, cursor=digest)
+
+        page = self.cache.get(key)
+        if page is None:
+            page = self.load(sort, cursor, per_page)
+            self.cache.set(key, page, self.ttl)
+            logger.debug(f"Page of tags ({sort}) has been cached")
+        return page
+
+    def load(
+        self, sort: str, cursor: Optional[str], per_page: int
+    ) -> KeysetPage:
+        from .models import Tag
+
+        queryset = Tag.objects.only("name", "number_of_questions")
+        paginator = KeysetPaginator(queryset, SORTS[sort], per_page)
+        return paginator.page(cursor)
+
+
+tag_directory = TagDirectory(ttl=settings.QUESTIONS_TAGS_CACHE_TTL)
@@ -0,0 +1,40 @@
+from django import template
+
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, post):
+        self.nodelist = nodelist
+        self.post = post
+
+    def render(self, context):
+        fragments = context.get("fragments")
+        if fragments is None:
+            return self.nodelist.render(context)
+
+        post = self.post.resolve(context)
+        html = fragments.get(post)
+        if html is None:
+            html = self.nodelist.render(context)
+            fragments.add(post, html)
+        return html
+
+
+@register.tag
+def fragment(parser, token):
+    """ Render the content of the tag from the `fragments` of the page
+    (see `questions.fragments`), e.g.:
+
+        {% fragment question %}...{% endfragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires exactly one argument."
+        )
+
+    nodelist = parser.parse(("endfragment",))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]))
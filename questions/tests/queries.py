@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """ Test case mixin enforcing query budgets of endpoints.
+
+    A budget is the maximum number of queries an endpoint may execute.
+    Budgets are declared per endpoint in `query_budgets`, so a change
+    that adds queries fails until the budget is raised explicitly.
+    Lists are checked to execute the same number of queries however
+    many rows they show (no N+1).
+    """
+
+    query_budgets: Dict[str, int] = {}
+
+    def setUp(self):
+        super().setUp()
+        # Cached data (e.g. trending questions) must not leak
+        # between tests, it changes the number of queries.
+        for cache in caches.all():
+            cache.clear()
+
+        # Budgets are of the views, not of the pages cached for them
+        page_cache = override_settings(QUESTIONS_PAGE_CACHE_ENABLED=False)
+        page_cache.enable()
+        self.addCleanup(page_cache.disable)
+
+    @contextmanager
+    def assertMaxQueries(self, budget: int, using: str = DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context)
+        if executed > budget:
+            queries = "\n".join(
+                f"{n}. {query['sql']}"
+                for n, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f"{executed} queries executed, the budget is {budget}:\n"
+                f"{queries}"
+            )
+
+    def assertQueryBudget(
+        self,
+        endpoint: str,
+        request: Callable,
+        grow: Optional[Callable] = None,
+    ) -> None:
+        """ Assert `request` (e.g. `lambda: self.client.get(url)`) stays
+        within the budget of `endpoint`. If `grow` is given, it's
+        called to add rows shown by the endpoint and `request` has
+        to execute the same number of queries again.
+
+        `request` is called before it's measured to warm caches up,
+        so it must not change data.
+        """
+        budget = self.query_budgets[endpoint]
+        executed = self.count_queries(budget, request)
+
+        if grow is not None:
+            grow()
+            self.assertEqual(
+                self.count_queries(budget, request),
+                executed,
+                f"Queries of {endpoint} depend on the number of rows.",
+            )
+
+    def count_queries(self, budget: int, request: Callable) -> int:
+        request()
+        with self.assertMaxQueries(budget) as context:
+            response = request()
+        self.assertLess(response.status_code, 400)
+        return len(context)
@@ -0,0 +1,116 @@
+import random
+
+from unittest import mock
+
+from django.test import TestCase
+
+from questions.completion import PrefixIndex, TagCompleter
+from questions.models import Tag
+
+from .fixtures import CreateDataMixin
+
+
+def make_items(rng, count):
+    letters = "abc"
+    names = {
+        "".join(rng.choice(letters) for _ in range(rng.randint(1, 6)))
+        for _ in range(count)
+    }
+    return [(name, rng.randint(0, 20)) for name in sorted(names)]
+
+
+def expected(weights, prefix, limit):
+    names = [name for name in weights if name.startswith(prefix)]
+    names.sort(key=lambda name: (-weights[name], name))
+    return names[:limit]
+
+
+class TestPrefixIndex(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.prefixes = ["", "a", "b", "ab", "abc", "cc", "cab", "x"]
+
+    def assertCompletes(self, index, weights):
+        for prefix in self.prefixes:
+            for limit in (1, 5):
+                self.assertEqual(
+                    index.complete(prefix, limit),
+                    expected(weights, prefix, limit),
+                    f"prefix: {prefix!r}, limit: {limit}",
+                )
+
+    def test_complete(self):
+        items = make_items(self.rng, 300)
+        index = PrefixIndex(items, size=5, threshold=8)
+
+        self.assertIn("", index.top)
+        self.assertIn("a", index.top)
+        self.assertCompletes(index, dict(items))
+
+    def test_add(self):
+        items = make_items(self.rng, 300)
+        index = PrefixIndex(items[::2], size=5, threshold=8)
+        weights = dict(items[::2])
+
+        for name, weight in items[1::2]:
+            index.add(name, weight)
+            weights[name] = weight
+        self.assertCompletes(index, weights)
+
+        # Changed weights
+        for name, _ in items[::3]:
+            weights[name] = self.rng.randint(0, 20)
+            index.add(name, weights[name])
+        self.assertCompletes(index, weights)
+
+    def test_limit(self):
+        index = PrefixIndex([("a", 1), ("ab", 2)], size=1)
+        self.assertEqual(index.complete("a", 10), ["ab"])
+
+
+class TestTagCompleter(CreateDataMixin, TestCase):
+    def setUp(self):
+        self.completer = TagCompleter(
+            refresh_interval=0, rebuild_interval=60, size=10
+        )
+        # The index is built in the test's thread (and transaction)
+        self.completer.start_thread = lambda target: target()
+        self.create_question().add_tags(["python", "django"], self.user)
+        self.create_question().add_tags(["python"], self.user)
+        Tag.objects.create(name="pytest")
+
+    def test_complete(self):
+        self.assertEqual(
+            self.completer.complete("Py", 10), [("python", 2), ("pytest", 0)]
+        )
+        self.assertEqual(self.completer.complete("d", 10), [("django", 1)])
+        self.assertEqual(self.completer.complete("x", 10), [])
+
+    def test_refresh(self):
+        self.completer.complete("py", 10)
+
+        self.create_question().add_tags(["pyramid"], self.user)
+        # Only new tags are loaded
+        with self.assertNumQueries(1):
+            completions = self.completer.complete("py", 10)
+
+        self.assertEqual(
+            completions, [("python", 2), ("pyramid", 1), ("pytest", 0)]
+        )
+
+    def test_index_not_ready(self):
+        self.completer.start_thread = mock.Mock()
+
+        with self.assertNumQueries(1):
+            completions = self.completer.complete("Py", 10)
+        self.assertEqual(completions, [("python", 2), ("pytest", 0)])
+        self.completer.complete("py", 1)
+
+        # The index is built once in background
+        self.completer.start_thread.assert_called_once_with(
+            self.completer.rebuild
+        )
+        self.completer.rebuild()
+        with self.assertNumQueries(1):
+            completions = self.completer.complete("py", 1)
+        self.assertEqual(completions, [("python", 2)])
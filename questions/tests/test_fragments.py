@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from questions.fragments import fragment_cache
+from questions.models import Answer, Question
+
+from .fixtures import CreateDataMixin, TEST_USER, TEST_PASSWORD
+
+
+@override_settings(QUESTIONS_PAGE_CACHE_ENABLED=False)
+class TestFragmentCache(CreateDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username=TEST_USER, password=TEST_PASSWORD)
+        self.questions = [self.create_question() for _ in range(3)]
+        self.questions[0].add_tags(["python"], self.user)
+
+    def version(self, post):
+        return type(post).objects.values_list("version", flat=True).get(
+            pk=post.pk
+        )
+
+    def page(self):
+        return Question.objects.select_related("author").prefetch_related(
+            "tags"
+        )
+
+    def test_version_bumps(self):
+        question = self.questions[0]
+        answer = Answer.objects.create(
+            author=self.user, question=question, content="Answer"
+        )
+        self.assertEqual(self.version(question), 1)
+
+        question.vote(self.create_user(), 1)
+        self.assertEqual(self.version(question), 2)
+
+        question.title = "Changed"
+        question.save()
+        self.assertEqual(question.version, 3)
+
+        answer.mark()
+        self.assertEqual(self.version(answer), 1)
+        Answer.objects.get(pk=answer.pk).unmark()
+        self.assertEqual(self.version(answer), 2)
+
+    def test_page_fetched_at_once(self):
+        self.client.get(reverse("index"))
+
+        batch = fragment_cache.batch("question", self.page())
+        self.assertEqual(len(batch.found), Question.objects.count())
+
+        # Cached fragments are served as they are
+        question = self.questions[1]
+        cache.set(batch.keys[question.pk], "<p>cached</p>")
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, "<p>cached</p>")
+
+    def test_changes_invalidate(self):
+        question = self.questions[0]
+        self.client.get(reverse("index"))
+        keys = fragment_cache.batch("question", self.page()).keys
+
+        question.vote(self.create_user(), 1)
+        self.questions[1].add_tags(["django"], self.user)
+        batch = fragment_cache.batch("question", self.page())
+
+        self.assertNotEqual(batch.keys[question.pk], keys[question.pk])
+        self.assertIsNone(batch.get(question))
+        self.assertIsNone(batch.get(self.questions[1]))
+        self.assertIsNotNone(batch.get(self.questions[2]))
+
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, "1 votes")
+        self.assertContains(response, reverse("tag", kwargs={"tag": "django"}))
+
+    def test_answers_shared_by_users(self):
+        url = reverse(
+            "question_detail", kwargs={"question_id": self.question.pk}
+        )
+        self.client.get(url)
+
+        client = Client()
+        client.force_login(self.create_user())
+        response = client.get(url)
+
+        answers = response.context["object_list"]
+        batch = fragment_cache.batch("answer", answers)
+        self.assertEqual(len(batch.found), len(answers))
+        # Accept controls are shown to the author by `main.js`
+        self.assertContains(
+            response,
+            reverse("answer_mark", kwargs={"answer_id": self.answer_1.pk}),
+        )
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+from django.test import TestCase
+
+from questions import hotness, pagecache
+from questions.models import Answer, OutgoingEmail, Question, Tag
+
+from .fixtures import CreateDataMixin
+
+
+class TestGenerateData(CreateDataMixin, TestCase):
+    def generate(self, **options):
+        out = StringIO()
+        options = {"tags": 10, **options}
+        call_command(
+            "generate_data",
+            users=30,
+            questions=50,
+            hot=0.1,
+            seed=1,
+            chunk_size=20,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_counters(self):
+        self.generate()
+
+        self.assertEqual(Question.objects.count(), 51)
+        self.assertFalse(
+            Question.objects.annotate(count=Count("votes")).exclude(
+                number_of_votes=F("count")
+            )
+        )
+        self.assertFalse(
+            Question.objects.annotate(count=Count("answer")).exclude(
+                number_of_answers=F("count")
+            )
+        )
+        for model in (Question, Answer):
+            self.assertFalse(
+                model.objects.annotate(
+                    total=Coalesce(Sum("votes__value"), 0)
+                ).exclude(rating=F("total"))
+            )
+        self.assertFalse(
+            Tag.objects.annotate(count=Count("question")).exclude(
+                number_of_questions=F("count")
+            )
+        )
+        self.assertEqual(
+            set(
+                Question.objects.filter(
+                    accepted_answer__isnull=False
+                ).values_list("accepted_answer", flat=True)
+            ),
+            set(
+                Answer.objects.filter(is_accepted=True).values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_hotness(self):
+        self.generate()
+        scores = dict(Question.objects.values_list("pk", "hotness"))
+
+        hotness.rebuild()
+        for pk, score in Question.objects.values_list("pk", "hotness"):
+            self.assertAlmostEqual(scores[pk], score, delta=score * 1e-6)
+
+    def test_new_posts(self):
+        self.generate()
+        last_pk = Answer.objects.order_by("pk").last().pk
+
+        # Posts are generated with explicit ids
+        answer = self.create_answer(self.create_question())
+        self.assertGreater(answer.pk, last_pk)
+
+    def test_tag_pages_purged(self):
+        # More tags than fit in a chunk
+        self.generate(tags=45)
+
+        names = Tag.objects.filter(question__isnull=False).values_list(
+            "name", flat=True
+        )
+        self.assertGreater(len(set(names)), 20)
+        for name in set(names):
+            key = pagecache.PURGE_KEY.format(
+                digest=pagecache.digest(pagecache.tag_key(name))
+            )
+            self.assertIsNotNone(cache.get(key), name)
@@ -0,0 +1,130 @@
+import time
+
+from datetime import timedelta
+from itertools import product
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from questions import hotness
+from questions.models import (
+    VOTE_DOWN,
+    VOTE_UP,
+    Answer,
+    HotnessEpoch,
+    Question,
+    QuestionVote,
+)
+from questions.votes import SQLiteVoteEngine
+
+from .fixtures import CreateDataMixin
+
+
+class TestHotness(CreateDataMixin, TestCase):
+    def hotness_of(self, question):
+        question.refresh_from_db(fields=["hotness"])
+        return question.hotness
+
+    def test_new_question(self):
+        question = self.create_question()
+        self.assertGreater(self.hotness_of(question), 0)
+
+    def test_events(self):
+        question = self.create_question()
+        initial = self.hotness_of(question)
+
+        question.vote(self.create_user(), VOTE_DOWN)
+        after_vote = self.hotness_of(question)
+        self.assertGreater(after_vote, initial)
+
+        self.create_answer(question=question)
+        after_answer = self.hotness_of(question)
+        self.assertGreater(after_answer - after_vote, after_vote - initial)
+
+        question.vote(self.user, VOTE_UP)
+        question.retract_vote(self.user)
+        self.assertAlmostEqual(self.hotness_of(question), after_answer, 3)
+
+    def test_answer_deleted(self):
+        question = self.create_question()
+        initial = self.hotness_of(question)
+
+        answer = self.create_answer(question=question)
+        Answer.objects.filter(pk=answer.pk).update(
+            posted=timezone.now() - timedelta(seconds=hotness.half_life())
+        )
+        hotness.rebuild()
+        answer.refresh_from_db()
+        answer.delete()
+
+        self.assertAlmostEqual(self.hotness_of(question), initial, 3)
+
+    def test_renormalize(self):
+        questions = [self.create_question() for _ in range(3)]
+        questions[1].vote(self.user, VOTE_UP)
+        HotnessEpoch.objects.update(timestamp=time.time() - 10 * 24 * 3600)
+        hotness.rebuild()
+
+        before = list(Question.trending(10))
+        factor = hotness.renormalize()
+        after = list(Question.trending(10))
+
+        self.assertLess(factor, 1)
+        self.assertEqual(before, after)
+        for old, new in zip(before, after):
+            self.assertAlmostEqual(old.hotness * factor, new.hotness)
+
+    def test_rebuild(self):
+        question = self.create_question()
+        question.vote(self.user, VOTE_UP)
+        self.create_answer(question=question)
+        incremental = self.hotness_of(question)
+
+        Question.objects.update(hotness=0)
+        updated = hotness.rebuild(chunk_size=2)
+        self.assertEqual(updated, Question.objects.count())
+        self.assertAlmostEqual(self.hotness_of(question), incremental, 3)
+
+    def test_aged_vote_removed(self):
+        question = self.create_question()
+        user = self.create_user()
+        removals = {
+            "retract": lambda: question.retract_vote(user),
+            "toggle": lambda: question.vote(user, VOTE_DOWN),
+            "change": lambda: question.change_vote(user, VOTE_DOWN),
+            "delete": lambda: QuestionVote.objects.get(user=user).delete(),
+        }
+
+        for (name, remove), returning in product(
+            removals.items(), (True, False)
+        ):
+            # Without `RETURNING` the vote is read before it's deleted
+            with self.subTest(name, returning=returning), mock.patch.object(
+                SQLiteVoteEngine, "has_update_returning", returning
+            ):
+                question.add_vote(user, VOTE_UP)
+                QuestionVote.objects.filter(user=user).update(
+                    timestamp=timezone.now()
+                    - timedelta(seconds=hotness.half_life())
+                )
+                hotness.rebuild()
+                remove()
+                removed = self.hotness_of(question)
+
+                hotness.rebuild()
+                self.assertAlmostEqual(removed, self.hotness_of(question), 3)
+                QuestionVote.objects.filter(user=user).delete()
+
+    def test_hot_view(self):
+        question = self.create_question()
+        for _ in range(3):
+            self.create_answer(question=question)
+
+        response = Client().get(reverse("hot"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["object_list"][0], question)
+
+        response = Client().get(reverse("api_questions"), {"sort": "hot"})
+        self.assertEqual(response.json()["results"][0]["id"], question.pk)
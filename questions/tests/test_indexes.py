@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test import TestCase
+
+from questions import tags, views
+from questions.models import Answer, Question, QuestionVote, Tag
+from questions.pagination import KeysetPaginator
+
+from .fixtures import CreateDataMixin
+
+
+class TestListIndexes(CreateDataMixin, TestCase):
+    """ Every list ordering has to be served by an index scan
+    instead of sorting the whole table.
+    """
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+
+        if connection.vendor == "sqlite":
+            self.assertIn(index_name, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+        elif connection.vendor == "mysql":
+            self.assertIn(index_name, plan)
+            self.assertNotIn("Using filesort", plan)
+        else:
+            self.skipTest(f"No plan checks for {connection.vendor}")
+
+    def test_questions_latest(self):
+        qs = Question.objects.order_by(*views.Questions.ordering)
+        self.assertUsesIndex(qs[:20], "question_posted_idx")
+
+    def test_questions_popular(self):
+        qs = Question.objects.order_by(*views.QuestionsPopular.ordering)
+        self.assertUsesIndex(qs[:20], "question_rating_idx")
+
+    def test_questions_hot(self):
+        qs = Question.objects.order_by(*views.QuestionsHot.ordering)
+        self.assertUsesIndex(qs[:20], "question_hot_idx")
+
+    def test_questions_trending(self):
+        self.assertUsesIndex(Question.trending(10), "question_hot_idx")
+
+    def test_tags_popular(self):
+        ordering = KeysetPaginator.make_total(
+            Tag.objects.all(), tags.SORTS["popular"]
+        )
+        qs = Tag.objects.order_by(*ordering)
+        self.assertUsesIndex(qs[:20], "tag_popular_idx")
+
+    def test_question_answers(self):
+        qs = Answer.objects.filter(question=self.question)
+        qs = qs.order_by(*views.QuestionDetail.ordering)
+        self.assertUsesIndex(qs[:30], "answer_question_order_idx")
+
+    def test_question_votes(self):
+        qs = QuestionVote.objects.filter(to=self.question)
+        self.assertUsesIndex(qs[:10], "questionvote_to_time_idx")
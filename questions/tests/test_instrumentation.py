@@ -0,0 +1,77 @@
+import re
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from questions import instrumentation
+
+from .fixtures import CreateDataMixin
+
+
+class TestInstrumentation(CreateDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def timing(self, response):
+        return {
+            name: params
+            for name, params in re.findall(
+                r"(\w+);([^,]*(?:\"[^\"]*\")?)", response["Server-Timing"]
+            )
+        }
+
+    def test_server_timing(self):
+        url = reverse("question_detail", args=(self.question.pk,))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        timing = self.timing(response)
+        self.assertEqual(set(timing), {"db", "cache", "view", "total"})
+        self.assertIn(f'desc="{len(context)} queries"', timing["db"])
+
+    @override_settings(QUESTIONS_PAGE_CACHE_ENABLED=True)
+    def test_cache(self):
+        self.client.get(reverse("index"))
+        response = self.client.get(reverse("index"))
+
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertIn('desc="0 queries"', self.timing(response)["db"])
+        hits = re.search(r"(\d+) hits", self.timing(response)["cache"])
+        self.assertGreater(int(hits.group(1)), 0)
+
+    def test_log(self):
+        with self.assertLogs("questions.instrumentation", "INFO") as logs:
+            self.client.get(reverse("api_questions"))
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("view=api_questions status=200", logs.output[0])
+        self.assertEqual(logs.records[0].metrics["status"], 200)
+
+    @override_settings(INSTRUMENTATION_SLOW_REQUEST_MS=0)
+    def test_slow_request(self):
+        url = reverse("question_detail", args=(self.question.pk,))
+        with self.assertLogs("questions.instrumentation", "WARNING") as logs:
+            self.client.get(url)
+
+        self.assertIn(f"Slow request GET {url}", logs.output[0])
+        self.assertIn("questions/views.py:", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    @override_settings(INSTRUMENTATION_SLOW_REQUEST_MS=10 ** 6)
+    def test_fast_request_not_attributed(self):
+        url = reverse("question_detail", args=(self.question.pk,))
+        with mock.patch.object(instrumentation, "caller") as caller:
+            self.client.get(url)
+        caller.assert_not_called()
+
+    def test_caller(self):
+        self.assertRegex(
+            instrumentation.caller(),
+            r"^questions/tests/test_instrumentation.py:\d+ in test_caller",
+        )
@@ -0,0 +1,194 @@
+import json
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    Client,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from questions import live
+from questions.models import Answer, Question
+
+
+class TestLocalBroker(SimpleTestCase):
+    def setUp(self):
+        self.broker = live.LocalBroker()
+
+    def test_publish(self):
+        subscription = self.broker.subscribe("a")
+        other = self.broker.subscribe("b")
+
+        self.broker.publish("a", live.Message("rating", {"id": 1}))
+        self.assertEqual(
+            subscription.get(timeout=0), live.Message("rating", {"id": 1})
+        )
+        self.assertIsNone(subscription.get(timeout=0))
+        self.assertIsNone(other.get(timeout=0))
+
+        subscription.close()
+        other.close()
+        self.assertEqual(self.broker.subscribers("a"), 0)
+        self.assertEqual(self.broker.channels, {})
+
+    def test_slow_reader(self):
+        subscription = self.broker.subscribe("a")
+        for n in range(150):
+            self.broker.publish("a", live.Message("rating", {"id": n}))
+
+        self.assertEqual(subscription.get(timeout=0).data, {"id": 50})
+
+    def test_stream(self):
+        subscription = self.broker.subscribe("a")
+        stream = live.EventStream(
+            subscription,
+            [live.Message("answers", {"number_of_answers": 1})],
+            keepalive=0,
+            duration=60,
+        )
+        events = iter(stream)
+
+        self.assertEqual(
+            next(events), 'event: answers\ndata: {"number_of_answers": 1}\n\n'
+        )
+        self.assertEqual(next(events), live.KEEPALIVE)
+        self.broker.publish("a", live.Message("rating", {"id": 1}))
+        self.assertEqual(next(events), 'event: rating\ndata: {"id": 1}\n\n')
+
+        stream.close()
+        self.assertEqual(self.broker.subscribers("a"), 0)
+
+    def test_stream_closed_unread(self):
+        stream = live.EventStream(self.broker.subscribe("a"))
+        stream.close()
+        self.assertEqual(self.broker.subscribers("a"), 0)
+
+    def test_stream_duration(self):
+        stream = live.EventStream(self.broker.subscribe("a"), duration=0)
+        self.assertEqual(list(stream), [])
+        self.assertEqual(self.broker.subscribers("a"), 0)
+
+
+# Messages are published after commit
+@override_settings(
+    QUESTIONS_LIVE_BROKER="questions.live.FakeBroker",
+    QUESTIONS_PAGE_CACHE_ENABLED=False,
+)
+class TestLiveUpdates(TransactionTestCase):
+    # Keep rows created by migrations (e.g. the epoch of hotness)
+    serialized_rollback = True
+
+    def setUp(self):
+        self.broker = live.get_broker()
+        self.broker.reset()
+
+        user_model = get_user_model()
+        self.user = user_model.objects.create(
+            username="author", email="author@mail.fake"
+        )
+        self.voter = user_model.objects.create(
+            username="voter", email="voter@mail.fake"
+        )
+        self.question = Question.objects.create(
+            author=self.user, title="Title", content="Content"
+        )
+        self.answer = Answer.objects.create(
+            author=self.user, question=self.question, content="Answer"
+        )
+        self.channel = live.channel(self.question.pk)
+        self.broker.reset()
+
+    def test_votes(self):
+        self.question.vote(self.voter, 1)
+        self.answer.vote(self.voter, -1)
+
+        self.assertEqual(
+            self.broker.messages(self.channel),
+            [
+                live.Message(
+                    live.RATING,
+                    {
+                        "kind": "questions",
+                        "id": self.question.pk,
+                        "rating": 1,
+                        "number_of_votes": 1,
+                    },
+                ),
+                live.Message(
+                    live.RATING,
+                    {
+                        "kind": "answers",
+                        "id": self.answer.pk,
+                        "rating": -1,
+                        "number_of_votes": 1,
+                    },
+                ),
+            ],
+        )
+
+    def test_answers(self):
+        answer = Answer.objects.create(
+            author=self.voter, question=self.question, content="Answer"
+        )
+        answer.content = "Changed"
+        answer.save()
+        self.answer.delete()
+
+        self.assertEqual(
+            self.broker.messages(self.channel),
+            [
+                live.Message(live.ANSWERS, {"number_of_answers": 2}),
+                live.Message(live.ANSWERS, {"number_of_answers": 1}),
+            ],
+        )
+
+    def test_events(self):
+        url = reverse(
+            "question_events", kwargs={"question_id": self.question.pk}
+        )
+        # The connection isn't held by the stream (closing is a no-op
+        # for the in-memory test database)
+        with mock.patch.object(connection, "close") as close:
+            response = Client().get(url)
+        close.assert_called_once_with()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        events = iter(response.streaming_content)
+        self.assertEqual(
+            self.parse(next(events)),
+            (
+                live.RATING,
+                {
+                    "kind": "questions",
+                    "id": self.question.pk,
+                    "rating": 0,
+                    "number_of_votes": 0,
+                },
+            ),
+        )
+        self.assertEqual(
+            self.parse(next(events)), (live.ANSWERS, {"number_of_answers": 1})
+        )
+
+        self.answer.vote(self.voter, 1)
+        event, data = self.parse(next(events))
+        self.assertEqual(event, live.RATING)
+        self.assertEqual((data["id"], data["rating"]), (self.answer.pk, 1))
+
+        response.close()
+        self.assertEqual(self.broker.subscribers(self.channel), 0)
+
+    def test_events_not_found(self):
+        url = reverse("question_events", kwargs={"question_id": 0})
+        self.assertEqual(Client().get(url).status_code, 404)
+        self.assertEqual(self.broker.subscribers(live.channel(0)), 0)
+
+    def parse(self, chunk):
+        event, data = chunk.decode().strip().split("\n")
+        return event[len("event: "):], json.loads(data[len("data: "):])
@@ -1,4 +1,8 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from questions.votes import get_vote_engine, post_voted
 
 from questions.models import (
     VOTE_UP,
@@ -7,6 +11,7 @@ from questions.models import (
     AnswerVote,
     Question,
     QuestionVote,
+    Tag,
 )
 
 from .fixtures import CreateDataMixin
@@ -34,6 +39,28 @@ class TestAnswer(CreateDataMixin, TestCase):
         self.assertFalse(self.answer_1.is_accepted)
         self.assertFalse(self.answer_2.is_accepted)
 
+    def test_accepted_answer(self):
+        question = self.create_question()
+        answers = [self.create_answer(question) for _ in range(5)]
+
+        answers[0].mark()
+        # Writes don't depend on the number of answers
+        with self.assertNumQueries(4):
+            answers[1].mark()
+        question.refresh_from_db()
+        self.assertEqual(question.accepted_answer, answers[1])
+        self.assertEqual(
+            list(question.answers.filter(is_accepted=True)), [answers[1]]
+        )
+
+        answers[0].unmark()
+        question.refresh_from_db()
+        self.assertEqual(question.accepted_answer, answers[1])
+
+        answers[1].delete()
+        question.refresh_from_db()
+        self.assertIsNone(question.accepted_answer)
+
 
 class TestAnswerVote(CreateDataMixin, TestCase):
     def test_answer_vote(self):
@@ -151,7 +178,13 @@ class TestQuestion(CreateDataMixin, TestCase):
         questions[0].vote(users[2], VOTE_DOWN)
         questions[0].vote(users[3], VOTE_DOWN)
 
-        trending_questions = list(Question.trending(3))
+        # Activity of the other questions doesn't matter here
+        ids = {question.pk for question in questions}
+        trending_questions = [
+            question
+            for question in Question.trending(10)
+            if question.pk in ids
+        ]
         self.assertEqual(3, len(trending_questions))
         self.assertEqual(questions[1].pk, trending_questions[0].pk)
         self.assertEqual(questions[0].pk, trending_questions[1].pk)
@@ -172,6 +205,52 @@ class TestQuestion(CreateDataMixin, TestCase):
             set(raw_tags), set(question.tags.values_list("name", flat=True))
         )
 
+    def test_add_tags_existing(self):
+        Tag.objects.create(name="python")
+        question = self.create_question()
+
+        # Resolve, select existing links, link, update tag counters,
+        # select names of the tags to purge their cached pages
+        with self.assertNumQueries(5):
+            question.add_tags(["Python"], self.user)
+
+        # The same plus create missing, resolve created
+        with self.assertNumQueries(7):
+            question.add_tags([" PYTHON", "django", "orm"], self.user)
+
+        self.assertEqual(
+            {"python", "django", "orm"},
+            set(question.tags.values_list("name", flat=True)),
+        )
+        self.assertEqual(Tag.objects.count(), 3)
+        self.assertEqual(Tag.objects.get(name="orm").added_by, self.user)
+
+    @override_settings(QUESTIONS_EXCERPT_LEN=20)
+    def test_excerpt(self):
+        question = Question.objects.create(
+            author=self.user, title="Title", content="Short\n\n content"
+        )
+        self.assertEqual(question.excerpt, "Short content")
+
+        question.content = "A long content of the question"
+        question.save(update_fields=["content"])
+        question.refresh_from_db()
+        self.assertEqual(question.excerpt, "A long content of…")
+
+        # Saving a question of a list doesn't touch its content
+        question = Question.objects.defer("content").get(pk=question.pk)
+        question.title = "Changed"
+        with CaptureQueriesContext(connection) as context:
+            question.save()
+        self.assertNotIn('"content" =', context.captured_queries[0]["sql"])
+        question.refresh_from_db()
+        self.assertEqual(question.excerpt, "A long content of…")
+
+    def test_tag_name_normalized(self):
+        tag = Tag.objects.create(name=" Straße ")
+        self.assertEqual(tag.name, "strasse")
+        self.assertEqual(Tag.normalize("STRASSE"), tag.name)
+
     def test_number_of_votes_signals(self):
         question = self.create_question()
         number_of_votes = self.question.number_of_votes
@@ -270,3 +349,68 @@ class TestQuestionVote(CreateDataMixin, TestCase):
         vote.save(update_fields=["value"])
         self.question.refresh_from_db()
         self.assertEqual(self.question.rating, rating + 1)
+
+
+class TestVoteEngine(CreateDataMixin, TestCase):
+    def test_vote_queries(self):
+        answer = self.create_answer()
+        engine = get_vote_engine(Answer)
+
+        # Insert (delete attempt, insert, update with readback)
+        with self.assertNumQueries(3):
+            result = engine.vote(answer, self.user.pk, VOTE_UP)
+        self.assertEqual(result.rating, 1)
+        self.assertEqual(result.number_of_votes, 1)
+        self.assertTrue(result.changed)
+        self.assertEqual(answer.rating, 1)
+
+        # Same vote is a no-op
+        result = engine.vote(answer, self.user.pk, VOTE_UP)
+        self.assertEqual(result.rating, 1)
+        self.assertFalse(result.changed)
+
+        # Opposite vote deletes the existing one
+        result = engine.vote(answer, self.user.pk, VOTE_DOWN)
+        self.assertEqual(result.rating, 0)
+        self.assertEqual(result.number_of_votes, 0)
+        self.assertFalse(AnswerVote.objects.filter(to=answer).exists())
+
+    def test_change_and_retract(self):
+        answer = self.create_answer()
+        voter = self.create_user()
+
+        self.assertEqual(answer.vote(voter, VOTE_UP), 1)
+        self.assertEqual(answer.change_vote(voter, VOTE_DOWN), -1)
+        self.assertEqual(answer.change_vote(voter, VOTE_DOWN), -1)
+        self.assertEqual(
+            AnswerVote.objects.get(to=answer, user=voter).value, VOTE_DOWN
+        )
+
+        self.assertEqual(answer.retract_vote(voter), 0)
+        self.assertEqual(answer.retract_vote(voter), 0)
+
+        answer.refresh_from_db()
+        self.assertEqual(answer.rating, 0)
+        self.assertEqual(answer.number_of_votes, 0)
+
+    def test_missing_post(self):
+        question = self.create_question()
+        Question.objects.filter(pk=question.pk).delete()
+
+        with self.assertRaises(Question.DoesNotExist):
+            get_vote_engine(Question).retract(question, self.user.pk)
+
+    def test_post_voted_signal(self):
+        received = []
+
+        def receiver(sender, post_id, rating, number_of_votes, **kwargs):
+            received.append((sender, post_id, rating, number_of_votes))
+
+        post_voted.connect(receiver)
+        try:
+            self.question.vote(self.user, VOTE_DOWN)
+            self.question.vote(self.user, VOTE_DOWN)
+        finally:
+            post_voted.disconnect(receiver)
+
+        self.assertEqual(received, [(Question, self.question.pk, -1, 1)])
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from questions import outbox
+from questions.models import OutgoingEmail
+
+from .fixtures import CreateDataMixin, TEST_USER, TEST_PASSWORD
+
+
+class TestOutbox(CreateDataMixin, TestCase):
+    def queue(self, count):
+        return [
+            outbox.enqueue(
+                f"user{i}@mail.fake", f"Subject {i}", html_message="<b>Hi</b>"
+            )
+            for i in range(count)
+        ]
+
+    def test_answer_queues_email(self):
+        client = Client()
+        client.login(username=TEST_USER, password=TEST_PASSWORD)
+        client.post(
+            reverse(
+                "question_detail", kwargs={"question_id": self.question.pk}
+            ),
+            data={"content": "New answer"},
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, self.question.author.email)
+        self.assertIn(str(self.question.pk), email.html_message)
+
+    def test_send_batch(self):
+        self.queue(3)
+
+        with mock.patch(
+            "questions.outbox.get_connection", wraps=get_connection
+        ) as connection:
+            self.assertEqual(outbox.send_batch(2), (2, 0))
+            self.assertEqual(outbox.send_batch(2), (1, 0))
+            self.assertEqual(outbox.send_batch(2), (0, 0))
+
+        self.assertEqual(connection.call_count, 2)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ["user0@mail.fake"])
+        self.assertEqual(
+            mail.outbox[0].alternatives, [("<b>Hi</b>", "text/html")]
+        )
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_retry_with_backoff(self):
+        failing, ok = self.queue(2)
+        original_send = mail.EmailMultiAlternatives.send
+
+        def send(message, *args, **kwargs):
+            if message.to == [failing.to]:
+                raise ConnectionError("Boom")
+            return original_send(message, *args, **kwargs)
+
+        with mock.patch.object(mail.EmailMultiAlternatives, "send", send):
+            self.assertEqual(outbox.send_batch(), (1, 1))
+
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 1)
+        self.assertIn("Boom", failing.last_error)
+        self.assertGreater(failing.next_attempt, timezone.now())
+        self.assertFalse(OutgoingEmail.objects.filter(pk=ok.pk).exists())
+
+        # Not due yet
+        self.assertEqual(outbox.send_batch(), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(outbox.send_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_connection_failure(self):
+        self.queue(2)
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open",
+            side_effect=OSError("Connection refused"),
+        ):
+            self.assertEqual(outbox.send_batch(), (0, 2))
+
+        self.assertEqual(
+            list(OutgoingEmail.objects.values_list("attempts", flat=True)),
+            [1, 1],
+        )
+
+    @override_settings(
+        EMAIL_OUTBOX_RETRY_DELAY=10,
+        EMAIL_OUTBOX_MAX_RETRY_DELAY=60,
+        EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    )
+    def test_max_attempts(self):
+        self.assertEqual(
+            [outbox.retry_delay(n).seconds for n in range(1, 6)],
+            [10, 20, 40, 60, 60],
+        )
+
+        email, = self.queue(1)
+        OutgoingEmail.objects.filter(pk=email.pk).update(attempts=3)
+        self.assertEqual(outbox.send_batch(), (0, 0))
+
+    def test_claimed_emails_are_skipped(self):
+        self.queue(2)
+        claimed = outbox.claim(1)
+
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(
+            [email.pk for email in outbox.claim(10)],
+            list(
+                OutgoingEmail.objects.exclude(pk=claimed[0].pk).values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+        self.assertGreater(
+            OutgoingEmail.objects.get(pk=claimed[0].pk).next_attempt,
+            timezone.now() + timedelta(seconds=1),
+        )
+
+    def test_command(self):
+        self.queue(3)
+        out = StringIO()
+        call_command("send_emails", "--once", "--batch-size=2", stdout=out)
+
+        self.assertIn("Total sent: 3, failed: 0", out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
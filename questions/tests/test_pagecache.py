@@ -0,0 +1,128 @@
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from questions import pagecache
+from questions.models import Answer
+from questions.pagecache import page_cache
+
+from .fixtures import CreateDataMixin, TEST_USER, TEST_PASSWORD
+
+
+class TestPageCache(CreateDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.question = self.create_question()
+        self.question.add_tags(["python"], self.user)
+        self.other = self.create_question()
+        self.other.add_tags(["django"], self.user)
+
+    def url(self, question):
+        return reverse("question_detail", kwargs={"question_id": question.pk})
+
+    def assertCached(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], pagecache.HIT, url)
+
+    def assertNotCached(self, url):
+        response = self.client.get(url)
+        self.assertNotEqual(response.get("X-Page-Cache"), pagecache.HIT, url)
+
+    def warm(self, *urls):
+        for url in urls:
+            self.client.get(url)
+            self.assertCached(url)
+
+    def test_hit(self):
+        url = reverse("index")
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], pagecache.MISS)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], pagecache.HIT)
+        self.assertContains(response, self.question.title)
+        self.assertEqual(page_cache.stats("index"), {"hit": 1, "miss": 1})
+
+    def test_same_for_users(self):
+        content = self.client.get(reverse("index")).content
+
+        self.client.login(username=TEST_USER, password=TEST_PASSWORD)
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response["X-Page-Cache"], pagecache.HIT)
+        self.assertEqual(response.content, content)
+
+        # Pages don't touch the session, so shared caches can keep them
+        self.client.logout()
+        response = self.client.get(reverse("popular"))
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertFalse(response.cookies)
+
+    def test_question_vote(self):
+        url = self.url(self.question)
+        other_url = self.url(self.other)
+        self.warm(url, other_url, reverse("popular"))
+
+        self.question.vote(self.create_user(), 1)
+
+        self.assertNotCached(url)
+        self.assertNotCached(reverse("popular"))
+        self.assertCached(other_url)
+
+    def test_answer(self):
+        url = self.url(self.question)
+        self.warm(url, self.url(self.other), reverse("index"))
+
+        answer = Answer.objects.create(
+            author=self.user, question=self.question, content="Answer"
+        )
+        self.assertNotCached(url)
+        self.assertNotCached(reverse("index"))
+        self.assertCached(self.url(self.other))
+
+        # Votes for answers aren't shown in the lists
+        self.warm(url, reverse("index"))
+        answer.vote(self.create_user(), 1)
+        self.assertNotCached(url)
+        self.assertCached(reverse("index"))
+
+    def test_new_question(self):
+        python = reverse("tag", kwargs={"tag": "python"})
+        django = reverse("tag", kwargs={"tag": "django"})
+        self.warm(reverse("index"), python, django, self.url(self.other))
+
+        question = self.create_question()
+        self.assertNotCached(reverse("index"))
+        self.assertCached(python)
+
+        question.add_tags(["Python"], self.user)
+        self.assertNotCached(python)
+        self.assertCached(django)
+        self.assertCached(self.url(self.other))
+
+    def test_stale_while_rendered(self):
+        request = RequestFactory().get("/page")
+        keys = [pagecache.question_key(self.question.pk)]
+        created = time.time()
+
+        # Changed after the data of the page has been read
+        page_cache.purge(*keys)
+        page_cache.set(request, HttpResponse("page"), keys, created)
+        self.assertIsNone(page_cache.get(request, "page"))
+
+        page_cache.set(request, HttpResponse("page"), keys, time.time())
+        self.assertIsNotNone(page_cache.get(request, "page"))
+
+    def test_disabled(self):
+        with override_settings(QUESTIONS_PAGE_CACHE_DISABLED=["index"]):
+            self.client.get(reverse("index"))
+            response = self.client.get(reverse("index"))
+            self.assertNotIn("X-Page-Cache", response)
+            self.warm(reverse("latest"))
+
+        response = self.client.get(reverse("hot"))
+        self.assertNotIn("X-Page-Cache", response)
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from questions import views
+from questions.models import Question
+from questions.pagination import InvalidCursor, KeysetPaginator
+
+from .fixtures import CreateDataMixin
+
+
+class TestKeysetPaginator(CreateDataMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.questions = [cls.create_question() for _ in range(7)]
+
+        # Ties on `rating` have to be resolved by `posted` / `pk`
+        for rating, question in zip([3, 1, 3, 0, 1, 3, 2], cls.questions):
+            Question.objects.filter(pk=question.pk).update(rating=rating)
+
+    def walk(self, ordering, per_page):
+        paginator = KeysetPaginator(Question.objects.all(), ordering, per_page)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def test_forward(self):
+        ordering = ("-rating", "-posted")
+        expected = list(Question.objects.order_by(*ordering, "-pk"))
+
+        _, pages = self.walk(ordering, per_page=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual([obj for page in pages for obj in page], expected)
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[1].has_previous())
+
+    def test_backward(self):
+        paginator, pages = self.walk(("-posted", "-pk"), per_page=3)
+
+        previous = paginator.page(pages[2].previous_cursor)
+        self.assertEqual(previous.object_list, pages[1].object_list)
+
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual(first.object_list, pages[0].object_list)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+    def test_no_count_query(self):
+        paginator, pages = self.walk(("-rating", "-posted"), per_page=3)
+
+        with self.assertNumQueries(1):
+            paginator.page(pages[-1].previous_cursor)
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(Question.objects.all(), ("-posted",), 3)
+
+        for cursor in ("abc", "e30", "eyJ2IjogWzEsIDJdLCAiYiI6IDB9"):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    paginator.page(cursor)
+
+    @mock.patch.object(views.Questions, "paginate_by", 3)
+    def test_views(self):
+        client = Client()
+
+        for name in ("index", "popular"):
+            with self.subTest(name=name):
+                response = client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+                page = response.context["page_obj"]
+                response = client.get(
+                    reverse(name), data={"cursor": page.next_cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context["page_obj"].has_previous())
+
+                response = client.get(reverse(name), data={"cursor": "abc"})
+                self.assertEqual(response.status_code, 404)
+
+    @mock.patch.object(views.Questions, "paginate_by", 2)
+    def test_links(self):
+        for _ in range(5):
+            question = self.create_question()
+            question.title = "Two words & more"
+            question.save()
+        client = Client()
+        query = "two words"
+
+        response = client.get(reverse("search"), {"q": query})
+        page = response.context["page_obj"]
+        response = client.get(
+            reverse("search"), {"q": query, "cursor": page.next_cursor}
+        )
+
+        self.assertContains(response, 'href="?q=two%20words"')
+        self.assertContains(response, 'href="?q=two%20words&cursor=')
@@ -0,0 +1,126 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from questions.models import Tag
+
+from .fixtures import CreateDataMixin, TEST_USER, TEST_PASSWORD
+from .queries import QueryBudgetMixin
+
+
+class TestQueryBudgets(QueryBudgetMixin, CreateDataMixin, TestCase):
+    # Logged in requests take 2 more queries (session and user)
+    query_budgets = {
+        "index": 2,
+        "hot": 2,
+        "popular": 2,
+        "search": 2,
+        "tag": 2,
+        "question_detail": 3,
+        "question_detail_author": 5,
+        "answer_post": 8,
+        "ask": 2,
+        "vote_question": 7,
+        "vote_answer": 6,
+        "answer_mark": 8,
+        "tags": 0,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.tag = Tag.objects.create(name="budget")
+        self.question.title += " budget"
+        self.question.save()
+        self.question.tags.add(self.tag)
+
+    def login(self):
+        self.client.login(username=TEST_USER, password=TEST_PASSWORD)
+
+    def add_questions(self, count=5):
+        for _ in range(count):
+            question = self.create_question(self.create_user())
+            question.title += " budget"
+            question.save()
+            tag = Tag.objects.create(name=f"tag{question.pk}")
+            question.tags.add(self.tag, tag)
+
+    def add_answers(self, count=5):
+        for _ in range(count):
+            self.create_answer(self.question, self.create_user())
+
+    def test_question_lists(self):
+        for endpoint, data in [
+            ("index", {}),
+            ("hot", {}),
+            ("popular", {}),
+            ("search", {"q": "budget"}),
+        ]:
+            url = reverse(endpoint)
+            with self.subTest(endpoint=endpoint):
+                self.assertQueryBudget(
+                    endpoint,
+                    lambda: self.client.get(url, data),
+                    self.add_questions,
+                )
+
+    def test_tags(self):
+        # Pages of the tag directory are served from the cache
+        url = reverse("tags")
+        self.assertQueryBudget(
+            "tags", lambda: self.client.get(url), self.add_questions
+        )
+
+    def test_tag(self):
+        url = reverse("tag", kwargs={"tag": self.tag.name})
+        self.assertQueryBudget(
+            "tag", lambda: self.client.get(url), self.add_questions
+        )
+
+    def test_question_detail(self):
+        url = reverse(
+            "question_detail", kwargs={"question_id": self.question.pk}
+        )
+        self.assertQueryBudget(
+            "question_detail", lambda: self.client.get(url), self.add_answers
+        )
+
+        self.login()
+        self.assertQueryBudget(
+            "question_detail_author",
+            lambda: self.client.get(url),
+            self.add_answers,
+        )
+
+    def test_answer_post(self):
+        self.login()
+        url = reverse(
+            "question_detail", kwargs={"question_id": self.question.pk}
+        )
+        with self.assertMaxQueries(self.query_budgets["answer_post"]):
+            response = self.client.post(url, {"content": "Answer"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_ask(self):
+        self.login()
+        self.assertQueryBudget("ask", lambda: self.client.get(reverse("ask")))
+
+    def test_votes(self):
+        self.login()
+        for endpoint, target in [
+            ("vote_question", self.question),
+            ("vote_answer", self.answer_1),
+        ]:
+            with self.subTest(endpoint=endpoint):
+                with self.assertMaxQueries(self.query_budgets[endpoint]):
+                    response = self.client.post(
+                        reverse(endpoint),
+                        {"target_id": target.pk, "value": 1},
+                    )
+                self.assertEqual(response.status_code, 200)
+
+    def test_answer_mark(self):
+        self.login()
+        url = reverse("answer_mark", kwargs={"answer_id": self.answer_1.pk})
+        with self.assertMaxQueries(self.query_budgets["answer_mark"]):
+            response = self.client.post(url)
+        self.assertEqual(response.json(), {"accepted": True})
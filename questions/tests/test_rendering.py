@@ -0,0 +1,88 @@
+from io import StringIO
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from questions import rendering
+from questions.models import Answer, Question
+
+from .fixtures import CreateDataMixin
+
+
+@skipIf(rendering.markdown is None, "Markdown isn't installed")
+class TestMarkdown(SimpleTestCase):
+    def test_markdown(self):
+        html = rendering.render_markdown(
+            "Some *text* http://example.com\n\n"
+            "```python\nx = '<b>'\n```"
+        )
+        self.assertIn("<em>text</em>", html)
+        self.assertIn('rel="nofollow"', html)
+        self.assertIn('<div class="highlight">', html)
+        self.assertNotIn("<b>", html)
+
+    def test_sanitized(self):
+        html = rendering.render_markdown(
+            '<script>alert(1)</script> <a href="#" onclick="x">a</a> '
+            "[b](javascript:alert(1))"
+        )
+        self.assertNotIn("<script>", html)
+        self.assertNotIn("onclick", html)
+        self.assertNotIn("javascript", html)
+
+
+class TestText(SimpleTestCase):
+    def test_text(self):
+        self.assertEqual(
+            rendering.render_text("<b>a</b>\n\nb"),
+            "<p>&lt;b&gt;a&lt;/b&gt;</p>\n\n<p>b</p>",
+        )
+
+
+class TestRenderContent(CreateDataMixin, TestCase):
+    def test_rendered_on_save(self):
+        question = self.create_question()
+        self.assertEqual(
+            question.content_html, rendering.render(question.content)
+        )
+        self.assertEqual(question.content_renderer, rendering.RENDERER)
+
+        answer = self.create_answer(question)
+        answer.content = "Changed"
+        answer.save(update_fields=["content"])
+        answer.refresh_from_db()
+        self.assertEqual(answer.content_html, rendering.render("Changed"))
+
+    def test_command(self):
+        Question.objects.update(content_html="", content_renderer="old")
+        Answer.objects.filter(pk=self.answer_1.pk).update(
+            content_renderer="old"
+        )
+        version = Answer.objects.get(pk=self.answer_1.pk).version
+
+        out = StringIO()
+        call_command(
+            "render_content", processes=2, batch_size=1, stdout=out
+        )
+
+        self.assertFalse(
+            Question.objects.exclude(content_renderer=rendering.RENDERER)
+        )
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual(
+            question.content_html, rendering.render(question.content)
+        )
+        answer = Answer.objects.get(pk=self.answer_1.pk)
+        self.assertEqual(answer.version, version + 1)
+        self.assertIn("1 answers have been rendered", out.getvalue())
+
+    def test_changed_meanwhile(self):
+        rendered = [(self.answer_1.pk, "<p>Old</p>")]
+        saved = rendering.save_rendered(
+            Answer, rendered, {self.answer_1.pk: "Old"}
+        )
+
+        self.assertEqual(saved, 0)
+        answer = Answer.objects.get(pk=self.answer_1.pk)
+        self.assertEqual(answer.content_html, rendering.render(answer.content))
@@ -0,0 +1,123 @@
+from unittest import SkipTest
+
+from django.db import connection
+from django.test import TestCase
+
+from questions.models import Question
+from questions.pagination import KeysetPaginator
+from questions.search import (
+    MySQLSearchBackend,
+    SimpleSearchBackend,
+    SQLiteSearchBackend,
+    get_search_backend,
+    has_fts_table,
+    split_terms,
+)
+
+from .fixtures import CreateDataMixin
+
+
+class SearchBackendTestsMixin(CreateDataMixin):
+    backend_class = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.in_content = Question.objects.create(
+            author=cls.user, title="Cooking", content="How to boil an egg"
+        )
+        cls.in_title = Question.objects.create(
+            author=cls.user, title="Boiling eggs", content="Is it safe?"
+        )
+        cls.other = Question.objects.create(
+            author=cls.user, title="Frying", content="Which oil is better?"
+        )
+
+    def setUp(self):
+        self.backend = self.backend_class(connection)
+        self.backend.rebuild()
+
+    def search(self, query):
+        queryset = Question.objects.order_by("-relevance", "-pk")
+        return list(self.backend.search(queryset, query))
+
+    def test_relevance(self):
+        self.assertEqual(
+            self.search("boil egg"), [self.in_title, self.in_content]
+        )
+
+    def test_all_terms_required(self):
+        self.assertEqual(self.search("egg frying"), [])
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(" ?! "), [])
+
+    def test_paginate_by_relevance(self):
+        queryset = self.backend.search(Question.objects.all(), "boil")
+        paginator = KeysetPaginator(queryset, ["-relevance"], per_page=1)
+
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+
+        self.assertEqual(list(first), [self.in_title])
+        self.assertEqual(list(second), [self.in_content])
+        self.assertFalse(second.has_next())
+
+
+class TestSimpleSearchBackend(SearchBackendTestsMixin, TestCase):
+    backend_class = SimpleSearchBackend
+
+
+class TestSQLiteSearchBackend(SearchBackendTestsMixin, TestCase):
+    backend_class = SQLiteSearchBackend
+
+    @classmethod
+    def setUpClass(cls):
+        # The index is created only if SQLite is built with FTS5
+        if not has_fts_table(connection):
+            raise SkipTest("SQLite FTS5 index isn't available")
+        super().setUpClass()
+
+    def test_selected(self):
+        self.assertIsInstance(get_search_backend(), SQLiteSearchBackend)
+
+    def test_index_sync(self):
+        backend = get_search_backend()
+        queryset = Question.objects.all()
+
+        self.other.title = "Frying eggs"
+        self.other.save()
+        self.assertIn(self.other, backend.search(queryset, "egg"))
+
+        self.other.delete()
+        self.assertEqual(
+            set(backend.search(queryset, "egg")),
+            {self.in_title, self.in_content},
+        )
+
+    def test_special_characters(self):
+        self.assertEqual(self.search('"safe" OR NOT*'), [])
+        self.assertEqual(self.search('safe"'), [self.in_title])
+
+
+class TestSplitTerms(TestCase):
+    def test_split_terms(self):
+        self.assertEqual(split_terms("Boil, boil EGG!"), ["boil", "egg"])
+        self.assertEqual(len(split_terms(" ".join("abcdefghijklmn"))), 10)
+
+
+class TestMySQLSearchTerms(TestCase):
+    def setUp(self):
+        # Read from the server on first use otherwise
+        self.backend = MySQLSearchBackend(connection)
+        self.backend.min_token_size = 3
+        self.backend.stopwords = {"a", "the", "about", "is"}
+
+    def test_against(self):
+        terms = split_terms("What is the X of a Django form?")
+        self.assertEqual(self.backend.against(terms), "+what* +django* +form*")
+
+    def test_nothing_indexed(self):
+        queryset = self.backend.search(Question.objects.all(), "a x the")
+        with self.assertNumQueries(0):
+            self.assertEqual(list(queryset), [])
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from questions.models import Tag
+from questions.pagination import InvalidCursor
+from questions.tags import tag_directory
+
+from .fixtures import CreateDataMixin
+
+
+class TestTagCounters(CreateDataMixin, TestCase):
+    def counters(self):
+        return dict(Tag.objects.values_list("name", "number_of_questions"))
+
+    def test_add_tags(self):
+        first = self.create_question()
+        second = self.create_question()
+
+        first.add_tags(["a", "b"], self.user)
+        first.add_tags(["a", "c"], self.user)
+        second.add_tags(["a"], self.user)
+
+        self.assertEqual(self.counters(), {"a": 2, "b": 1, "c": 1})
+
+    def test_remove_and_clear(self):
+        first = self.create_question()
+        second = self.create_question()
+        first.add_tags(["a", "b"], self.user)
+        second.add_tags(["a", "c"], self.user)
+
+        # "c" is not a tag of the first question
+        first.tags.remove(*Tag.objects.filter(name__in=["b", "c"]))
+        self.assertEqual(self.counters(), {"a": 2, "b": 0, "c": 1})
+
+        second.tags.clear()
+        self.assertEqual(self.counters(), {"a": 1, "b": 0, "c": 0})
+
+    def test_question_deleted(self):
+        question = self.create_question()
+        question.add_tags(["a", "b"], self.user)
+
+        question.delete()
+        self.assertEqual(self.counters(), {"a": 0, "b": 0})
+
+    def test_changed_from_tag(self):
+        tag = Tag.objects.create(name="a")
+        first = self.create_question()
+        second = self.create_question()
+
+        tag.question_set.add(first, second)
+        self.assertEqual(self.counters(), {"a": 2})
+
+        tag.question_set.remove(first)
+        self.assertEqual(self.counters(), {"a": 1})
+
+
+class TestTagDirectory(CreateDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        for count, name in enumerate(["c", "a", "d", "b"]):
+            question = self.create_question()
+            Tag.objects.create(name=name)
+            for _ in range(count):
+                question = self.create_question()
+                question.add_tags([name], self.user)
+
+    def names(self, page):
+        return [tag.name for tag in page]
+
+    def test_sorts(self):
+        page = tag_directory.page("popular", None, 10)
+        self.assertEqual(self.names(page), ["b", "d", "a", "c"])
+
+        page = tag_directory.page("name", None, 10)
+        self.assertEqual(self.names(page), ["a", "b", "c", "d"])
+
+        page = tag_directory.page("unknown", None, 10)
+        self.assertEqual(self.names(page), ["b", "d", "a", "c"])
+
+    def test_pages_are_cached(self):
+        first = tag_directory.page("name", None, 3)
+        second = tag_directory.page("name", first.next_cursor, 3)
+        self.assertEqual(self.names(second), ["d"])
+
+        Tag.objects.create(name="e")
+        with self.assertNumQueries(0):
+            page = tag_directory.page("name", first.next_cursor, 3)
+        self.assertEqual(self.names(page), ["d"])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            tag_directory.page("name", "invalid", 3)
+
+    def test_view(self):
+        response = self.client.get(reverse("tags"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["sort"], "popular")
+        self.assertEqual(
+            self.names(response.context["object_list"]), ["b", "d", "a", "c"]
+        )
+
+        response = self.client.get(reverse("tags"), {"sort": "name"})
+        self.assertEqual(
+            self.names(response.context["object_list"]), ["a", "b", "c", "d"]
+        )
+        self.assertContains(response, reverse("tag", kwargs={"tag": "a"}))
+
+        response = self.client.get(reverse("tags"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from questions import trending
+from questions.models import Question
+from questions.trending import TrendingCache
+
+from .fixtures import CreateDataMixin
+
+
+class TestTrendingCache(CreateDataMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.questions = [cls.create_question() for _ in range(6)]
+
+    def setUp(self):
+        cache.clear()
+        self.trending = TrendingCache(count=2, ttl=60)
+
+    def set_hotness(self, question, value):
+        Question.objects.filter(pk=question.pk).update(hotness=value)
+
+    def assertMatchesDatabase(self):
+        expected = [(q.pk, q.hotness) for q in Question.trending(2)]
+        with self.assertNumQueries(0):
+            actual = [(q.pk, q.hotness) for q in self.trending.get()]
+        self.assertEqual(actual, expected)
+
+    def test_get_cached(self):
+        with self.assertNumQueries(1):
+            self.trending.get()
+        self.assertMatchesDatabase()
+
+    def test_update_in_list(self):
+        question = self.trending.get()[1]
+
+        self.set_hotness(question, 100)
+        self.trending.update(question.pk)
+        self.assertMatchesDatabase()
+
+    def test_update_out_of_list(self):
+        self.trending.get()
+        question = self.questions[-1]
+
+        self.set_hotness(question, 100)
+        self.trending.update(question.pk)
+        self.assertMatchesDatabase()
+
+        self.set_hotness(question, 101)
+        self.trending.update(question.pk)
+        self.assertMatchesDatabase()
+
+    def test_decrease_to_tail(self):
+        for n, question in enumerate(self.questions):
+            self.set_hotness(question, n + 10)
+        self.trending.get()
+
+        question = self.questions[-1]
+        self.set_hotness(question, 0)
+        self.trending.update(question.pk)
+
+        with self.assertNumQueries(1):
+            self.trending.get()
+        self.assertMatchesDatabase()
+
+    def test_concurrent_update(self):
+        self.trending.get()
+        first, second = self.questions[-2:]
+        load_question = self.trending.load_question
+
+        def load_meanwhile_updated(question_id):
+            # Queried without the lock, another process updates
+            # the list meanwhile.
+            self.assertIsNone(cache.get(trending.LOCK_KEY))
+            self.set_hotness(second, 101)
+            TrendingCache(count=2, ttl=60).update(second.pk)
+            return load_question(question_id)
+
+        self.set_hotness(first, 100)
+        with mock.patch.object(
+            self.trending, "load_question", load_meanwhile_updated
+        ):
+            self.trending.update(first.pk)
+
+        self.assertMatchesDatabase()
+        self.assertEqual(
+            [q.pk for q in self.trending.get()], [second.pk, first.pk]
+        )
+
+    def test_discard(self):
+        question = self.trending.get()[0]
+        Question.objects.filter(pk=question.pk).delete()
+
+        self.trending.discard(question.pk)
+        with self.assertNumQueries(1):
+            self.trending.get()
+        self.assertMatchesDatabase()
+
+
+class TestTrendingViews(CreateDataMixin, TestCase):
+    @override_settings(QUESTIONS_PAGE_CACHE_ENABLED=False)
+    def test_query_count_drop(self):
+        cache.clear()
+        client = Client()
+        url = reverse("index")
+
+        with CaptureQueriesContext(connection) as cold:
+            client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            client.get(url)
+
+        self.assertEqual(len(warm), len(cold) - 1)
@@ -1,7 +1,10 @@
 from hashlib import md5
 from os import urandom
 
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from questions.models import Answer, AnswerVote, Question, QuestionVote
@@ -93,6 +96,49 @@ class TestQuestionDetail(CreateDataMixin, TestCase):
         answer = Answer.objects.get(content=unique)
         self.assertEqual(self.question, answer.question)
 
+    @override_settings(QUESTIONS_PAGE_CACHE_ENABLED=False)
+    def test_accepted_answer_first(self):
+        question = self.create_question()
+        answers = [self.create_answer(question) for _ in range(3)]
+        answers[0].vote(self.create_user(), 1)
+        answers[2].mark()
+
+        url = reverse("question_detail", kwargs={"question_id": question.pk})
+        response = Client().get(url)
+
+        self.assertEqual(response.context["accepted_answer"], answers[2])
+        self.assertEqual(
+            list(response.context["object_list"]), [answers[0], answers[1]]
+        )
+        content = response.content.decode()
+        self.assertLess(
+            content.index(answers[2].content),
+            content.index(answers[0].content),
+        )
+
+
+@override_settings(QUESTIONS_PAGE_CACHE_ENABLED=False)
+class TestQuestions(CreateDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_excerpt(self):
+        question = self.create_question()
+        question.content = "Long content " * 100
+        question.save()
+
+        with CaptureQueriesContext(connection) as context:
+            response = Client().get(reverse("index"))
+
+        self.assertContains(response, question.excerpt)
+        self.assertNotContains(response, question.content)
+        self.assertFalse(
+            any(
+                '"questions_question"."content"' in query["sql"]
+                for query in context.captured_queries
+            )
+        )
+
 
 class TestQuestionSearch(CreateDataMixin, TestCase):
     def test_empty_query(self):
@@ -291,3 +337,82 @@ class TestAnswerMark(CreateDataMixin, TestCase):
 
         self.answer_1.refresh_from_db()
         self.assertEqual(self.answer_1.is_accepted, not before)
+
+
+class TestPageState(CreateDataMixin, TestCase):
+    def test_anonymous(self):
+        client = Client()
+        response = client.get(
+            reverse("page_state"), {"questions": str(self.question.pk)}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(
+            response.json(),
+            {
+                "user": None,
+                "messages": [],
+                "votes": {"questions": {}, "answers": {}},
+                "authored": {"questions": []},
+            },
+        )
+
+    def test_authenticated(self):
+        self.question.vote(self.user, 1)
+        self.answer_2.vote(self.user, -1)
+        other = self.create_question(user=self.create_user())
+
+        client = Client()
+        client.login(username=TEST_USER, password=TEST_PASSWORD)
+        with self.assertNumQueries(5):
+            response = client.get(
+                reverse("page_state"),
+                {
+                    "questions": f"{self.question.pk},{other.pk}",
+                    "answers": f"{self.answer_1.pk},{self.answer_2.pk}",
+                },
+            )
+        data = response.json()
+
+        self.assertEqual(data["user"]["username"], TEST_USER)
+        self.assertTrue(data["csrf_token"])
+        self.assertEqual(
+            data["votes"],
+            {
+                "questions": {str(self.question.pk): 1},
+                "answers": {str(self.answer_2.pk): -1},
+            },
+        )
+        self.assertEqual(data["authored"], {"questions": [self.question.pk]})
+
+    def test_messages(self):
+        client = Client()
+        client.login(username=TEST_USER, password=TEST_PASSWORD)
+        client.post(reverse("logout"))
+
+        data = client.get(reverse("page_state")).json()
+        self.assertEqual(data["user"], None)
+        self.assertEqual(
+            data["messages"],
+            [
+                {
+                    "tags": "success",
+                    "text": "Goodbye! You have successfully logged out.",
+                }
+            ],
+        )
+
+        data = client.get(reverse("page_state")).json()
+        self.assertEqual(data["messages"], [])
+
+    def test_invalid_ids(self):
+        client = Client()
+        url = reverse("page_state")
+
+        response = client.get(url, {"questions": "1,a"})
+        self.assertEqual(response.status_code, 400)
+
+        ids = ",".join(str(pk) for pk in range(101))
+        response = client.get(url, {"answers": ids})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,216 @@
+import logging
+
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import pagecache
+
+
+logger = logging.getLogger(__name__)
+
+
+VERSION_KEY = "questions:trending:version"
+DATA_KEY = "questions:trending:{version}:data"
+STALE_KEY = "questions:trending:stale"
+LOCK_KEY = "questions:trending:lock"
+LOCK_TIMEOUT = 10
+
+
+class TrendingQuestion(NamedTuple):
+    pk: int
+    title: str
+    number_of_votes: int
+    hotness: float
+
+
+def sort_key(question: TrendingQuestion):
+    # Same ordering as `Question.trending`
+    return (-question.hotness, question.pk)
+
+
+class TrendingCache:
+    """ Top trending questions kept in a shared cache.
+
+    The cached list holds more questions than it is ever asked for,
+    so it can be maintained incrementally when `hotness` of a question
+    changes: a question that drops below the reserved tail or
+    can't be placed without a query simply invalidates the list.
+    Invalidation bumps the version that is a part of the data key.
+    Only one process recomputes an expired list at a time, the others
+    serve the last known (stale) list meanwhile.
+    """
+
+    def __init__(self, count: int, ttl: int, cache_alias: str = "default"):
+        self.count = count
+        self.size = count * 2
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def version(self) -> int:
+        version = self.cache.get(VERSION_KEY)
+        if version is None:
+            self.cache.add(VERSION_KEY, 1, timeout=None)
+            version = self.cache.get(VERSION_KEY, 1)
+        return version
+
+    def invalidate(self) -> None:
+        try:
+            self.cache.incr(VERSION_KEY)
+        except ValueError:
+            self.cache.add(VERSION_KEY, 1, timeout=None)
+        logger.debug("Trending questions cache has been invalidated")
+
+    def get(self, count: Optional[int] = None) -> List[TrendingQuestion]:
+        """ Return `count` top trending questions.
+        """
+        count = self.count if count is None else count
+        if count > self.size:
+            return self.load(count)
+
+        questions = self.cache.get(DATA_KEY.format(version=self.version()))
+        if questions is None:
+            questions = self.refresh()
+        return questions[:count]
+
+    def refresh(self) -> List[TrendingQuestion]:
+        """ Recompute cached list (single-flight).
+        """
+        if not self.cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+            stale = self.cache.get(STALE_KEY)
+            if stale is not None:
+                return stale
+            return self.load(self.size)
+
+        try:
+            version = self.version()
+            questions = self.load(self.size)
+            self.store(version, questions)
+        finally:
+            self.cache.delete(LOCK_KEY)
+
+        logger.debug("Trending questions cache has been refreshed")
+        return questions
+
+    def load(self, count: int) -> List[TrendingQuestion]:
+        from .models import Question
+
+        queryset = Question.trending(count)
+        return [
+            TrendingQuestion(*row)
+            for row in queryset.values_list(
+                "pk", "title", "number_of_votes", "hotness"
+            )
+        ]
+
+    def store(self, version: int, questions: List[TrendingQuestion]) -> None:
+        previous = self.cache.get(STALE_KEY)
+        self.cache.set(DATA_KEY.format(version=version), questions, self.ttl)
+        self.cache.set(STALE_KEY, questions, None)
+
+        # Cached pages show titles and votes of the top questions only
+        if previous is not None and self.shown(previous) != self.shown(
+            questions
+        ):
+            pagecache.page_cache.purge(pagecache.TRENDING)
+
+    def shown(self, questions: List[TrendingQuestion]):
+        return [
+            (question.pk, question.title, question.number_of_votes)
+            for question in questions[: self.count]
+        ]
+
+    def update(self, question_id: int) -> None:
+        """ Apply new score of a question to the cached list.
+        """
+        version = self.version()
+        key = DATA_KEY.format(version=version)
+        if self.cache.get(key) is None:
+            return
+
+        # Queried before the lock is taken to keep it held briefly
+        updated = self.load_question(question_id)
+        if updated is None:
+            self.invalidate()
+            return
+
+        if not self.cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+            # Somebody else is changing the list, don't lose the update
+            self.invalidate()
+            return
+
+        try:
+            # Read under the lock, otherwise changes stored meanwhile
+            # by another process would be overwritten.
+            questions = self.cache.get(key)
+            if questions is None:
+                return
+            questions = self.apply(questions, updated)
+            if questions is None:
+                self.invalidate()
+            else:
+                self.store(version, questions)
+        finally:
+            self.cache.delete(LOCK_KEY)
+
+    def load_question(self, question_id: int) -> Optional[TrendingQuestion]:
+        from .models import Question
+
+        row = (
+            Question.objects.filter(pk=question_id)
+            .values_list("pk", "title", "number_of_votes", "hotness")
+            .first()
+        )
+        return None if row is None else TrendingQuestion(*row)
+
+    def apply(self, questions, updated: TrendingQuestion):
+        """ Return updated list or `None` if it can't be updated
+        without recomputation.
+        """
+        question_id = updated.pk
+        questions = list(questions)
+        is_full = len(questions) >= self.size
+        current = next((q for q in questions if q.pk == question_id), None)
+
+        if current is None:
+            if is_full and sort_key(updated) > sort_key(questions[-1]):
+                return questions
+
+            questions.append(updated)
+            questions.sort(key=sort_key)
+            return questions[: self.size]
+
+        questions.remove(current)
+        questions.append(updated)
+        questions.sort(key=sort_key)
+
+        decreased = updated.hotness < current.hotness
+        if is_full and decreased and questions[-1].pk == question_id:
+            # The question dropped to the tail, somebody out of the
+            # list may be above it now.
+            return None
+
+        return questions
+
+    def discard(self, question_id: int) -> None:
+        """ Invalidate cached list if the question is in it
+        (or may get into it).
+        """
+        questions = self.cache.get(DATA_KEY.format(version=self.version()))
+        if questions is None:
+            return
+        if len(questions) < self.size or any(
+            question.pk == question_id for question in questions
+        ):
+            self.invalidate()
+
+
+trending_cache = TrendingCache(
+    count=settings.QUESTIONS_TRENDING_COUNT,
+    ttl=settings.QUESTIONS_TRENDING_CACHE_TTL,
+)
@@ -11,15 +11,23 @@ urlpatterns = [
         name="answer_mark",
     ),
     path("ask", views.Ask.as_view(), name="ask"),
+    path("hot", views.QuestionsHot.as_view(), name="hot"),
     path("latest", views.Questions.as_view(), name="latest"),
     path("popular", views.QuestionsPopular.as_view(), name="popular"),
+    path("page-state", views.PageState.as_view(), name="page_state"),
     path("search", views.QuestionsSearch.as_view(), name="search"),
     path("tag/<tag>", views.QuestionsTag.as_view(), name="tag"),
+    path("tags", views.Tags.as_view(), name="tags"),
     path(
         "questions/<int:question_id>",
         views.QuestionDetail.as_view(),
         name="question_detail",
     ),
+    path(
+        "questions/<int:question_id>/events",
+        views.QuestionEvents.as_view(),
+        name="question_events",
+    ),
     path("vote/question", views.QuestionVote.as_view(), name="vote_question"),
     path("vote/answer", views.AnswerVote.as_view(), name="vote_answer"),
 ]
@@ -1,8 +1,12 @@
 import logging
 
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Set
+
 from django.conf import settings
 from django.urls import reverse
-from django.core.mail import send_mail
+
+from . import outbox
 
 
 logger = logging.getLogger(__name__)
@@ -11,6 +15,9 @@ logger = logging.getLogger(__name__)
 def send_notification_about_new_answer(
     request, to: str, question_id: int
 ) -> None:
+    """ Queue email about a new answer, it's sent
+    by `manage.py send_emails`.
+    """
     question_url = request.build_absolute_uri(
         reverse("question_detail", kwargs=dict(question_id=question_id))
     )
@@ -19,12 +26,49 @@ def send_notification_about_new_answer(
         f"<a href='{question_url}'>your question</a><br><br>"
         f"Best regards!"
     )
-    send_mail(
-        "Hasker - new answer!",
-        "",
-        settings.EMAIL_FROM,
-        [to],
-        fail_silently=False,
-        html_message=message,
-    )
-    logger.debug(f"Email about new answer has been sent to {to}")
+    outbox.enqueue(to, "Hasker - new answer!", html_message=message)
+    logger.debug(f"Email about new answer has been queued for {to}")
+
+
+def parse_ids(value: str, max_ids: int) -> Set[int]:
+    """ Parse comma-separated ids (e.g. of a query parameter),
+    raise `ValueError` if they are invalid or too many.
+    """
+    try:
+        ids = {int(pk) for pk in value.split(",") if pk.strip()}
+    except ValueError:
+        raise ValueError("Ids should be comma-separated integers.")
+
+    if len(ids) > max_ids:
+        raise ValueError(f"No more than {max_ids} ids are allowed.")
+    return ids
+
+
+def make_excerpt(content: str, length: Optional[int] = None) -> str:
+    """ Beginning of `content` shown in lists instead of the whole
+    content: whitespace is collapsed and it's cut on a word boundary.
+    """
+    if length is None:
+        length = settings.QUESTIONS_EXCERPT_LEN
+
+    text = " ".join(content.split())
+    if len(text) <= length:
+        return text
+
+    # Room for the ellipsis, a word cut in the middle is dropped
+    excerpt = text[: length - 1]
+    if text[length - 1] != " " and " " in excerpt:
+        excerpt = excerpt.rsplit(" ", 1)[0]
+    return excerpt.rstrip() + "…"
+
+
+def chunks(items: Iterable, size: int) -> Iterator[List]:
+    """ Split `items` into lists of `size` items, the last one
+    may be shorter.
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return None
+        yield chunk
@@ -1,18 +1,33 @@
 import logging
+import time
 
+from django.conf import settings
 from django.contrib import messages
+from django.middleware.csrf import get_token
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
-from django.db.models import Q
-from django.http import JsonResponse, HttpResponseForbidden, Http404
+from django.db import connections, router, transaction
+from django.http import (
+    JsonResponse,
+    HttpResponseForbidden,
+    Http404,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import add_never_cache_headers
 from django.views.generic import CreateView, FormView, ListView, View
 
+from . import live, pagecache
 from .forms import AnswerForm, AskForm, VoteForm
-from .models import Answer, Question
-from .utils import send_notification_about_new_answer
+from .fragments import fragment_cache
+from .models import Answer, Question, Tag
+from .pagecache import page_cache
+from .pagination import InvalidCursor, KeysetPaginationMixin
+from .search import get_search_backend
+from .tags import DEFAULT_SORT, SORTS, tag_directory
+from .trending import trending_cache
+from .utils import parse_ids, send_notification_about_new_answer
 
 
 logger = logging.getLogger(__name__)
@@ -24,10 +39,86 @@ class TrendingMixin:
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context["trending"] = Question.trending(count=10)
+        context["trending"] = trending_cache.get()
         return context
 
 
+class PageCacheMixin:
+    """ Serves GET requests from `page_cache`. Pages are the same
+    for all users (see `PageState`), so they must not touch
+    `request.user` or the session. Views list surrogate keys
+    of the data they show in `get_surrogate_keys`,
+    `use_page_cache = False` disables the cache.
+    """
+
+    use_page_cache = True
+
+    def dispatch(self, request, *args, **kwargs):
+        match = request.resolver_match
+        view = match.url_name if match else type(self).__name__
+
+        if not (
+            self.use_page_cache
+            and page_cache.is_enabled(view)
+            and request.method == "GET"
+        ):
+            return super().dispatch(request, *args, **kwargs)
+
+        response = page_cache.get(request, view)
+        if response is not None:
+            response["X-Page-Cache"] = pagecache.HIT
+            return response
+
+        # Taken before any data of the page is read
+        created = time.time()
+        response = super().dispatch(request, *args, **kwargs)
+        response["X-Page-Cache"] = pagecache.MISS
+
+        if hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(
+                lambda response: page_cache.set(
+                    request,
+                    response,
+                    self.get_surrogate_keys(response.context_data),
+                    created,
+                )
+            )
+        return response
+
+    def get_surrogate_keys(self, context):
+        return [pagecache.TRENDING]
+
+
+class FragmentCacheMixin:
+    """ Fetches cached fragments of the posts (`fragment_kind`)
+    of a page at once and stores the rendered missing ones.
+    """
+
+    fragment_kind = None
+
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        context["fragments"] = fragment_cache.batch(
+            self.fragment_kind,
+            self.get_fragment_posts(context),
+            *self.get_fragment_variant(),
+        )
+        return context
+
+    def get_fragment_posts(self, context):
+        return context["object_list"]
+
+    def get_fragment_variant(self):
+        return ()
+
+    def render_to_response(self, context, **kwargs):
+        response = super().render_to_response(context, **kwargs)
+        response.add_post_render_callback(
+            lambda response: context["fragments"].save()
+        )
+        return response
+
+
 class Ask(TrendingMixin, LoginRequiredMixin, CreateView):
     """ View for adding new questions.
     """
@@ -61,19 +152,30 @@ class Ask(TrendingMixin, LoginRequiredMixin, CreateView):
         return redirect(self.success_url)
 
 
-class QuestionDetail(TrendingMixin, ListView):
+class QuestionDetail(
+    PageCacheMixin,
+    FragmentCacheMixin,
+    TrendingMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """ Question details / answers / add answer form
     """
 
     form = None
+    fragment_kind = "answer"
     model = Answer
-    ordering = ("-is_accepted", "-rating", "-posted")
+    ordering = ("-rating", "-posted")
     paginate_by = 30
     template_name = "answers.html"
 
     def dispatch(self, *args, **kwargs):
+        # Pages show `content_html` of posts
         self.question = get_object_or_404(
-            Question, pk=self.kwargs["question_id"]
+            Question.objects.select_related(
+                "author", "accepted_answer__author"
+            ).defer("content", "accepted_answer__content"),
+            pk=self.kwargs["question_id"],
         )
         return super().dispatch(*args, **kwargs)
 
@@ -89,7 +191,8 @@ class QuestionDetail(TrendingMixin, ListView):
 
     @transaction.atomic
     def form_valid(self, form):
-        """ If the form is valid, save the answer.
+        """ If the form is valid, save the answer and queue
+        a notification for the author of the question.
         """
         answer = form.save(commit=False)
         answer.author = self.request.user
@@ -112,15 +215,46 @@ class QuestionDetail(TrendingMixin, ListView):
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
         context["question"] = self.question
+        context["accepted_answer"] = self.get_accepted_answer(context)
 
         if self.form is not None:
             context["form"] = self.form
 
         return context
 
+    def get_accepted_answer(self, context):
+        """ The accepted answer is shown above the others
+        on the first page.
+        """
+        if context["page_obj"].has_previous():
+            return None
+        return self.question.accepted_answer
+
+    def get_fragment_posts(self, context):
+        answers = list(super().get_fragment_posts(context))
+        accepted_answer = self.get_accepted_answer(context)
+        if accepted_answer is not None:
+            answers.append(accepted_answer)
+        return answers
+
     def get_queryset(self):
         queryset = super().get_queryset()
-        return queryset.select_related("author").filter(question=self.question)
+        queryset = (
+            queryset.select_related("author")
+            .defer("content")
+            .filter(question=self.question)
+        )
+        if self.question.accepted_answer_id is not None:
+            queryset = queryset.exclude(pk=self.question.accepted_answer_id)
+        return queryset
+
+    def get_surrogate_keys(self, context):
+        answers = self.get_fragment_posts(context)
+        return [
+            *super().get_surrogate_keys(context),
+            pagecache.question_key(self.question.pk),
+            *(pagecache.answer_key(answer.pk) for answer in answers),
+        ]
 
     def post(self, *args, **kwargs):
         if not self.request.user.is_authenticated:
@@ -133,10 +267,18 @@ class QuestionDetail(TrendingMixin, ListView):
             return self.form_invalid(form)
 
 
-class Questions(TrendingMixin, ListView):
+class Questions(
+    PageCacheMixin,
+    FragmentCacheMixin,
+    TrendingMixin,
+    KeysetPaginationMixin,
+    ListView,
+):
     """ List of questions sorted by posted time.
     """
 
+    fragment_kind = "question"
+    list_key = pagecache.LATEST
     model = Question
     paginate_by = 20
     ordering = ("-posted", "-pk")
@@ -144,21 +286,47 @@ class Questions(TrendingMixin, ListView):
 
     def get_queryset(self):
         qs = super().get_queryset()
+        # Lists show `excerpt` of questions
+        qs = qs.defer("content", "content_html")
         return qs.select_related("author").prefetch_related("tags")
 
+    def get_surrogate_keys(self, context):
+        return [
+            *super().get_surrogate_keys(context),
+            self.get_list_key(),
+            *(
+                pagecache.question_key(question.pk)
+                for question in context["object_list"]
+            ),
+        ]
+
+    def get_list_key(self):
+        return self.list_key
+
 
 class QuestionsPopular(Questions):
     """ List of questions sorted by rating.
     """
 
+    list_key = pagecache.POPULAR
     ordering = ("-rating", "-posted")
 
 
+class QuestionsHot(Questions):
+    """ List of questions sorted by time-decayed activity.
+    """
+
+    ordering = ("-hotness", "pk")
+    # The order changes with time
+    use_page_cache = False
+
+
 class QuestionsSearch(Questions):
-    """ Search for questions.
+    """ Search for questions, the most relevant first.
     """
 
-    ordering = ("-rating", "-posted")
+    ordering = ("-relevance", "-pk")
+    use_page_cache = False
     query = ""
 
     def get(self, *args, **kwargs):
@@ -169,7 +337,7 @@ class QuestionsSearch(Questions):
 
         if "tag:" in self.query:
             *_, tag = self.query.partition(":")
-            tag = tag.strip().lower()
+            tag = Tag.normalize(tag)
             if tag:
                 return redirect("tag", tag=tag)
 
@@ -177,10 +345,7 @@ class QuestionsSearch(Questions):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        qs = qs.filter(
-            Q(title__icontains=self.query) | Q(content__icontains=self.query)
-        )
-        return qs
+        return get_search_backend().search(qs, self.query)
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
@@ -193,10 +358,46 @@ class QuestionsTag(Questions):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        tag = self.kwargs["tag"].strip().lower()
+        tag = Tag.normalize(self.kwargs["tag"])
         qs = qs.filter(tags__name=tag)
         return qs
 
+    def get_list_key(self):
+        return pagecache.tag_key(Tag.normalize(self.kwargs["tag"]))
+
+
+class Tags(TrendingMixin, ListView):
+    """ Directory of tags sorted by popularity or by name,
+    pages are served from the cache of `tag_directory`.
+    """
+
+    cursor_kwarg = "cursor"
+    model = Tag
+    paginate_by = settings.QUESTIONS_TAGS_PER_PAGE
+    sort = DEFAULT_SORT
+    template_name = "tags.html"
+
+    def get(self, *args, **kwargs):
+        sort = self.request.GET.get("sort", "").strip().lower()
+        if sort in SORTS:
+            self.sort = sort
+        return super().get(*args, **kwargs)
+
+    def get_context_data(self, *args, **kwargs):
+        context = super().get_context_data(*args, **kwargs)
+        context["sort"] = self.sort
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = tag_directory.page(
+                self.sort, self.request.GET.get(self.cursor_kwarg), page_size
+            )
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+
+        return None, page, page.object_list, page.has_other_pages()
+
 
 class QuestionVote(FormView):
     """ Vote for a question. It's supposed to be called with AJAX.
@@ -220,7 +421,6 @@ class QuestionVote(FormView):
     def form_invalid(self, form):
         return JsonResponse(data=form.errors, status=400)
 
-    @transaction.atomic
     def form_valid(self, form):
         target = form.cleaned_data["target"]
         value = form.cleaned_data["value"]
@@ -249,18 +449,127 @@ class AnswerMark(View):
             return HttpResponseForbidden()
 
         try:
-            answer = Answer.objects.get(pk=self.kwargs["answer_id"])
+            answer = Answer.objects.select_related("question").get(
+                pk=self.kwargs["answer_id"]
+            )
         except ObjectDoesNotExist:
             return JsonResponse(
                 data={"error": "Answer doesn't exist."}, status=404
             )
 
-        if answer.question.author != self.request.user:
+        if answer.question.author_id != self.request.user.pk:
             return HttpResponseForbidden()
 
-        if answer.is_accepted:
+        if answer.question.accepted_answer_id == answer.pk:
             answer.unmark()
         else:
             answer.mark()
 
         return JsonResponse(data={"accepted": answer.is_accepted})
+
+
+class PageState(View):
+    """ Personal part of pages, that are the same for all users:
+    the user, flash messages and votes of the user for the posts
+    of the page (ids in `questions` / `answers` parameters).
+    It's loaded by `main.js` and never cached.
+    """
+
+    http_method_names = ("get",)
+    max_ids = 100
+
+    def get(self, *args, **kwargs):
+        try:
+            question_ids = self.get_ids("questions")
+            answer_ids = self.get_ids("answers")
+        except ValueError as error:
+            return JsonResponse(data={"error": str(error)}, status=400)
+
+        data = {
+            "user": None,
+            "messages": [
+                {"tags": message.tags, "text": str(message)}
+                for message in messages.get_messages(self.request)
+            ],
+            "votes": {"questions": {}, "answers": {}},
+            "authored": {"questions": []},
+        }
+
+        user = self.request.user
+        if user.is_authenticated:
+            data["user"] = {
+                "username": user.username,
+                "url": reverse("settings"),
+                "thumb_url": user.get_thumb_url(),
+                "thumb_webp_url": (
+                    user.avatar_urls["thumb"]["webp"]
+                    if user.has_avatar
+                    else None
+                ),
+            }
+            data["csrf_token"] = get_token(self.request)
+            data["votes"] = {
+                "questions": Question.get_votes_of(user, question_ids),
+                "answers": Answer.get_votes_of(user, answer_ids),
+            }
+            if question_ids:
+                data["authored"]["questions"] = list(
+                    Question.objects.filter(
+                        pk__in=question_ids, author=user
+                    ).values_list("pk", flat=True)
+                )
+
+        response = JsonResponse(data=data)
+        add_never_cache_headers(response)
+        return response
+
+    def get_ids(self, name):
+        return parse_ids(self.request.GET.get(name, ""), self.max_ids)
+
+
+class QuestionEvents(View):
+    """ Server-sent events of a question for readers of its page:
+    `rating` of the question / its answers and `answers` (number
+    of answers), published by signals (see `questions.live`).
+    The current counters of the question are sent first.
+    """
+
+    http_method_names = ("get",)
+
+    def get(self, *args, **kwargs):
+        question_id = self.kwargs["question_id"]
+        # Subscribe before reading, so no change is missed in between
+        subscription = live.get_broker().subscribe(live.channel(question_id))
+        question = (
+            Question.objects.filter(pk=question_id)
+            .values("rating", "number_of_votes", "number_of_answers")
+            .first()
+        )
+        if question is None:
+            subscription.close()
+            raise Http404
+
+        # The stream lasts for minutes, the connection isn't held
+        # meanwhile (unless it's in a transaction)
+        connection = connections[router.db_for_read(Question)]
+        if not connection.in_atomic_block:
+            connection.close()
+
+        number_of_answers = question.pop("number_of_answers")
+        current = [
+            live.Message(
+                live.RATING,
+                {"kind": "questions", "id": question_id, **question},
+            ),
+            live.Message(
+                live.ANSWERS, {"number_of_answers": number_of_answers}
+            ),
+        ]
+        response = StreamingHttpResponse(
+            live.EventStream(subscription, current),
+            content_type="text/event-stream",
+        )
+        add_never_cache_headers(response)
+        # Don't buffer the stream in nginx
+        response["X-Accel-Buffering"] = "no"
+        return response
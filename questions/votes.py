@@ -0,0 +1,326 @@
+import logging
+
+from typing import NamedTuple, Optional
+
+from django.db import IntegrityError, connections, router, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+# MySQL error code of a duplicate key
+ER_DUP_ENTRY = 1062
+
+
+# Sent inside the transaction after a vote engine operation
+# has changed counters of a post. `sender` is the post model
+# (`Question` / `Answer`), `post` is the voted instance.
+# `removed_timestamp` is the time of the deleted or changed vote
+# (`None` if no vote has been removed).
+post_voted = Signal(
+    providing_args=[
+        "post",
+        "post_id",
+        "rating",
+        "number_of_votes",
+        "rating_delta",
+        "votes_delta",
+        "removed_timestamp",
+    ]
+)
+
+
+class VoteResult(NamedTuple):
+    rating: int
+    number_of_votes: int
+    changed: bool
+
+
+class VoteEngine:
+    """ Records / toggles votes and adjusts `rating` / `number_of_votes`
+    of the voted post in one transaction, without ORM round trips
+    and without relying on `post_save` / `post_delete` signals
+    (`post_voted` is sent instead).
+
+    Each operation is a conditional write on the vote table followed
+    by a relative `UPDATE` of the post with a read back of its new
+    counters, so the returned rating is authoritative even under
+    concurrent voters.
+    """
+
+    # `INSERT` that silently skips an already existing (to, user) pair
+    insert_ignore_template = (
+        "INSERT INTO {table} ({timestamp}, {to}, {user}, {value}) "
+        "VALUES (%s, %s, %s, %s) ON CONFLICT ({to}, {user}) DO NOTHING"
+    )
+    # Whether `UPDATE / DELETE ... RETURNING` is available
+    has_update_returning = True
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def vote(self, post, user_id: int, value: int) -> VoteResult:
+        """ Toggle semantics used by the site: add a vote if the user
+        has not voted yet, remove the vote of the opposite value,
+        do nothing if the same vote already exists.
+        """
+        with self.atomic(), self.connection.cursor() as cursor:
+            removed = self.delete_vote(cursor, post, user_id, -value)
+            if removed is not None:
+                return self.update_post(cursor, post, value, -1, removed)
+
+            if self.insert_vote(cursor, post, user_id, value):
+                return self.update_post(cursor, post, value, 1)
+
+            return self.read_post(cursor, post)
+
+    def add(self, post, user_id: int, value: int) -> VoteResult:
+        """ Add a vote if the user has not voted yet, an existing vote
+        is left as it is (`changed` is false then).
+        """
+        with self.atomic(), self.connection.cursor() as cursor:
+            if self.insert_vote(cursor, post, user_id, value):
+                return self.update_post(cursor, post, value, 1)
+
+            return self.read_post(cursor, post)
+
+    def change(self, post, user_id: int, value: int) -> VoteResult:
+        """ Change value of an existing vote of the user.
+        """
+        with self.atomic(), self.connection.cursor() as cursor:
+            removed = self.lock_vote(cursor, post, user_id, -value)
+            if removed is not None:
+                self.execute(
+                    cursor,
+                    "UPDATE {table} SET {value} = %s, {timestamp} = %s "
+                    "WHERE {to} = %s AND {user} = %s AND {value} = %s",
+                    post,
+                    [value, self.now(post), post.pk, user_id, -value],
+                )
+                return self.update_post(cursor, post, 2 * value, 0, removed)
+
+            return self.read_post(cursor, post)
+
+    def retract(self, post, user_id: int) -> VoteResult:
+        """ Remove a vote of the user whatever its value is.
+        """
+        with self.atomic(), self.connection.cursor() as cursor:
+            field = post.vote_class._meta.get_field("value")
+            for value, _ in field.flatchoices:
+                removed = self.delete_vote(cursor, post, user_id, value)
+                if removed is not None:
+                    return self.update_post(
+                        cursor, post, -value, -1, removed
+                    )
+
+            return self.read_post(cursor, post)
+
+    def atomic(self):
+        # Any failure has to abort the whole enclosing transaction,
+        # so there is no need to pay for savepoint round trips.
+        return transaction.atomic(
+            using=self.connection.alias, savepoint=False
+        )
+
+    def execute(self, cursor, template: str, post, params) -> int:
+        """ Execute a statement on the vote table of `post`
+        and return the number of affected rows.
+        """
+        opts = post.vote_class._meta
+        quote = self.connection.ops.quote_name
+        names = {
+            "table": quote(opts.db_table),
+            "timestamp": quote(opts.get_field("timestamp").column),
+            "to": quote(opts.get_field("to").column),
+            "user": quote(opts.get_field("user").column),
+            "value": quote(opts.get_field("value").column),
+        }
+        cursor.execute(template.format(**names), params)
+        return cursor.rowcount
+
+    def insert_vote(self, cursor, post, user_id: int, value: int) -> bool:
+        """ Insert a vote of the user unless the user has already
+        voted, returns whether the vote has been inserted.
+        """
+        inserted = self.execute(
+            cursor,
+            self.insert_ignore_template,
+            post,
+            [self.now(post), post.pk, user_id, value],
+        )
+        return bool(inserted)
+
+    def delete_vote(self, cursor, post, user_id: int, value: int):
+        """ Delete the vote of the user with `value`, returns timestamp
+        of the deleted vote or `None` if there is no such vote.
+        """
+        where = "WHERE {to} = %s AND {user} = %s AND {value} = %s"
+        params = [post.pk, user_id, value]
+
+        if self.has_update_returning:
+            self.execute(
+                cursor,
+                f"DELETE FROM {{table}} {where} RETURNING {{timestamp}}",
+                post,
+                params,
+            )
+            row = cursor.fetchone()
+            return None if row is None else self.to_datetime(post, row[0])
+
+        timestamp = self.lock_vote(cursor, post, user_id, value)
+        if timestamp is not None:
+            self.execute(
+                cursor, f"DELETE FROM {{table}} {where}", post, params
+            )
+        return timestamp
+
+    def lock_vote(self, cursor, post, user_id: int, value: int):
+        """ Read (and lock where possible) timestamp of the vote
+        of the user with `value`, `None` if there is no such vote.
+        """
+        template = (
+            "SELECT {timestamp} FROM {table} "
+            "WHERE {to} = %s AND {user} = %s AND {value} = %s"
+        )
+        if self.connection.features.has_select_for_update:
+            template += " FOR UPDATE"
+        self.execute(cursor, template, post, [post.pk, user_id, value])
+        row = cursor.fetchone()
+        return None if row is None else self.to_datetime(post, row[0])
+
+    def to_datetime(self, post, value):
+        """ Convert a raw timestamp of a vote read with the cursor.
+        """
+        opts = post.vote_class._meta
+        expression = opts.get_field("timestamp").get_col(opts.db_table)
+        for converter in self.connection.ops.get_db_converters(expression):
+            value = converter(value, expression, self.connection)
+        return value
+
+    def now(self, post):
+        field = post.vote_class._meta.get_field("timestamp")
+        return field.get_db_prep_value(timezone.now(), self.connection)
+
+    def post_names(self, post):
+        quote = self.connection.ops.quote_name
+        opts = post._meta
+        return (
+            quote(opts.db_table),
+            quote(opts.pk.column),
+            quote(opts.get_field("rating").column),
+            quote(opts.get_field("number_of_votes").column),
+        )
+
+    def update_post(
+        self,
+        cursor,
+        post,
+        rating_delta: int,
+        votes_delta: int,
+        removed_timestamp=None,
+    ) -> VoteResult:
+        table, pk, rating, votes = self.post_names(post)
+        version = self.connection.ops.quote_name(
+            post._meta.get_field("version").column
+        )
+        sql = (
+            f"UPDATE {table} SET {rating} = {rating} + %s, "
+            f"{votes} = {votes} + %s, {version} = {version} + 1 "
+            f"WHERE {pk} = %s"
+        )
+        params = [rating_delta, votes_delta, post.pk]
+
+        if self.has_update_returning:
+            cursor.execute(f"{sql} RETURNING {rating}, {votes}", params)
+            row = cursor.fetchone()
+        else:
+            # The row is locked by the `UPDATE` until the end of the
+            # transaction, so the following read can't be stale.
+            cursor.execute(sql, params)
+            row = self.fetch_counters(cursor, post)
+
+        result = self.make_result(post, row, changed=True)
+        post_voted.send(
+            sender=type(post),
+            post=post,
+            post_id=post.pk,
+            rating=result.rating,
+            number_of_votes=result.number_of_votes,
+            rating_delta=rating_delta,
+            votes_delta=votes_delta,
+            removed_timestamp=removed_timestamp,
+        )
+        logger.debug(
+            f"Vote for {type(post).__name__} ({post.pk}) has been "
+            f"processed, new rating is {result.rating}"
+        )
+        return result
+
+    def read_post(self, cursor, post) -> VoteResult:
+        row = self.fetch_counters(cursor, post)
+        return self.make_result(post, row, changed=False)
+
+    def fetch_counters(self, cursor, post):
+        table, pk, rating, votes = self.post_names(post)
+        cursor.execute(
+            f"SELECT {rating}, {votes} FROM {table} WHERE {pk} = %s",
+            [post.pk],
+        )
+        return cursor.fetchone()
+
+    def make_result(self, post, row, changed: bool) -> VoteResult:
+        if row is None:
+            raise type(post).DoesNotExist(
+                f"{type(post).__name__} ({post.pk}) doesn't exist."
+            )
+        post.rating, post.number_of_votes = row
+        return VoteResult(row[0], row[1], changed)
+
+
+class SQLiteVoteEngine(VoteEngine):
+    @property
+    def has_update_returning(self):
+        return self.connection.Database.sqlite_version_info >= (3, 35, 0)
+
+
+class MySQLVoteEngine(VoteEngine):
+    insert_template = (
+        "INSERT INTO {table} ({timestamp}, {to}, {user}, {value}) "
+        "VALUES (%s, %s, %s, %s)"
+    )
+    has_update_returning = False
+
+    def insert_vote(self, cursor, post, user_id: int, value: int) -> bool:
+        # `INSERT IGNORE` turns any error (e.g. of a foreign key) into
+        # a warning and `ON DUPLICATE KEY UPDATE` reports an affected
+        # row either way (Django connects with `CLIENT.FOUND_ROWS`),
+        # so only the duplicate key error is caught.
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                self.execute(
+                    cursor,
+                    self.insert_template,
+                    post,
+                    [self.now(post), post.pk, user_id, value],
+                )
+        except IntegrityError as exc:
+            if exc.args[0] != ER_DUP_ENTRY:
+                raise
+            return False
+        return True
+
+
+ENGINES = {
+    "mysql": MySQLVoteEngine,
+    "postgresql": VoteEngine,
+    "sqlite": SQLiteVoteEngine,
+}
+
+
+def get_vote_engine(model, using: Optional[str] = None) -> VoteEngine:
+    """ Return vote engine for the database `model` is written to.
+    """
+    connection = connections[using or router.db_for_write(model)]
+    return ENGINES.get(connection.vendor, VoteEngine)(connection)
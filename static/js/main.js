@@ -15,7 +15,82 @@ function getCookie(name) {
 }
 
 
+function loadPageState() {
+    // Pages are the same for all users, the personal part is loaded here
+    var ids = {questions: [], answers: []};
+    $(".votes[data-kind]").each(function() {
+        ids[$(this).data("kind")].push($(this).data("target"));
+    });
+
+    $.getJSON($("body").data("state-url"), {
+        questions: ids["questions"].join(","),
+        answers: ids["answers"].join(",")
+    }, function(state) {
+        var user = state["user"];
+
+        $.each(state["messages"], function(i, message) {
+            var alert = $("<div uk-alert>");
+            if (message["tags"]) {
+                alert.addClass("uk-alert-" + message["tags"]);
+            }
+            alert.append($('<button class="uk-alert-close" type="button" uk-close>'));
+            alert.append($("<p>").text(message["text"]));
+            $(".messages").append(alert);
+        });
+
+        if (!user) {
+            $(".user-anonymous").removeClass("uk-hidden");
+            return
+        }
+
+        $(".user-name").text(user["username"]);
+        $(".user-thumb").attr("src", user["thumb_url"]);
+        if (user["thumb_webp_url"]) {
+            $(".user-thumb-webp").attr("srcset", user["thumb_webp_url"]);
+        } else {
+            $(".user-thumb-webp").remove();
+        }
+        $(".csrf-token").val(state["csrf_token"]);
+        $(".user-authenticated").removeClass("uk-hidden");
+
+        $(".votes[data-kind]").each(function() {
+            var votes = state["votes"][$(this).data("kind")],
+                value = votes[$(this).data("target")];
+            if (value) {
+                $(this).find('.votes__vote[data-value="' + value + '"]').addClass("votes__vote--voted");
+            }
+        });
+
+        $.each(state["authored"]["questions"], function(i, pk) {
+            $('.answer-mark[data-question="' + pk + '"]').removeClass("uk-hidden");
+        });
+    });
+}
+
+
+function listenToEvents(url) {
+    // Ratings and number of answers changed by others, see `questions.live`
+    var source = new EventSource(url);
+
+    source.addEventListener("rating", function(event) {
+        var data = JSON.parse(event.data);
+        $('.votes[data-kind="' + data["kind"] + '"][data-target="' + data["id"] + '"]')
+            .find(".votes__value span").text(data["rating"]);
+    });
+    source.addEventListener("answers", function(event) {
+        $(".answers-count").text(JSON.parse(event.data)["number_of_answers"]);
+    });
+}
+
+
 $(document).ready(function() {
+    loadPageState();
+
+    var events = $("[data-events-url]");
+    if (events.length && window.EventSource) {
+        listenToEvents(events.data("events-url"));
+    }
+
     $(".votes__vote").click(function() {
         var container = $(this).parents(".votes"),
             target_id = $(this).parents(".votes").data("target"),
@@ -43,7 +118,14 @@ $(document).ready(function() {
                 container.find(".loader").removeClass("hidden");
             },
             success: function(data, status, xhr) {
+                var voted = container.find(".votes__vote--voted");
                 container.find(".votes__value span").html(data["rating"]);
+                // A vote with the opposite value cancels the existing one
+                if (voted.length && voted.data("value") != value) {
+                    voted.removeClass("votes__vote--voted");
+                } else {
+                    container.find('.votes__vote[data-value="' + value + '"]').addClass("votes__vote--voted");
+                }
             },
             error: function(xhr, status) {
                 if (status == "error" && xhr["status"] == 403) {
@@ -111,6 +193,28 @@ $(document).ready(function() {
     })
 
 
+    $(".tags-input").on("input", function() {
+        var input = $(this),
+            list = $("#" + input.attr("list")),
+            tags = input.val().split(","),
+            prefix = tags.pop().trim(),
+            head = tags.map(function(tag) { return tag.trim(); }).join(", ");
+
+        if (!prefix) {
+            list.empty();
+            return
+        }
+
+        $.getJSON(input.data("url"), {prefix: prefix}, function(data) {
+            list.empty();
+            $.each(data, function(i, tag) {
+                var value = head ? head + ", " + tag["name"] : tag["name"];
+                list.append($("<option>").attr("value", value));
+            });
+        });
+    })
+
+
     $("body").on("submit", "form", function() {
         $(this).submit(function() {
             return false;
@@ -0,0 +1,209 @@
+""" Avatar renditions.
+
+An uploaded photo is stored as is and the user is marked with
+`avatar_pending`, so a request never decodes images. `manage.py
+process_avatars` renders pending photos in a process pool: every size
+from `USER_AVATAR_SIZES` in JPEG and WebP. Renditions of a photo are
+stored together under a key (`avatars/<key>/<size>.<ext>`) that is
+a hash of the photo and rendering settings, so identical photos are
+rendered and stored once (see `users.storage`). Until renditions are
+ready a placeholder is served.
+"""
+import hashlib
+import logging
+
+from concurrent.futures import Executor, as_completed
+from io import BytesIO
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .storage import AVATAR_PREFIX, acquire, media_storage, release
+
+
+logger = logging.getLogger(__name__)
+
+
+PLACEHOLDER = "ui/user.png"
+FORMATS = {
+    "jpeg": ("jpg", "JPEG", {"quality": 85, "optimize": True}),
+    "webp": ("webp", "WEBP", {"quality": 80, "method": 4}),
+}
+
+
+# Extensions of uploaded photos by the format detected by Pillow
+PHOTO_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+
+def photo_extension(file) -> str:
+    """ Extension of an uploaded photo by its content (not by the name
+    given by the client), so identical photos get identical names.
+    Only the header is read.
+    """
+    try:
+        with Image.open(file) as img:
+            fmt = img.format
+    except (OSError, ValueError):
+        fmt = None
+    finally:
+        file.seek(0)
+    return PHOTO_EXTENSIONS.get(fmt, fmt.lower() if fmt else "jpg")
+
+
+def stored_name(key: str) -> str:
+    """ Name of the reference counter of a rendition set.
+    """
+    return f"{AVATAR_PREFIX}/{key}" if key else ""
+
+
+def rendition_name(key: str, size: str, fmt: str) -> str:
+    extension, *_ = FORMATS[fmt]
+    return f"{stored_name(key)}/{size}.{extension}"
+
+
+def rendition_names(key: str) -> List[str]:
+    return [
+        rendition_name(key, size, fmt)
+        for size in settings.USER_AVATAR_SIZES
+        for fmt in FORMATS
+    ]
+
+
+def rendition_key(data: bytes) -> str:
+    """ Key of renditions of a photo with the current settings.
+    """
+    digest = hashlib.sha256(data)
+    digest.update(repr(sorted(settings.USER_AVATAR_SIZES.items())).encode())
+    digest.update(repr(sorted(FORMATS.items())).encode())
+    return digest.hexdigest()
+
+
+def url(key: str, size: str, fmt: str = "jpeg") -> str:
+    return media_storage.url(rendition_name(key, size, fmt))
+
+
+def placeholder_url() -> str:
+    return static(PLACEHOLDER)
+
+
+Renditions = Dict[Tuple[str, str], bytes]
+
+
+def render(data: bytes, sizes: Dict[str, int]) -> Renditions:
+    """ Render square avatars of the specified sizes from an image.
+    It is CPU bound and doesn't use Django, so it runs in worker
+    processes. Returns encoded images by (size, format).
+    """
+    largest = max(sizes.values())
+
+    with Image.open(BytesIO(data)) as img:
+        # JPEG is decoded at a reduced scale (DCT scaling),
+        # instead of decoding the full resolution.
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGBA", img.size, "white")
+            img = Image.alpha_composite(background, img)
+        img = img.convert("RGB")
+
+        side = min(img.size)
+        left, top = (img.width - side) // 2, (img.height - side) // 2
+        img = img.crop((left, top, left + side, top + side))
+
+        result = {}
+        # From the largest size down, every step starts from
+        # the previous (already reduced) rendition.
+        for size, pixels in sorted(sizes.items(), key=lambda s: -s[1]):
+            img.thumbnail((pixels, pixels))
+            for fmt, (_, pil_format, options) in FORMATS.items():
+                content = BytesIO()
+                img.save(content, format=pil_format, **options)
+                result[(size, fmt)] = content.getvalue()
+
+    return result
+
+
+def is_rendered(key: str) -> bool:
+    return all(media_storage.exists(name) for name in rendition_names(key))
+
+
+def store(key: str, renditions: Renditions) -> str:
+    for (size, fmt), content in renditions.items():
+        media_storage.save(
+            rendition_name(key, size, fmt), ContentFile(content)
+        )
+    return key
+
+
+def read(name: str) -> bytes:
+    with media_storage.open(name, "rb") as f:
+        return f.read()
+
+
+def apply(pk: int, photo: str, old_key: str, key: str) -> None:
+    """ Set avatar of a user unless the photo has been changed.
+    """
+    from .models import User
+
+    queryset = User.objects.filter(pk=pk, photo=photo, avatar_pending=True)
+
+    with transaction.atomic():
+        if queryset.update(avatar=key, avatar_pending=False):
+            if key != old_key:
+                acquire(stored_name(key))
+                release(stored_name(old_key))
+            logger.debug(f"Avatar of user {pk} has been processed ({key})")
+
+
+def process_pending(executor: Executor, batch_size: int) -> Tuple[int, int]:
+    """ Render a batch of pending avatars in `executor`. Photos that
+    have already been rendered (e.g. uploaded by another user) are
+    not rendered again. Returns numbers of processed and failed avatars.
+    """
+    from .models import User
+
+    users = list(
+        User.objects.filter(avatar_pending=True)
+        .order_by("pk")
+        .values_list("pk", "photo", "avatar")[:batch_size]
+    )
+
+    processed = failed = 0
+    futures = {}
+    for pk, photo, avatar in users:
+        try:
+            data = read(photo)
+        except OSError:
+            data = b""
+
+        key = rendition_key(data)
+        if data and is_rendered(key):
+            apply(pk, photo, avatar, key)
+            processed += 1
+            continue
+
+        future = executor.submit(render, data, settings.USER_AVATAR_SIZES)
+        futures[future] = (pk, photo, avatar, key)
+
+    for future in as_completed(futures):
+        pk, photo, old_key, key = futures[future]
+
+        try:
+            store(key, future.result())
+        except Exception as error:
+            logger.error(f"Avatar of user {pk} has failed: {error!r}")
+            key = ""
+            failed += 1
+        else:
+            processed += 1
+
+        apply(pk, photo, old_key, key)
+
+    return processed, failed
@@ -0,0 +1,140 @@
+import shutil
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from users import avatars
+
+
+def legacy_save(user, *args, **kwargs):
+    """ Avatar processing as it was done in the request: full decode
+    of the upload and a 150px JPEG thumbnail.
+    """
+    if user.photo and not user.photo._committed:
+        content = ContentFile(b"")
+        with Image.open(user.photo) as img:
+            img.thumbnail((150, 150))
+            img.convert(mode="RGB").save(content, format="JPEG")
+        user.photo.storage.save("userpics/thumb.jpg", content)
+        user.photo.seek(0)
+    return legacy_save.original(user, *args, **kwargs)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency of the settings request with a photo upload "
+        "when the avatar is processed in the request and in the "
+        "background, and throughput of the avatar worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--width", type=int, default=4000)
+        parser.add_argument("--height", type=int, default=3000)
+        parser.add_argument("--workers", type=int, default=None)
+
+    @override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    def handle(self, *args, **options):
+        photo = self.make_photo(options["width"], options["height"])
+        self.stdout.write(
+            f"Photo: {options['width']}x{options['height']}, "
+            f"{len(photo) / 1024 / 1024:.1f} MB"
+        )
+
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                self.run(photo, options)
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def run(self, photo, options):
+        User = get_user_model()
+        requests = options["requests"]
+
+        legacy_save.original = User.save
+        with mock.patch.object(User, "save", legacy_save):
+            before = self.measure_requests(photo, requests)
+        after = self.measure_requests(photo, requests)
+
+        self.stdout.write(f"{'request':<30} ms / request")
+        self.stdout.write(f"{'processing in request':<30} {before:.1f}")
+        self.stdout.write(f"{'background processing':<30} {after:.1f}")
+
+        sizes = settings.USER_AVATAR_SIZES
+        start = time.perf_counter()
+        avatars.render(photo, sizes)
+        single = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with Image.open(BytesIO(photo)) as img:
+            img.load()
+        full_decode = (time.perf_counter() - start) * 1000
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            list(pool.map(avatars.render, [photo], [sizes]))
+            start = time.perf_counter()
+            photos, sizes = [photo] * requests, [sizes] * requests
+            list(pool.map(avatars.render, photos, sizes))
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Full-resolution decode only: {full_decode:.1f} ms, "
+            f"all renditions with draft decoding: {single:.1f} ms"
+        )
+        self.stdout.write(
+            f"Worker throughput: {requests / elapsed:.1f} avatars / s"
+        )
+
+    def measure_requests(self, photo, requests):
+        with transaction.atomic():
+            user = get_user_model().objects.create(
+                username="benchmark_avatars", email="benchmark@mail.fake"
+            )
+            client = Client()
+            client.force_login(user)
+
+            elapsed = 0.0
+            for _ in range(requests):
+                upload = SimpleUploadedFile("photo.jpg", photo, "image/jpeg")
+                start = time.perf_counter()
+                response = client.post(
+                    reverse("settings"),
+                    data={"email": user.email, "photo": upload},
+                )
+                elapsed += time.perf_counter() - start
+                assert response.status_code == 302, response.status_code
+
+            transaction.set_rollback(True)
+
+        return elapsed / requests * 1000
+
+    @staticmethod
+    def make_photo(width, height):
+        size = (width, height)
+        img = Image.merge(
+            "RGB",
+            (
+                Image.radial_gradient("L").resize(size),
+                Image.effect_noise(size, 16),
+                Image.linear_gradient("L").resize(size),
+            ),
+        )
+        content = BytesIO()
+        img.save(content, format="JPEG", quality=90)
+        return content.getvalue()
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.storage import collect
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete photos / avatars that are not referenced anymore "
+        "and files left by failed uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=settings.MEDIA_COLLECT_GRACE_HOURS,
+            help="Keep files unreferenced for less than this.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report files that would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        unreferenced, untracked = collect(
+            timedelta(hours=options["grace_hours"]),
+            dry_run=options["dry_run"],
+        )
+        verb = "would be" if options["dry_run"] else "have been"
+        self.stdout.write(
+            f"{unreferenced} unreferenced and {untracked} untracked "
+            f"files {verb} deleted"
+        )
@@ -0,0 +1,76 @@
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from users.avatars import process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Render avatars of uploaded photos in a process pool "
+        "(runs until interrupted unless --once)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes (CPU count by default).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.USER_AVATAR_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.USER_AVATAR_POLL_INTERVAL,
+            help="Seconds to wait when there are no pending avatars.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no pending avatars.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render avatars of all users with photos again.",
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            queued = (
+                get_user_model()
+                .objects.exclude(photo="")
+                .update(avatar_pending=True)
+            )
+            self.stdout.write(f"{queued} avatars have been queued")
+
+        total_processed = total_failed = 0
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                processed, failed = process_pending(
+                    executor, options["batch_size"]
+                )
+                total_processed += processed
+                total_failed += failed
+
+                if processed or failed:
+                    self.stdout.write(
+                        f"Processed: {processed}, failed: {failed}"
+                    )
+                    continue
+
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(
+            f"Total processed: {total_processed}, failed: {total_failed}"
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.4 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+def queue_existing_photos(apps, schema_editor):
+    """ Existing photos are rendered by `manage.py process_avatars`.
+    """
+    User = apps.get_model("users", "User")
+    User.objects.exclude(photo="").update(avatar_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_auto_20190914_0948'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='thumb',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_pending',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(queue_existing_photos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.4 on 2026-10-18 11:00
+
+from collections import Counter
+
+from django.db import migrations, models
+import users.models
+import users.storage
+
+
+def count_references(apps, schema_editor):
+    """ Create reference counters of existing photos and avatars.
+    """
+    StoredFile = apps.get_model("users", "StoredFile")
+    User = apps.get_model("users", "User")
+
+    references = Counter()
+    for photo, avatar in User.objects.values_list("photo", "avatar"):
+        if photo:
+            references[photo] += 1
+        if avatar:
+            references[f"avatars/{avatar}"] += 1
+
+    StoredFile.objects.bulk_create(
+        [
+            StoredFile(name=name, references=count)
+            for name, count in references.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_avatar_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('references', models.IntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='photo',
+            field=models.ImageField(blank=True, storage=users.storage.ContentAddressedStorage(), upload_to=users.models.user_photo_path, validators=[users.models.user_photo_size_validator]),
+        ),
+        migrations.AddIndex(
+            model_name='storedfile',
+            index=models.Index(fields=['references', 'updated'], name='stored_file_refs_idx'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
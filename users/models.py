@@ -1,24 +1,27 @@
-import time
-from hashlib import md5
-
-from PIL import Image
-
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.contrib.staticfiles.templatetags.staticfiles import static
 from django.core.exceptions import ValidationError
-from django.core.files.base import ContentFile
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.db import models
+from django.db import models, transaction
 
+from . import avatars
+from .storage import (
+    PHOTO_PREFIX,
+    acquire,
+    content_hash,
+    hashed_name,
+    media_storage,
+    release,
+)
 
-def user_photo_path(instance, filename):
-    name, sep, ext = filename.rpartition(".")
-    if not sep:
-        ext = ".jpg"
 
-    new_filename = md5(str(time.time()).encode("utf-8")).hexdigest()
-    return f"userpics/{new_filename}.{ext}"
+def user_photo_path(instance, filename):
+    """ Photos are named after their content (see `users.storage`),
+    the client's `filename` is ignored.
+    """
+    file = instance.photo.file
+    return hashed_name(
+        PHOTO_PREFIX, content_hash(file), avatars.photo_extension(file)
+    )
 
 
 def user_photo_size_validator(photo):
@@ -34,36 +37,103 @@ class User(AbstractUser):
     email = models.EmailField(max_length=254, unique=True)
     photo = models.ImageField(
         blank=True,
+        storage=media_storage,
         upload_to=user_photo_path,
         validators=[user_photo_size_validator],
     )
-    thumb = models.ImageField(
-        blank=True, editable=False, upload_to=user_photo_path
+    avatar = models.CharField(blank=True, editable=False, max_length=64)
+    avatar_pending = models.BooleanField(
+        db_index=True, default=False, editable=False
     )
 
-    def save(self, *args, **kwargs):
-        if self.photo and self._state.adding:
-            self.create_thumbnail()
-        super().save(*args, **kwargs)
-
-    def create_thumbnail(self, save=False):
-        content = ContentFile(b"")
-        with Image.open(self.photo) as img:
-            img.thumbnail((150, 150))
-            img.convert(mode="RGB").save(content, format="JPEG")
-
-        self.thumb = InMemoryUploadedFile(
-            content, None, "temp.jpg", "image/jpeg", len(content), None
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_stored_names()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or {"photo", "avatar"} & set(fields):
+            self.remember_stored_names()
+
+    def remember_stored_names(self):
+        """ Remember stored names to update their references on save.
+        """
+        # A raw name until the field is accessed
+        photo = self.__dict__.get("photo")
+        self._stored_names = (
+            getattr(photo, "name", photo) or "",
+            avatars.stored_name(self.__dict__.get("avatar", "")),
         )
-        if save:
-            self.save(update_fields=["thumb"])
+
+    def save(self, *args, **kwargs):
+        if not self.photo:
+            self.avatar = ""
+            self.avatar_pending = False
+        elif not self.photo._committed:
+            # A new photo, it's processed by `manage.py process_avatars`
+            self.avatar_pending = True
+
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+            old_names = getattr(self, "_stored_names", ("", ""))
+            self.remember_stored_names()
+            for old, new in zip(old_names, self._stored_names):
+                if old != new:
+                    acquire(new)
+                    release(old)
+
+    @property
+    def has_avatar(self) -> bool:
+        return bool(self.photo and self.avatar and not self.avatar_pending)
+
+    @property
+    def avatar_urls(self):
+        """ URLs of all renditions: `avatar_urls[size][format]`.
+        """
+        return {
+            size: {
+                fmt: self.get_avatar_url(size, fmt) for fmt in avatars.FORMATS
+            }
+            for size in settings.USER_AVATAR_SIZES
+        }
+
+    def get_avatar_url(self, size: str, fmt: str = "jpeg") -> str:
+        if self.has_avatar:
+            return avatars.url(self.avatar, size, fmt)
+        return avatars.placeholder_url()
 
     def get_photo_url(self):
+        """ URL of the original (uploaded) photo.
+        """
         if self.photo:
             return self.photo.url
-        return static("ui/user.png")
+        return avatars.placeholder_url()
+
+    def get_mid_url(self):
+        return self.get_avatar_url("mid")
 
     def get_thumb_url(self):
-        if self.thumb:
-            return self.thumb.url
-        return self.get_photo_url()
+        return self.get_avatar_url("thumb")
+
+
+class StoredFile(models.Model):
+    """ Reference counter of a content-addressed file
+    (or an avatar rendition set), see `users.storage`.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    references = models.IntegerField(default=0)
+    updated = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["references", "updated"], name="stored_file_refs_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.references})"
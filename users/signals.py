@@ -0,0 +1,20 @@
+import logging
+
+from django.db.models.signals import post_delete
+
+from .models import User
+from .storage import release
+
+
+logger = logging.getLogger(__name__)
+
+
+def user_deleted(sender, instance, *args, **kwargs):
+    """ Release stored photo / avatar of a deleted user.
+    """
+    for name in getattr(instance, "_stored_names", ()):
+        release(name)
+    logger.debug(f"Stored files of user {instance.pk} have been released")
+
+
+post_delete.connect(user_deleted, sender=User)
@@ -0,0 +1,164 @@
+""" Content-addressed storage of photos and avatars.
+
+Files are named after a hash of their content, so identical uploads
+are stored once and a name never changes its content (its URL can be
+cached forever). Every stored name has a `StoredFile` row counting
+users referencing it; a rendition set of an avatar is counted as one
+name (`avatars/<key>`). Nothing is deleted in requests,
+`manage.py collect_media` removes unreferenced and untracked files.
+"""
+import hashlib
+import logging
+import os
+import uuid
+
+from datetime import timedelta
+from typing import Iterator, Tuple
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+logger = logging.getLogger(__name__)
+
+
+PHOTO_PREFIX = "userpics"
+AVATAR_PREFIX = "avatars"
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """ File system storage that never renames files: saving a name
+    that already exists is a no-op, because it has the same content.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+
+        # Written under a temporary name and renamed, so concurrent
+        # saves of the same content never see a partial file.
+        directory, basename = os.path.split(name)
+        temporary = f".{uuid.uuid4().hex}.{basename}"
+        temporary = super()._save(os.path.join(directory, temporary), content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+media_storage = ContentAddressedStorage()
+
+
+def content_hash(file) -> str:
+    """ SHA-256 of a Django `File`.
+    """
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(prefix: str, digest: str, extension: str) -> str:
+    return f"{prefix}/{digest[:2]}/{digest}.{extension}"
+
+
+def acquire(name: str) -> None:
+    """ Add a reference to a stored name.
+    """
+    from .models import StoredFile
+
+    if not name:
+        return
+    StoredFile.objects.get_or_create(name=name)
+    StoredFile.objects.filter(name=name).update(
+        references=F("references") + 1, updated=timezone.now()
+    )
+
+
+def release(name: str) -> None:
+    """ Remove a reference to a stored name.
+    """
+    from .models import StoredFile
+
+    if not name:
+        return
+    StoredFile.objects.filter(name=name).update(
+        references=F("references") - 1, updated=timezone.now()
+    )
+
+
+def delete(name: str) -> None:
+    """ Delete a stored file or a rendition set.
+    """
+    if not name.startswith(f"{AVATAR_PREFIX}/"):
+        media_storage.delete(name)
+        return
+
+    for filename in walk(name):
+        media_storage.delete(filename)
+
+
+def walk(prefix: str) -> Iterator[str]:
+    """ Names of all files under `prefix`.
+    """
+    if not media_storage.exists(prefix):
+        return
+    directories, files = media_storage.listdir(prefix)
+    for filename in files:
+        yield f"{prefix}/{filename}"
+    for directory in directories:
+        yield from walk(f"{prefix}/{directory}")
+
+
+def tracked_name(name: str) -> str:
+    """ Name of the reference counter of a file.
+    """
+    if name.startswith(f"{AVATAR_PREFIX}/"):
+        return name.rpartition("/")[0]
+    return name
+
+
+def collect(grace: timedelta, dry_run: bool = False) -> Tuple[int, int]:
+    """ Delete files that are not referenced (for `grace` at least)
+    and files without a counter older than `grace` (e.g. saved in a
+    rolled back transaction). Returns numbers of deleted names
+    and untracked files.
+    """
+    from .models import StoredFile
+
+    deadline = timezone.now() - grace
+
+    unreferenced = 0
+    stale = StoredFile.objects.filter(references__lte=0, updated__lt=deadline)
+    for stored in stale.iterator():
+        if not dry_run:
+            # Might have been referenced again meanwhile
+            deleted, _ = StoredFile.objects.filter(
+                pk=stored.pk, references__lte=0
+            ).delete()
+            if not deleted:
+                continue
+            delete(stored.name)
+
+        unreferenced += 1
+        logger.debug(f"{stored.name} is not referenced anymore")
+
+    untracked = 0
+    tracked = set(StoredFile.objects.values_list("name", flat=True))
+    for prefix in (PHOTO_PREFIX, AVATAR_PREFIX):
+        for name in walk(prefix):
+            if tracked_name(name) in tracked:
+                continue
+            if media_storage.get_modified_time(name) >= deadline:
+                continue
+            if not dry_run:
+                media_storage.delete(name)
+            untracked += 1
+            logger.debug(f"{name} is not tracked")
+
+    return unreferenced, untracked
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from users import avatars
+from users.models import StoredFile
+from users.storage import media_storage
+
+from .test_views import CreateDataMixin, TEST_USER, TEST_PASSWORD
+
+
+def make_image(size=(800, 600), mode="RGB", fmt="JPEG", color="red"):
+    content = BytesIO()
+    Image.new(mode, size, color).save(content, format=fmt)
+    return content.getvalue()
+
+
+def make_upload(name="photo.jpg", **kwargs):
+    return SimpleUploadedFile(name, make_image(**kwargs), "image/jpeg")
+
+
+class TestRender(TestCase):
+    def test_sizes_and_formats(self):
+        sizes = {"small": 40, "large": 100}
+        renditions = avatars.render(make_image(), sizes)
+
+        self.assertEqual(
+            set(renditions),
+            {(s, f) for s in sizes for f in ["jpeg", "webp"]},
+        )
+        for (size, fmt), data in renditions.items():
+            with Image.open(BytesIO(data)) as img:
+                self.assertEqual(img.size, (sizes[size], sizes[size]))
+                self.assertEqual(img.format, fmt.upper())
+
+    def test_transparent_png(self):
+        data = make_image(mode="RGBA", fmt="PNG", size=(50, 200))
+        renditions = avatars.render(data, {"small": 40})
+
+        with Image.open(BytesIO(renditions[("small", "jpeg")])) as img:
+            self.assertEqual(img.size, (40, 40))
+            self.assertEqual(img.mode, "RGB")
+
+    def test_invalid_image(self):
+        with self.assertRaises(OSError):
+            avatars.render(b"not an image", {"small": 40})
+
+
+class TestAvatars(CreateDataMixin, TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(media.disable)
+
+    def rendition_files(self):
+        path = os.path.join(self.media_root, "avatars")
+        return [name for _, _, names in os.walk(path) for name in names]
+
+    def process(self, executor=None):
+        with executor or ThreadPoolExecutor(2) as executor:
+            return avatars.process_pending(executor, batch_size=10)
+
+    def test_upload_is_not_processed_in_request(self):
+        client = Client()
+        client.login(username=TEST_USER, password=TEST_PASSWORD)
+        response = client.post(
+            reverse("settings"),
+            data={"email": self.user.email, "photo": make_upload()},
+        )
+        self.assertEqual(response.status_code, 302)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.avatar_pending)
+        self.assertFalse(self.user.has_avatar)
+        self.assertEqual(self.user.get_thumb_url(), avatars.placeholder_url())
+        self.assertEqual(self.rendition_files(), [])
+
+    def test_process_pending(self):
+        user = get_user_model().objects.create(
+            username="with_photo", email="photo@mail.fake", photo=make_upload()
+        )
+        self.assertEqual(self.process(), (1, 0))
+
+        user.refresh_from_db()
+        self.assertTrue(user.has_avatar)
+        self.assertFalse(user.avatar_pending)
+        self.assertIn(
+            f"avatars/{user.avatar}/thumb.jpg", user.get_thumb_url()
+        )
+        self.assertIn(
+            f"avatars/{user.avatar}/big.webp", user.avatar_urls["big"]["webp"]
+        )
+        for name in avatars.rendition_names(user.avatar):
+            self.assertTrue(media_storage.exists(name))
+
+        old_key = user.avatar
+        user.photo = make_upload(size=(300, 300))
+        user.save()
+        self.assertEqual(user.get_thumb_url(), avatars.placeholder_url())
+        self.assertEqual(user.get_photo_url(), user.photo.url)
+
+        self.assertEqual(self.process(), (1, 0))
+        user.refresh_from_db()
+        self.assertNotEqual(user.avatar, old_key)
+        self.assertEqual(
+            StoredFile.objects.get(name=f"avatars/{old_key}").references, 0
+        )
+        self.assertEqual(
+            StoredFile.objects.get(name=f"avatars/{user.avatar}").references,
+            1,
+        )
+
+    def test_photo_changed_while_processing(self):
+        user = get_user_model().objects.create(
+            username="with_photo", email="photo@mail.fake", photo=make_upload()
+        )
+
+        class ChangingExecutor(ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                user.photo = make_upload(color="blue")
+                user.save()
+                return super().submit(*args, **kwargs)
+
+        self.process(ChangingExecutor(1))
+
+        user.refresh_from_db()
+        self.assertTrue(user.avatar_pending)
+        self.assertFalse(user.avatar)
+
+        self.assertEqual(self.process(), (1, 0))
+
+    def test_invalid_photo(self):
+        user = get_user_model().objects.create(
+            username="with_photo",
+            email="photo@mail.fake",
+            photo=SimpleUploadedFile("photo.jpg", b"broken", "image/jpeg"),
+        )
+        self.assertEqual(self.process(), (0, 1))
+
+        user.refresh_from_db()
+        self.assertFalse(user.avatar_pending)
+        self.assertEqual(user.get_thumb_url(), avatars.placeholder_url())
+
+    def test_command(self):
+        get_user_model().objects.create(
+            username="with_photo", email="photo@mail.fake", photo=make_upload()
+        )
+        out = StringIO()
+        call_command("process_avatars", "--once", "--workers=1", stdout=out)
+
+        self.assertIn("Total processed: 1, failed: 0", out.getvalue())
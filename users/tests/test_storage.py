@@ -0,0 +1,178 @@
+import os
+import shutil
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from users import avatars
+from users.models import StoredFile
+from users.storage import collect, media_storage
+from users.views import serve_media
+
+from .test_avatars import make_upload
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(media.disable)
+
+    def create_user(self, name, **kwargs):
+        return get_user_model().objects.create(
+            username=name, email=f"{name}@mail.fake", **kwargs
+        )
+
+    def references(self, name):
+        return StoredFile.objects.get(name=name).references
+
+    def make_old(self, name):
+        old = time.time() - 3600 * 48
+        os.utime(media_storage.path(name), (old, old))
+
+
+class TestContentAddressedStorage(MediaRootMixin, TestCase):
+    def test_identical_uploads(self):
+        first = self.create_user("first", photo=make_upload())
+        second = self.create_user("second", photo=make_upload())
+        other = self.create_user("other", photo=make_upload(color="blue"))
+
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertNotEqual(first.photo.name, other.photo.name)
+        self.assertRegex(first.photo.name, r"^userpics/\w\w/\w{64}\.jpg$")
+        self.assertEqual(
+            os.listdir(os.path.dirname(media_storage.path(first.photo.name))),
+            [os.path.basename(first.photo.name)],
+        )
+        self.assertEqual(self.references(first.photo.name), 2)
+
+    def test_extension_by_content(self):
+        first = self.create_user("first", photo=make_upload("a.JPG"))
+        second = self.create_user("second", photo=make_upload("a.jpeg"))
+        png = self.create_user(
+            "png", photo=make_upload("a.jpg", fmt="PNG", color="blue")
+        )
+
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertTrue(first.photo.name.endswith(".jpg"))
+        self.assertTrue(png.photo.name.endswith(".png"))
+
+    def test_save_existing_name(self):
+        name = media_storage.save("userpics/a/b.txt", ContentFile(b"1"))
+        again = media_storage.save("userpics/a/b.txt", ContentFile(b"1"))
+
+        self.assertEqual(name, again)
+        self.assertEqual(
+            os.listdir(media_storage.path("userpics/a")), ["b.txt"]
+        )
+
+    def test_references(self):
+        user = self.create_user("user", photo=make_upload())
+        first_photo = user.photo.name
+
+        user.photo = make_upload(color="blue")
+        user.save()
+        self.assertEqual(self.references(first_photo), 0)
+        self.assertEqual(self.references(user.photo.name), 1)
+
+        user.refresh_from_db()
+        user.photo = None
+        user.save()
+        self.assertFalse(StoredFile.objects.filter(references__gt=0).exists())
+
+        user.photo = make_upload()
+        user.save()
+        get_user_model().objects.filter(pk=user.pk).delete()
+        self.assertEqual(self.references(first_photo), 0)
+
+    def test_identical_photos_are_rendered_once(self):
+        first = self.create_user("first", photo=make_upload())
+        second = self.create_user("second", photo=make_upload())
+
+        with ThreadPoolExecutor(1) as executor:
+            with mock.patch.object(
+                executor, "submit", wraps=executor.submit
+            ) as submit:
+                self.assertEqual(avatars.process_pending(executor, 1), (1, 0))
+                self.assertEqual(avatars.process_pending(executor, 1), (1, 0))
+
+        self.assertEqual(submit.call_count, 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.avatar, second.avatar)
+        self.assertEqual(self.references(f"avatars/{first.avatar}"), 2)
+
+    def test_serve_media(self):
+        user = self.create_user("user", photo=make_upload())
+        request = RequestFactory().get("/")
+
+        response = serve_media(
+            request, user.photo.name, document_root=self.media_root
+        )
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+        media_storage.save("other/file.txt", ContentFile(b"1"))
+        response = serve_media(
+            request, "other/file.txt", document_root=self.media_root
+        )
+        self.assertFalse(response.has_header("Cache-Control"))
+
+
+class TestCollect(MediaRootMixin, TestCase):
+    def test_unreferenced(self):
+        user = self.create_user("user", photo=make_upload())
+        old_photo = user.photo.name
+        user.photo = make_upload(color="blue")
+        user.save()
+
+        # Within the grace period
+        self.assertEqual(collect(timedelta(hours=1)), (0, 0))
+        self.assertTrue(media_storage.exists(old_photo))
+
+        StoredFile.objects.filter(name=old_photo).update(
+            updated=timezone.now() - timedelta(hours=2)
+        )
+        self.assertEqual(collect(timedelta(hours=1), dry_run=True), (1, 0))
+        self.assertTrue(media_storage.exists(old_photo))
+
+        self.assertEqual(collect(timedelta(hours=1)), (1, 0))
+        self.assertFalse(media_storage.exists(old_photo))
+        self.assertFalse(StoredFile.objects.filter(name=old_photo).exists())
+        self.assertTrue(media_storage.exists(user.photo.name))
+
+    def test_unreferenced_avatar(self):
+        key = avatars.rendition_key(b"photo")
+        avatars.store(key, {("thumb", "jpeg"): b"1", ("big", "webp"): b"2"})
+        StoredFile.objects.create(name=avatars.stored_name(key))
+        StoredFile.objects.update(updated=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(collect(timedelta(hours=1)), (1, 0))
+        self.assertFalse(
+            media_storage.exists(avatars.rendition_name(key, "thumb", "jpeg"))
+        )
+
+    def test_untracked(self):
+        old = media_storage.save("userpics/aa/old.jpg", ContentFile(b"1"))
+        new = media_storage.save("avatars/bb/thumb.jpg", ContentFile(b"1"))
+        self.make_old(old)
+
+        out = StringIO()
+        call_command("collect_media", "--grace-hours=1", stdout=out)
+
+        self.assertIn("0 unreferenced and 1 untracked", out.getvalue())
+        self.assertFalse(media_storage.exists(old))
+        self.assertTrue(media_storage.exists(new))
@@ -20,6 +20,12 @@ class CreateDataMixin:
         cls.user.set_password(TEST_PASSWORD)
         cls.user.save()
 
+    def assertMessage(self, client, text):
+        # Flash messages are loaded with the page state
+        response = client.get(reverse("page_state"))
+        messages = [message["text"] for message in response.json()["messages"]]
+        self.assertIn(text, messages)
+
 
 class TestLogIn(CreateDataMixin, TestCase):
     def test_GET_unauthorized(self):
@@ -51,9 +57,7 @@ class TestLogIn(CreateDataMixin, TestCase):
         response = client.post(reverse("login"), follow=True)
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>You have already logged in.</p>", str(response.content)
-        )
+        self.assertMessage(client, "You have already logged in.")
 
     def test_POST_unauthorized(self):
         client = Client()
@@ -64,9 +68,7 @@ class TestLogIn(CreateDataMixin, TestCase):
         )
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>You have succesfully logged in!</p>", str(response.content)
-        )
+        self.assertMessage(client, "You have succesfully logged in!")
 
 
 class TestLogOut(CreateDataMixin, TestCase):
@@ -75,9 +77,7 @@ class TestLogOut(CreateDataMixin, TestCase):
         response = client.post(reverse("logout"), data={}, follow=True)
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>You are not authenticated!</p>", str(response.content)
-        )
+        self.assertMessage(client, "You are not authenticated!")
 
     def test_POST_authorized(self):
         client = Client()
@@ -85,9 +85,8 @@ class TestLogOut(CreateDataMixin, TestCase):
         response = client.post(reverse("logout"), data={}, follow=True)
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>Goodbye! You have successfully logged out.</p>",
-            str(response.content),
+        self.assertMessage(
+            client, "Goodbye! You have successfully logged out."
         )
 
 
@@ -105,9 +104,7 @@ class TestSignUp(CreateDataMixin, TestCase):
         response = client.get(reverse("signup"), follow=True)
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>You have already logged in.</p>", str(response.content)
-        )
+        self.assertMessage(client, "You have already logged in.")
 
     def test_POST_authorized(self):
         client = Client()
@@ -115,9 +112,7 @@ class TestSignUp(CreateDataMixin, TestCase):
         response = client.post(reverse("signup"), follow=True)
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>You have already logged in.</p>", str(response.content)
-        )
+        self.assertMessage(client, "You have already logged in.")
 
     def test_POST_registration(self):
         client = Client()
@@ -133,9 +128,7 @@ class TestSignUp(CreateDataMixin, TestCase):
         )
 
         self.assertRedirects(response, reverse("index"))
-        self.assertInHTML(
-            "<p>Thank you for registration!</p>", str(response.content)
-        )
+        self.assertMessage(client, "Thank you for registration!")
 
         self.assertTrue(
             self.user_model.objects.filter(username="new_user").exists()
@@ -175,9 +168,8 @@ class TestSettings(CreateDataMixin, TestCase):
             follow=True,
         )
         self.assertRedirects(response, reverse("settings"))
-        self.assertInHTML(
-            "<p>Your settings have been successfully updated!</p>",
-            str(response.content),
+        self.assertMessage(
+            client, "Your settings have been successfully updated!"
         )
 
         self.user.refresh_from_db()
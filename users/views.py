@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
 from django.views.generic.edit import CreateView, FormView, UpdateView, View
+from django.views.static import serve
 
 from questions.views import TrendingMixin
 
 from .forms import LogInForm, SettingsForm, SignUpForm
+from .storage import AVATAR_PREFIX, PHOTO_PREFIX
 
 
 class LogIn(TrendingMixin, FormView):
@@ -85,3 +89,20 @@ class Settings(TrendingMixin, LoginRequiredMixin, UpdateView):
 
     def get_object(self, queryset=None):
         return self.request.user
+
+
+def serve_media(request, path, document_root=None):
+    """ Serve media files in development. Photos and avatars are
+    content-addressed (their URLs never change content), so they
+    are cached as immutable. In production the web server should
+    send the same `Cache-Control` for these paths.
+    """
+    response = serve(request, path, document_root=document_root)
+    if path.startswith((f"{PHOTO_PREFIX}/", f"{AVATAR_PREFIX}/")):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.MEDIA_IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    return response